@@ -0,0 +1,239 @@
+# analysis_graph.py
+# Per-symbol analysis pipeline as a dependency graph of memoized nodes.
+#
+# Every detector is a node that declares its inputs; asking for a node
+# evaluates whatever it depends on first. Each node's value is memoized per
+# (symbol, interval, node, the params that node depends on), so asking for all
+# momentum outputs computes S/R levels, the zone sweep and simple gaps once and
+# hands the same objects to every momentum detector:
+#
+#   candles ─┬─ colors
+#            ├─ levels ───────────────────────┬─────────────┬─ momentum_gaps
+#            ├─ simple_gaps ──────────────────┼─────────────┘
+#            └─ zones ─┬─ rbr_zones, dbd_zones ─ momentum_zones
+#                      └─ dbr_zones, rbd_zones ─ continuation_zones
+#
+#   g = AnalysisGraph()                          # candles loaded with fetch_ohlc_data(..., as_series=True)
+#   g.run("RELIANCE", "60minute", params={"pct_left": 0.01, "pct_right": 0.015})
+#   -> {"momentum_zones": {...}, "continuation_zones": {...}, "momentum_gaps": {...}}
+#
+# Changing a param only recomputes the nodes downstream of it (a new pct_left
+# re-runs levels and the momentum detectors, not the zone sweep).
+
+from typing import Callable, List, Dict, Optional, Tuple
+
+from candle_series import as_series
+from candle_colors import BASING_THRESHOLD, candle_colors
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from zone_scanner import find_zones
+from gaps_simple import detect_simple_gaps
+from momentum_zones import detect_momentum_zones
+from momentum_continuation_zones import detect_momentum_continuation_zones
+from momentum_gaps import detect_momentum_gaps
+
+Candle = Dict[str, float]
+
+# Every param a node may depend on, with its default (lookback None: the whole series)
+DEFAULT_PARAMS: Dict[str, object] = {
+    "pct_left": 0.02,
+    "pct_right": 0.03,
+    "lookback": None,
+    "basing_threshold": BASING_THRESHOLD,
+}
+
+MOMENTUM = ("momentum_zones", "continuation_zones", "momentum_gaps")
+
+
+# -------------------- zone normalization --------------------
+# find_demand_zones / find_supply_zones rows -> the zone dicts the momentum detectors take.
+
+def _leg_in(z: Dict) -> int:
+    return int(z["leg_in_idx"]) if z.get("leg_in_idx") is not None else int(z["base_start_idx"])
+
+def normalize_rbr_zones(raw: List[Dict]) -> List[Dict]:
+    """RBR demand zones for detect_momentum_zones (leg-out candle date as the RBR date)."""
+    return [{
+        "zone_low": float(z["bottom"]),
+        "zone_high": float(z["top"]),
+        "base_start": int(z["base_start_idx"]),
+        "base_end": int(z["base_end_idx"]),
+        "leg_in": _leg_in(z),
+        "start_date": z.get("created_at"),
+        "end_date": z.get("created_at"),
+    } for z in raw if z.get("type") == "RBR"]
+
+def normalize_dbd_zones(raw: List[Dict]) -> List[Dict]:
+    """DBD supply zones for detect_momentum_zones (leg-out candle date as the DBD date)."""
+    return [{
+        "zone_low": float(z["proximal"]),
+        "zone_high": float(z["distal"]),
+        "base_start": int(z["base_start_idx"]),
+        "base_end": int(z["base_end_idx"]),
+        "leg_in": _leg_in(z),
+        "start_date": z.get("created_at"),
+        "end_date": z.get("created_at"),
+    } for z in raw if z.get("type") == "DBD"]
+
+def normalize_dbr_zones(raw: List[Dict]) -> List[Dict]:
+    """DBR demand zones for detect_momentum_continuation_zones."""
+    return [{
+        "zone_low": float(z["bottom"]),
+        "zone_high": float(z["top"]),
+        "base_start": int(z["base_start_idx"]),
+        "base_end": int(z["base_end_idx"]),
+        "zone_date": z.get("created_at"),
+    } for z in raw if z.get("type") == "DBR"]
+
+def normalize_rbd_zones(raw: List[Dict]) -> List[Dict]:
+    """RBD supply zones for detect_momentum_continuation_zones."""
+    return [{
+        "zone_low": float(z["proximal"]),
+        "zone_high": float(z["distal"]),
+        "base_start": int(z["base_start_idx"]),
+        "base_end": int(z["base_end_idx"]),
+        "zone_date": z.get("created_at"),
+    } for z in raw if z.get("type") == "RBD"]
+
+
+# -------------------- nodes --------------------
+# name -> (fn(*input values, **own params), input nodes, own params)
+
+def _zones(s, lookback, basing_threshold):
+    return find_zones(s, lookback=len(s) if lookback is None else lookback, basing_threshold=basing_threshold)
+
+def _momentum_zones(s, levels, rbr, dbd):
+    return detect_momentum_zones(s, levels["resistances"], levels["supports"], rbr, dbd)
+
+def _continuation_zones(s, levels, dbr, rbd):
+    return detect_momentum_continuation_zones(s, levels["resistances"], levels["supports"], dbr, rbd)
+
+def _momentum_gaps(s, gaps, levels):
+    return detect_momentum_gaps(s, gaps, levels["resistances"], levels["supports"])
+
+NODES: Dict[str, Tuple[Callable, Tuple[str, ...], Tuple[str, ...]]] = {
+    "colors": (lambda s, basing_threshold: candle_colors(s, basing_threshold), ("candles",), ("basing_threshold",)),
+    "levels": (all_bilateral_resistance_support, ("candles",), ("pct_left", "pct_right")),
+    "simple_gaps": (detect_simple_gaps, ("candles",), ()),
+    "zones": (_zones, ("candles",), ("lookback", "basing_threshold")),
+    "rbr_zones": (lambda z: normalize_rbr_zones(z["demand"]), ("zones",), ()),
+    "dbr_zones": (lambda z: normalize_dbr_zones(z["demand"]), ("zones",), ()),
+    "dbd_zones": (lambda z: normalize_dbd_zones(z["supply"]), ("zones",), ()),
+    "rbd_zones": (lambda z: normalize_rbd_zones(z["supply"]), ("zones",), ()),
+    "momentum_zones": (_momentum_zones, ("candles", "levels", "rbr_zones", "dbd_zones"), ()),
+    "continuation_zones": (_continuation_zones, ("candles", "levels", "dbr_zones", "rbd_zones"), ()),
+    "momentum_gaps": (_momentum_gaps, ("candles", "simple_gaps", "levels"), ()),
+}
+
+def _param_closure() -> Dict[str, Tuple[str, ...]]:
+    """Params each node depends on, directly or through its inputs."""
+    out: Dict[str, Tuple[str, ...]] = {"candles": ()}
+    def visit(name):
+        if name not in out:
+            _, inputs, own = NODES[name]
+            out[name] = tuple(sorted(set(own).union(*(visit(i) for i in inputs))))
+        return out[name]
+    for name in NODES:
+        visit(name)
+    return out
+
+NODE_PARAMS = _param_closure()
+
+
+# -------------------- graph --------------------
+
+def _fetch_loader(days_back: int) -> Callable:
+    def load(symbol, interval):
+        from fetch import fetch_ohlc_data
+        return fetch_ohlc_data(symbol, interval, days_back, as_series=True)
+    return load
+
+
+class AnalysisGraph:
+    """
+    Memoized detector pipeline over many (symbol, interval) series.
+
+    Args:
+        loader: callable(symbol, interval) -> candles, for series not given with set_candles
+                (default: fetch_ohlc_data(symbol, interval, days_back, as_series=True))
+        days_back (int): history window of the default loader
+        params (dict): overrides of DEFAULT_PARAMS for every call on this graph
+
+    Attributes:
+        computed (Dict[str, int]): evaluations per node (memo misses)
+        hits (int): lookups answered from the memo
+    """
+
+    def __init__(self, loader: Optional[Callable] = None, days_back: int = 300, params: Optional[Dict] = None):
+        self.loader = loader or _fetch_loader(days_back)
+        self.params = self._merge(DEFAULT_PARAMS, params)
+        self._memo: Dict[tuple, object] = {}
+        self.computed: Dict[str, int] = {}
+        self.hits = 0
+
+    @staticmethod
+    def _merge(base: Dict, override: Optional[Dict]) -> Dict:
+        unknown = set(override or ()) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown analysis params: {', '.join(sorted(unknown))}")
+        return {**base, **(override or {})}
+
+    def set_candles(self, symbol: str, interval: str, candles) -> None:
+        """Use `candles` for (symbol, interval) and forget anything computed from older ones."""
+        self.drop(symbol, interval)
+        self._memo[(symbol, interval, "candles", ())] = as_series(candles)
+
+    def drop(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """Forget memoized nodes (candles included) for a symbol / interval; no args clears everything."""
+        self._memo = {
+            k: v for k, v in self._memo.items()
+            if not ((symbol is None or k[0] == symbol) and (interval is None or k[1] == interval))
+        }
+
+    def get(self, symbol: str, interval: str, node: str, params: Optional[Dict] = None):
+        """
+        Value of one node for one series, computing missing inputs first.
+
+        Raises:
+            ValueError: unknown node or param name
+        """
+        if node != "candles" and node not in NODES:
+            raise ValueError(f"Unknown analysis node {node!r} (choose from {', '.join(NODES)})")
+        return self._eval(symbol, interval, node, self._merge(self.params, params))
+
+    def run(self, symbol: str, interval: str, nodes=MOMENTUM, params: Optional[Dict] = None) -> Dict[str, object]:
+        """{node: value} for several nodes of one series; shared inputs are computed once."""
+        return {node: self.get(symbol, interval, node, params) for node in nodes}
+
+    def _eval(self, symbol, interval, node, params):
+        key = (symbol, interval, node, tuple(params[p] for p in NODE_PARAMS[node]))
+        if key in self._memo:
+            self.hits += 1
+            return self._memo[key]
+        if node == "candles":
+            value = as_series(self.loader(symbol, interval))
+        else:
+            fn, inputs, own = NODES[node]
+            args = [self._eval(symbol, interval, i, params) for i in inputs]
+            value = fn(*args, **{p: params[p] for p in own})
+        self.computed[node] = self.computed.get(node, 0) + 1
+        self._memo[key] = value
+        return value
+
+
+def series_graph(candles) -> AnalysisGraph:
+    """
+    A graph over just this series, cached on the CandleSeries: every caller
+    asking for nodes of the same series shares its memo. Use symbol=None,
+    interval=None with it (or analyze()).
+    """
+    s = as_series(candles)
+    g = s._derived.get("analysis_graph")
+    if g is None:
+        g = AnalysisGraph(loader=lambda symbol, interval: s)
+        s._derived["analysis_graph"] = g
+    return g
+
+
+def analyze(candles, node: str, **params):
+    """One node for a single series, e.g. analyze(candles, "momentum_zones", pct_left=0.01)."""
+    return series_graph(candles).get(None, None, node, params)
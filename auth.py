@@ -1,11 +1,35 @@
-from kiteconnect import KiteConnect
-import os 
-from dotenv import load_dotenv
+import os
+import threading
+
+# The shared Kite client is created on first use (get_client), so importing
+# fetch / detectors never loads kiteconnect or reads .env. Tests and offline
+# runs can inject their own client with set_client().
+_client = None
+_client_lock = threading.Lock()
 
 
 def get_kite():
+    from dotenv import load_dotenv
+    from kiteconnect import KiteConnect
+
     load_dotenv()
     kite_object = KiteConnect(api_key=os.getenv("API_KEY"))
     access_token_for_other = os.getenv("ACCESS_TOKEN")
     kite_object.set_access_token(access_token_for_other)
-    return kite_object 
\ No newline at end of file
+    return kite_object
+
+
+def get_client():
+    """Shared Kite client; built with get_kite() the first time it is needed."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = get_kite()
+        return _client
+
+
+def set_client(client) -> None:
+    """Install `client` (anything with the KiteConnect methods we call) as the shared client; None resets it."""
+    global _client
+    with _client_lock:
+        _client = client
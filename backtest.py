@@ -0,0 +1,223 @@
+# backtest.py
+# Zone / gap backtests straight from detector output.
+#
+#   rs = analyze(candles, "momentum_zones")
+#   bt = backtest(candles, rs, r_multiples=(1, 2, 3))
+#   bt["summary"]["momentum_demand"][2.0]  -> {"trades", "wins", "losses", "win_rate", "expectancy", ...}
+#
+# Every zone row with zone_low/zone_high (or bottom/top, proximal/distal) is a
+# limit order placed on the bar after the zone is known (breach_index for
+# momentum zones, leg_out_idx for basing zones, index for gaps, else the
+# breach_date / created_at / current_date bar):
+#   long  (demand lists): buy at zone_high, stop at zone_low
+#   short (supply lists): sell at zone_low, stop at zone_high
+# and each target is entry +/- R x (entry - stop). Fills:
+#   - entry on the first bar whose low (high) reaches the entry; a bar opening
+#     through the entry fills at its open, and one opening beyond the stop too is
+#     counted as "gapped" (no trade)
+#   - the stop is live from the entry bar on, targets from the next bar; when a
+#     bar reaches both, the stop is assumed first; gaps through either fill at the open
+#   - still open at the last bar (or after max_hold bars) -> marked at that close
+# Results are in R (planned risk = zone height).
+#
+# All first-touch searches run as vectorized sparse-table searches over the
+# whole batch of zones (range_index), one per side and R multiple: there is no
+# per-bar Python loop, so thousands of zones over years of hourly bars take
+# well under a second.
+
+from typing import List, Dict, Optional, Sequence
+
+import numpy as np
+
+from candle_series import as_series
+from candle_store import to_epoch
+from range_index import series_table
+from zone_alerts import zone_bounds, zones_in
+
+# detector lists (last key of the result path) -> side traded
+SIDES = {
+    "momentum_demand": "long", "momentum_supply": "short",
+    "continuation_demand": "long", "continuation_supply": "short",
+    "pro_gap_ups": "long", "pro_gap_downs": "short",
+    "momentum_gap_ups": "long", "momentum_gap_downs": "short",
+    "demand": "long", "supply": "short",
+}
+
+# bar at which a zone becomes known, first key present wins
+FORMED_INDEX = ("breach_index", "leg_out_idx", "index")
+FORMED_DATE = ("breach_date", "created_at", "current_date")
+
+
+def formed_index(s, z: Dict) -> int:
+    """Bar index at which zone z is known (its order goes in on the next bar)."""
+    for k in FORMED_INDEX:
+        if z.get(k) is not None:
+            return int(z[k])
+    for k in FORMED_DATE:
+        if z.get(k) is not None:
+            return int(np.searchsorted(s.time, to_epoch(z[k])))
+    raise ValueError(f"zone has none of {FORMED_INDEX + FORMED_DATE}: {sorted(z)}")
+
+
+def simulate(
+    candles,
+    formed,
+    zone_low,
+    zone_high,
+    side: str = "long",
+    r_multiples: Sequence[float] = (1.0, 2.0, 3.0),
+    max_wait: Optional[int] = None,
+    max_hold: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Columnar backtest of many zones on one side.
+
+    Args:
+        formed (array-like[int]): bar at which each zone is known
+        zone_low, zone_high (array-like[float]): zone bounds
+        side (str): "long" (entry zone_high, stop zone_low) or "short" (entry zone_low, stop zone_high)
+        r_multiples: targets, in multiples of the entry-stop distance
+        max_wait (int): bars the order stays working (None = to the end)
+        max_hold (int): bars a trade is held before it is closed at the bar's close (None = to the end)
+
+    Returns:
+        dict of arrays, one row per zone:
+            "entry", "stop", "fill", "entry_index" (-1 if never filled),
+            "status" ("filled" / "untouched" / "gapped" / "flat" for zero-height zones),
+            "stop_index" (-1 if never stopped),
+            and per R multiple r: ("exit_index", r), ("exit_price", r), ("outcome", r)
+            ("target" / "stop" / "open" / "time" / "" when not traded), ("r", r) (NaN when not traded)
+    """
+    if side not in ("long", "short"):
+        raise ValueError(f"side must be 'long' or 'short', got {side!r}")
+    s = as_series(candles)
+    n, last = len(s), len(s) - 1
+    formed = np.asarray(formed, dtype=np.int64)
+    lo = np.asarray(zone_low, dtype=np.float64)
+    hi = np.asarray(zone_high, dtype=np.float64)
+    m = len(formed)
+    long = side == "long"
+    entry, stop = (hi, lo) if long else (lo, hi)
+    risk = np.abs(entry - stop)
+    out = {"entry": entry, "stop": stop}
+    if m == 0 or n == 0:
+        out.update(fill=np.full(m, np.nan), entry_index=np.full(m, -1, dtype=np.int64),
+                   stop_index=np.full(m, -1, dtype=np.int64), status=np.full(m, "untouched", dtype=object))
+        for r in r_multiples:
+            out[("exit_index", r)] = np.full(m, -1, dtype=np.int64)
+            out[("exit_price", r)] = np.full(m, np.nan)
+            out[("outcome", r)] = np.full(m, "", dtype=object)
+            out[("r", r)] = np.full(m, np.nan)
+        return out
+    # price reaching a level: lows for a long entry / stop and a short target, highs otherwise
+    toward, away = (series_table(s, "low"), series_table(s, "high")) if long else \
+                   (series_table(s, "high"), series_table(s, "low"))
+
+    # entry: first touch of the entry price while the order works
+    start = np.minimum(formed + 1, n)
+    wait_end = np.full(m, last) if max_wait is None else np.minimum(start + max_wait - 1, last)
+    touch = np.atleast_1d(toward.first_index(start, wait_end, entry))
+    filled = (touch >= 0) & (risk > 0)
+    k = np.where(filled, touch, 0)
+    # fmin / fmax: a NaN open fills at the order price itself (so do stops and targets below)
+    fill = np.fmin(entry, s.open[k]) if long else np.fmax(entry, s.open[k])
+    gapped = filled & ((fill <= stop) if long else (fill >= stop))
+    traded = filled & ~gapped
+    status = np.full(m, "untouched", dtype=object)
+    status[filled] = "filled"
+    status[gapped] = "gapped"
+    status[risk <= 0] = "flat"
+
+    # stop from the entry bar on; a > b (n > hold_end) makes the search return -1 for non-trades
+    a = np.where(traded, k, n)
+    hold_end = np.full(m, last) if max_hold is None else np.minimum(k + max_hold, last)
+    stop_idx = np.atleast_1d(toward.first_index(a, hold_end, stop))
+    stop_open = s.open[np.maximum(stop_idx, 0)]
+    stop_px = np.where(stop_idx > k, np.fmin(stop, stop_open) if long else np.fmax(stop, stop_open), stop)
+
+    out.update(fill=np.where(traded, fill, np.nan), entry_index=np.where(filled, touch, -1),
+               stop_index=stop_idx, status=status)
+    sign = 1.0 if long else -1.0
+    for r in r_multiples:
+        target = entry + sign * r * risk
+        tgt_idx = np.atleast_1d(away.first_index(a + 1, hold_end, target))
+        tgt_open = s.open[np.maximum(tgt_idx, 0)]
+        tgt_px = np.fmax(target, tgt_open) if long else np.fmin(target, tgt_open)
+        stopped = (stop_idx >= 0) & ((tgt_idx < 0) | (stop_idx <= tgt_idx))
+        hit = (tgt_idx >= 0) & ~stopped
+        exit_idx = np.where(stopped, stop_idx, np.where(hit, tgt_idx, hold_end))
+        exit_px = np.where(stopped, stop_px, np.where(hit, tgt_px, s.close[exit_idx]))
+        outcome = np.where(stopped, "stop", np.where(hit, "target", np.where(hold_end < last, "time", "open")))
+        out[("exit_index", r)] = np.where(traded, exit_idx, -1)
+        out[("exit_price", r)] = np.where(traded, exit_px, np.nan)
+        out[("outcome", r)] = np.where(traded, outcome, "").astype(object)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[("r", r)] = np.where(traded, sign * (exit_px - fill) / risk, np.nan)
+    return out
+
+
+def backtest_zones(candles, zones: List[Dict], side: str, r_multiples: Sequence[float] = (1.0, 2.0, 3.0),
+                   max_wait: Optional[int] = None, max_hold: Optional[int] = None) -> List[Dict]:
+    """
+    simulate() for a list of detector rows, one trade dict per zone:
+        {"zone", "side", "formed", "status", "entry", "stop", "fill", "entry_index",
+         "exits": {r: {"outcome", "exit_index", "exit_price", "r"}}}
+    """
+    s = as_series(candles)
+    bounds = [zone_bounds(z) for z in zones]
+    formed = [formed_index(s, z) for z in zones]
+    sim = simulate(s, formed, [b[0] for b in bounds], [b[1] for b in bounds], side, r_multiples, max_wait, max_hold)
+    cols = {k: v.tolist() for k, v in sim.items()}
+    trades = []
+    for i, z in enumerate(zones):
+        exits = {}
+        if cols["status"][i] == "filled":
+            exits = {r: {"outcome": cols[("outcome", r)][i], "exit_index": cols[("exit_index", r)][i],
+                         "exit_price": cols[("exit_price", r)][i], "r": cols[("r", r)][i]} for r in r_multiples}
+        trades.append({
+            "zone": z, "side": side, "formed": formed[i], "status": cols["status"][i],
+            "entry": cols["entry"][i], "stop": cols["stop"][i], "fill": cols["fill"][i] if exits else None,
+            "entry_index": cols["entry_index"][i], "exits": exits,
+        })
+    return trades
+
+
+def summarize(trades: List[Dict], r_multiples: Sequence[float] = (1.0, 2.0, 3.0)) -> Dict[float, Dict]:
+    """Per R multiple: trade counts, win rate over closed trades, expectancy / total in R."""
+    out = {}
+    for r in r_multiples:
+        rs = [t["exits"][r] for t in trades if t["status"] == "filled"]
+        wins = sum(1 for e in rs if e["outcome"] == "target")
+        losses = sum(1 for e in rs if e["outcome"] == "stop")
+        total = float(sum(e["r"] for e in rs))
+        out[r] = {
+            "zones": len(trades),
+            "trades": len(rs),
+            "wins": wins,
+            "losses": losses,
+            "open": len(rs) - wins - losses,
+            "gapped": sum(1 for t in trades if t["status"] == "gapped"),
+            "win_rate": wins / (wins + losses) if wins + losses else 0.0,
+            "expectancy": total / len(rs) if rs else 0.0,
+            "total_r": total,
+        }
+    return out
+
+
+def backtest(candles, result: Dict, r_multiples: Sequence[float] = (1.0, 2.0, 3.0),
+             max_wait: Optional[int] = None, max_hold: Optional[int] = None) -> Dict[str, Dict]:
+    """
+    Backtest every zone list of a detector result (or of several, e.g. one scan()
+    result per symbol) whose name is in SIDES.
+
+    Returns:
+        dict: {"trades": {list path: [trade]}, "summary": {list path: {r: stats}}}
+    """
+    s = as_series(candles)
+    groups: Dict[str, List[Dict]] = {}
+    for kind, z in zones_in(result):
+        if kind.split(".")[-1] in SIDES:
+            groups.setdefault(kind, []).append(z)
+    trades = {kind: backtest_zones(s, zones, SIDES[kind.split(".")[-1]], r_multiples, max_wait, max_hold)
+              for kind, zones in groups.items()}
+    return {"trades": trades, "summary": {kind: summarize(t, r_multiples) for kind, t in trades.items()}}
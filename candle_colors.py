@@ -0,0 +1,73 @@
+# candle_colors.py
+# One shared candle classification used by every detector.
+#
+# A candle is BASING when its body is less than `threshold` of its range (or the
+# range is zero), otherwise GREEN (close > open) or RED. The scalar helpers
+# (classify / classify_ohlc) return the color names "green" / "red" / "basing";
+# the array helpers return int8 codes (GREEN_CODE / RED_CODE / BASING_CODE)
+# computed for the whole series in one vectorized pass and cached on the
+# CandleSeries, so a scan that hands the same series to several detectors
+# classifies each candle exactly once. COLOR_NAMES maps codes back to names.
+
+from typing import Dict
+
+import numpy as np
+
+from candle_series import as_series
+
+GREEN = "green"
+RED = "red"
+BASING = "basing"
+
+# int8 codes used by the array helpers
+GREEN_CODE = 1
+RED_CODE = -1
+BASING_CODE = 0
+
+COLOR_NAMES = {GREEN_CODE: GREEN, RED_CODE: RED, BASING_CODE: BASING}
+
+# body / range below this -> BASING
+BASING_THRESHOLD = 0.5
+
+
+def classify_ohlc(o: float, h: float, l: float, c: float, threshold: float = BASING_THRESHOLD) -> str:
+    """Color of a single candle (streaming use); same rule as candle_colors()."""
+    rng = h - l
+    if rng == 0 or abs(c - o) / rng < threshold:
+        return BASING
+    return GREEN if c > o else RED
+
+
+def classify(c: Dict[str, float], threshold: float = BASING_THRESHOLD) -> str:
+    """Color of one candle dict."""
+    return classify_ohlc(float(c["open"]), float(c["high"]), float(c["low"]), float(c["close"]), threshold)
+
+
+def classify_arrays(o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray,
+                    threshold: float = BASING_THRESHOLD) -> np.ndarray:
+    """Elementwise colors (int8) for OHLC arrays of any shape, e.g. a symbols x bars matrix."""
+    rng = h - l
+    with np.errstate(divide="ignore", invalid="ignore"):
+        basing = (rng == 0) | (np.abs(c - o) / rng < threshold)
+    return np.where(basing, BASING_CODE, np.where(c > o, GREEN_CODE, RED_CODE)).astype(np.int8)
+
+
+def candle_colors(candles, threshold: float = BASING_THRESHOLD) -> np.ndarray:
+    """
+    Colors of every candle.
+
+    Args:
+        candles: list of candle dicts or a CandleSeries (the result is cached on the series)
+        threshold (float): body/range ratio below which a candle is BASING
+
+    Returns:
+        np.ndarray[int8]: GREEN_CODE / RED_CODE / BASING_CODE per candle (read-only)
+    """
+    s = as_series(candles)
+    key = ("colors", threshold)
+    colors = s._derived.get(key)
+    if colors is None:
+        colors = classify_arrays(s.open, s.high, s.low, s.close, threshold)
+        colors.flags.writeable = False
+        s._derived[key] = colors
+    return colors
@@ -0,0 +1,140 @@
+# candle_series.py
+# Columnar candle container: contiguous float64 open/high/low/close + int64 epoch time.
+#
+# 5 x 8 bytes = 40 bytes per bar, versus a dict + datetime + 4 floats per bar for
+# the list-of-dicts form. It still behaves like that list (len, indexing,
+# iteration, .get("date")) so existing callers keep working, while detectors
+# read the arrays directly via as_series().
+
+from typing import List, Dict, Iterator, Sequence, Tuple, Union
+
+import numpy as np
+
+from candle_store import to_epoch, from_epoch
+
+Candle = Dict[str, float]
+
+# Stored for candles that carried no date
+MISSING_TIME = np.iinfo(np.int64).min
+
+
+class CandleSeries:
+    """
+    Columnar OHLC series.
+
+    Attributes:
+        time  (np.ndarray[int64]):   epoch seconds (MISSING_TIME if unknown)
+        open, high, low, close (np.ndarray[float64])
+    """
+
+    __slots__ = ("time", "open", "high", "low", "close", "_derived")
+
+    def __init__(self, time, open, high, low, close):
+        self.time = np.ascontiguousarray(time, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self._derived = {}   # per-series cache of derived arrays (e.g. candle_colors)
+
+    # -------------------- construction --------------------
+
+    @classmethod
+    def from_candles(cls, candles: List[Candle]) -> "CandleSeries":
+        """Build from the usual list of candle dicts (date may be datetime, str or missing)."""
+        n = len(candles)
+        time = np.empty(n, dtype=np.int64)
+        ohlc = np.empty((4, n), dtype=np.float64)
+        for i, c in enumerate(candles):
+            d = c.get("date")
+            time[i] = to_epoch(d) if d is not None else MISSING_TIME
+            ohlc[0, i] = c["open"]
+            ohlc[1, i] = c["high"]
+            ohlc[2, i] = c["low"]
+            ohlc[3, i] = c["close"]
+        return cls(time, ohlc[0], ohlc[1], ohlc[2], ohlc[3])
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "CandleSeries":
+        """Build from (ts, open, high, low, close) rows, e.g. CandleStore.read_rows()."""
+        if not rows:
+            return cls.empty()
+        cols = list(zip(*rows))
+        return cls(cols[0], cols[1], cols[2], cols[3], cols[4])
+
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+    # -------------------- list-of-dicts behaviour --------------------
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def __getitem__(self, i: Union[int, slice, np.ndarray]):
+        if isinstance(i, (slice, np.ndarray)):
+            return CandleSeries(self.time[i], self.open[i], self.high[i], self.low[i], self.close[i])
+        return {
+            "date": self.date(i),
+            "open": float(self.open[i]),
+            "high": float(self.high[i]),
+            "low": float(self.low[i]),
+            "close": float(self.close[i]),
+        }
+
+    def __iter__(self) -> Iterator[Candle]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def date(self, i: int):
+        """tz-aware datetime of bar i (None if the source candle had no date)."""
+        t = self.time[i]
+        return None if t == MISSING_TIME else from_epoch(t)
+
+    def to_list(self) -> List[Candle]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.time, self.open, self.high, self.low, self.close))
+
+
+def as_series(candles) -> CandleSeries:
+    """Return candles as a CandleSeries; a CandleSeries is returned as-is (no copy)."""
+    if isinstance(candles, CandleSeries):
+        return candles
+    return CandleSeries.from_candles(candles)
+
+
+class _DictColumn:
+    """One field of a list of candle dicts, read as float only where indexed."""
+
+    __slots__ = ("_candles", "_field")
+
+    def __init__(self, candles: List[Candle], field: str):
+        self._candles = candles
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def __getitem__(self, i: int) -> float:
+        return float(self._candles[i][self._field])
+
+
+def column_lists(candles, *fields: str) -> Tuple[Sequence[float], ...]:
+    """
+    Columns for per-index scans, e.g. column_lists(candles, "high", "low").
+
+    A CandleSeries gives Python lists, built once and cached on the series; a
+    list of dicts gives lazy views, so a single-index scan only reads the bars
+    it visits instead of converting the whole list first.
+    """
+    if isinstance(candles, CandleSeries):
+        key = ("lists",) + fields
+        cols = candles._derived.get(key)
+        if cols is None:
+            cols = tuple(getattr(candles, f).tolist() for f in fields)
+            candles._derived[key] = cols
+        return cols
+    return tuple(_DictColumn(candles, f) for f in fields)
@@ -0,0 +1,177 @@
+# candle_store.py
+# Persistent local candle store (SQLite) keyed by (instrument_token, interval).
+#
+# Bars are stored as epoch seconds + OHLC floats. A per-key "coverage" row
+# remembers the earliest start date that has already been downloaded, so a
+# later request for the same (or a shorter) window only needs the tail.
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional, Iterable
+
+# Kite returns exchange-local (IST) timestamps; naive datetimes are treated as IST too.
+IST = timezone(timedelta(hours=5, minutes=30))
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "candles.sqlite3")
+
+Candle = Dict[str, float]
+
+
+def to_epoch(dt) -> int:
+    """datetime (aware or naive IST) or ISO string -> epoch seconds."""
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=IST)
+    return int(dt.timestamp())
+
+
+def from_epoch(ts: int) -> datetime:
+    """epoch seconds -> tz-aware IST datetime (same shape Kite returns)."""
+    return datetime.fromtimestamp(int(ts), tz=IST)
+
+
+class CandleStore:
+    """
+    On-disk candle history with hit/miss counters.
+
+    Args:
+        path (str): SQLite file; defaults to $CANDLE_STORE_PATH or candles.sqlite3 next to this file.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CANDLE_STORE_PATH") or DEFAULT_STORE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS candles ("
+                " token INTEGER NOT NULL, interval TEXT NOT NULL, ts INTEGER NOT NULL,"
+                " open REAL, high REAL, low REAL, close REAL,"
+                " PRIMARY KEY (token, interval, ts)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                " token INTEGER NOT NULL, interval TEXT NOT NULL, covered_from INTEGER NOT NULL,"
+                " PRIMARY KEY (token, interval))"
+            )
+        self._stats = {"hits": 0, "misses": 0, "bars_from_store": 0, "bars_from_network": 0}
+
+    # -------------------- coverage --------------------
+
+    def covered_from(self, token: int, interval: str) -> Optional[int]:
+        """Earliest epoch already downloaded for this key, or None if never fetched."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT covered_from FROM coverage WHERE token=? AND interval=?", (token, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def last_timestamp(self, token: int, interval: str) -> Optional[int]:
+        """Epoch of the newest stored bar, or None if the key is empty."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(ts) FROM candles WHERE token=? AND interval=?", (token, interval)
+            ).fetchone()
+        return row[0] if row and row[0] is not None else None
+
+    def span(self, token: int, interval: str, from_ts: Optional[int] = None, to_ts: Optional[int] = None) -> tuple:
+        """
+        (bar count, newest epoch or None, newest bar's (open, high, low, close) or None)
+        of the stored bars in [from_ts, to_ts], without reading them all. The newest
+        bar's prices change when a still-forming candle is refreshed in place.
+        """
+        sql = "SELECT COUNT(*), MAX(ts) FROM candles WHERE token=? AND interval=?"
+        args: list = [token, interval]
+        if from_ts is not None:
+            sql += " AND ts >= ?"
+            args.append(int(from_ts))
+        if to_ts is not None:
+            sql += " AND ts <= ?"
+            args.append(int(to_ts))
+        with self._lock:
+            count, last = self._conn.execute(sql, args).fetchone()
+            ohlc = None
+            if last is not None:
+                ohlc = self._conn.execute(
+                    "SELECT open, high, low, close FROM candles WHERE token=? AND interval=? AND ts=?",
+                    (token, interval, last),
+                ).fetchone()
+        return count, last, ohlc
+
+    # -------------------- read / write --------------------
+
+    def write(self, token: int, interval: str, bars: Iterable[Candle], covered_from: Optional[int] = None) -> int:
+        """
+        Upsert bars (dicts with date/open/high/low/close). Re-writing an existing
+        timestamp replaces it, so a still-forming last bar gets refreshed.
+
+        Args:
+            covered_from (int): if given, extend the key's coverage back to this epoch.
+
+        Returns:
+            int: number of bars written
+        """
+        rows = [
+            (token, interval, to_epoch(b["date"]),
+             float(b["open"]), float(b["high"]), float(b["low"]), float(b["close"]))
+            for b in bars
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            if covered_from is not None:
+                self._conn.execute(
+                    "INSERT INTO coverage VALUES (?, ?, ?) "
+                    "ON CONFLICT(token, interval) DO UPDATE SET covered_from=MIN(covered_from, excluded.covered_from)",
+                    (token, interval, int(covered_from)),
+                )
+            self._stats["bars_from_network"] += len(rows)
+        return len(rows)
+
+    def read_rows(self, token: int, interval: str, from_ts: Optional[int] = None, to_ts: Optional[int] = None) -> List[tuple]:
+        """Raw (ts, open, high, low, close) rows in chronological order."""
+        sql = "SELECT ts, open, high, low, close FROM candles WHERE token=? AND interval=?"
+        args: list = [token, interval]
+        if from_ts is not None:
+            sql += " AND ts >= ?"
+            args.append(int(from_ts))
+        if to_ts is not None:
+            sql += " AND ts <= ?"
+            args.append(int(to_ts))
+        sql += " ORDER BY ts"
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+            self._stats["bars_from_store"] += len(rows)
+        return rows
+
+    def read(self, token: int, interval: str, from_ts: Optional[int] = None, to_ts: Optional[int] = None) -> List[Candle]:
+        """Stored bars in [from_ts, to_ts] as the usual list of candle dicts."""
+        return [
+            {"date": from_epoch(ts), "open": o, "high": h, "low": l, "close": c}
+            for ts, o, h, l, c in self.read_rows(token, interval, from_ts, to_ts)
+        ]
+
+    # -------------------- stats --------------------
+
+    def record(self, hit: bool) -> None:
+        """Count one request as served from history (hit) or needing a full/head download (miss)."""
+        with self._lock:
+            self._stats["hits" if hit else "misses"] += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+        total = s["hits"] + s["misses"]
+        s["hit_rate"] = (s["hits"] / total) if total else 0.0
+        return s
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,63 +1,97 @@
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from kiteconnect import KiteConnect
-from auth import get_kite
+from auth import get_client
+from candle_store import CandleStore, to_epoch, from_epoch
+from candle_series import CandleSeries
+from rate_limit import TokenBucket, call_with_retry, HISTORICAL_RATE, QUOTE_RATE, LTP_MAX_INSTRUMENTS
+from instruments import InstrumentResolver
 
-# Initialize KiteConnect client once using your auth.py helper
-kite = get_kite()
+# Local candle store / instruments index, opened lazily by get_store() / get_resolver()
+_store = None
+_resolver = None
+_store_lock = threading.Lock()
 
+# In-process LTP snapshot: "EXCHANGE:SYMBOL" -> (monotonic time, last_price)
+_ltp_cache = {}
+_ltp_lock = threading.Lock()
 
-def get_instrument_token(symbol, exchange="NSE"):
+# Longest range (days) Kite serves in one historical_data call, per interval
+MAX_DAYS_PER_CALL = {
+    "minute": 60,
+    "3minute": 100,
+    "5minute": 100,
+    "10minute": 100,
+    "15minute": 200,
+    "30minute": 200,
+    "60minute": 400,
+    "day": 2000,
+}
+
+# Concurrent chunk downloads per symbol (the historical limiter still caps the rate)
+CHUNK_WORKERS = 4
+
+# Shared limiters: every historical / quote call in this process goes through them
+historical_limiter = TokenBucket(HISTORICAL_RATE)
+quote_limiter = TokenBucket(QUOTE_RATE)
+
+
+def __getattr__(name):
+    # `fetch.kite` still works for old callers, but only builds the client when touched
+    if name == "kite":
+        return get_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def configure_rate_limits(historical=None, quote=None):
+    """Replace the shared limiters (requests per second), e.g. for a different Kite plan."""
+    global historical_limiter, quote_limiter
+    if historical is not None:
+        historical_limiter = TokenBucket(historical)
+    if quote is not None:
+        quote_limiter = TokenBucket(quote)
+
+
+def get_resolver():
+    """Shared InstrumentResolver, opened on first use."""
+    global _resolver
+    with _store_lock:
+        if _resolver is None:
+            _resolver = InstrumentResolver()
+    return _resolver
+
+
+def get_instrument_token(symbol, exchange="NSE", client=None):
     """
-    Fetch the instrument_token for a given symbol via kite.ltp(),
-    avoiding the rate-limited instruments() endpoint.
+    Resolve the instrument_token for a given symbol from the local
+    instruments index (refreshed once a day); symbols missing from it
+    fall back to kite.ltp().
 
     Args:
         symbol (str): Trading symbol, e.g. "RELIANCE"
         exchange (str): Exchange code, e.g. "NSE"
+        client: Kite client to use (defaults to auth.get_client())
 
     Returns:
         int: instrument_token
 
     Raises:
-        ValueError: if token not found in LTP response
-    """
-    key = f"{exchange}:{symbol}"
-    # Call LTP endpoint, returns dict with last_price and instrument_token
-    resp = kite.ltp(key)
-    info = resp.get(key)
-    if not info or "instrument_token" not in info:
-        raise ValueError(f"Could not get instrument_token for {symbol} via LTP")
-    return info["instrument_token"]
-
-
-def fetch_ohlc_data(symbol, interval="day", days_back=300):
+        ValueError: if token not found
     """
-    Fetch historical OHLC data for a symbol.
-
-    Args:
-        symbol (str): Trading symbol
-        interval (str): "day", "week", "60minute", etc.
-        days_back (int): Number of days (or weeks if interval="week") back to fetch
+    return get_resolver().resolve(symbol, exchange, client or get_client(), limiter=quote_limiter)
 
-    Returns:
-        List[dict]: Each dict has keys date (datetime), open, high, low, close (floats)
-    """
-    # Lookup token via LTP (no instruments() call)
-    token = get_instrument_token(symbol)
 
-    # Calculate time range
-    to_dt = datetime.now()
-    from_dt = to_dt - timedelta(days=days_back)
+def _download(token, from_dt, to_dt, interval, client=None):
+    """One rate-limited historical_data call, normalized to the usual list of candle dicts."""
     fmt = "%Y-%m-%d %H:%M:%S"
-    from_str = from_dt.strftime(fmt)
-    to_str = to_dt.strftime(fmt)
-
-    # Fetch bars using correct method name
-    bars = kite.historical_data(
+    bars = call_with_retry(
+        (client or get_client()).historical_data,
+        limiter=historical_limiter,
         instrument_token=token,
-        from_date=from_str,
-        to_date=to_str,
+        from_date=from_dt.strftime(fmt),
+        to_date=to_dt.strftime(fmt),
         interval=interval
     )
 
@@ -80,11 +114,246 @@ def fetch_ohlc_data(symbol, interval="day", days_back=300):
         })
     return data
 
-def fetch_ltp(symbol: str, exchange: str = "NSE"):
-    key = f"{exchange}:{symbol}"
+
+def _chunks(from_dt, to_dt, interval):
+    """Split [from_dt, to_dt] into consecutive ranges no longer than Kite allows for `interval`."""
+    span = timedelta(days=MAX_DAYS_PER_CALL.get(interval, MAX_DAYS_PER_CALL["day"]))
+    out, start = [], from_dt
+    while start < to_dt:
+        end = min(start + span, to_dt)
+        out.append((start, end))
+        start = end
+    return out or [(from_dt, to_dt)]
+
+
+def _download_chunks(token, from_dt, to_dt, interval, client=None, on_chunk=None):
+    """
+    Download a range of any length: one call per chunk, chunks fetched
+    concurrently under the historical limiter.
+
+    Args:
+        on_chunk (callable): if given, called with each chunk's bars in chronological
+            order; a failed chunk stops it there, so no later chunk is handed on
+            past a missing range
+
+    Returns:
+        List[dict]: bars stitched in chronological order, de-duplicated by timestamp
+    """
+    chunks = _chunks(from_dt, to_dt, interval)
+    parts = []
+    if len(chunks) == 1:
+        parts.append(_download(token, from_dt, to_dt, interval, client))
+        if on_chunk is not None:
+            on_chunk(parts[0])
+    else:
+        with ThreadPoolExecutor(max_workers=min(CHUNK_WORKERS, len(chunks))) as pool:
+            futures = [pool.submit(_download, token, a, b, interval, client) for a, b in chunks]
+            try:
+                # Downloads overlap, but results are taken in chunk order
+                for fut in futures:
+                    bars = fut.result()
+                    parts.append(bars)
+                    if on_chunk is not None:
+                        on_chunk(bars)
+            except BaseException:
+                for fut in futures:
+                    fut.cancel()
+                raise
+
+    # Chunks are in start order and their boundaries overlap by one timestamp;
+    # the copy from the later chunk wins
+    by_ts = {}
+    for bars in parts:
+        for b in bars:
+            by_ts[to_epoch(b["date"])] = b
+    return [by_ts[ts] for ts in sorted(by_ts)]
+
+
+def _download_into_store(store, token, from_dt, to_dt, interval, client=None, covered_from=None):
+    """
+    Chunked download written to the store chunk by chunk in chronological order.
+    A failure stops at the first missing chunk, so the stored tail never jumps
+    past a hole, and coverage is only extended once every chunk succeeded.
+    """
+    _download_chunks(token, from_dt, to_dt, interval, client,
+                     on_chunk=lambda bars: store.write(token, interval, bars))
+    if covered_from is not None:
+        store.write(token, interval, [], covered_from=covered_from)
+
+
+def get_store():
+    """Shared CandleStore, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CandleStore()
+    return _store
+
+
+def get_cache_stats():
+    """Hit/miss counters of the shared candle store."""
+    return get_store().stats()
+
+
+def fetch_ohlc_data(symbol, interval="day", days_back=300, use_cache=True, as_series=False, client=None, exchange="NSE"):
+    """
+    Fetch historical OHLC data for a symbol.
+
+    History is served from the local candle store; Kite is only asked for bars
+    from the last stored timestamp onwards (plus any older head the store has
+    never covered). Ranges longer than Kite serves in one call (MAX_DAYS_PER_CALL)
+    are split into chunks that are fetched concurrently.
+
+    Args:
+        symbol (str): Trading symbol
+        interval (str): "day", "week", "60minute", etc.
+        days_back (int): Number of days (or weeks if interval="week") back to fetch
+        use_cache (bool): False bypasses the store and downloads the full window
+        as_series (bool): return a columnar CandleSeries instead of a list of dicts
+        client: Kite client to use (defaults to auth.get_client())
+        exchange (str): Exchange code, e.g. "NSE"
+
+    Returns:
+        List[dict]: Each dict has keys date (datetime), open, high, low, close (floats)
+        (or a CandleSeries with the same per-bar view when as_series=True)
+    """
+    # Lookup token from the local instruments index
+    token = get_instrument_token(symbol, exchange, client=client)
+
+    # Calculate time range
+    to_dt = datetime.now()
+    from_dt = to_dt - timedelta(days=days_back)
+
+    if not use_cache:
+        data = _download_chunks(token, from_dt, to_dt, interval, client)
+        return CandleSeries.from_candles(data) if as_series else data
+
+    store = get_store()
+    from_ts = to_epoch(from_dt)
+    covered = store.covered_from(token, interval)
+
+    if covered is None:
+        # Miss: nothing stored yet, download the full window
+        store.record(hit=False)
+        _download_into_store(store, token, from_dt, to_dt, interval, client, covered_from=from_ts)
+        return _read_store(store, token, interval, from_ts, as_series)
+
+    if from_ts < covered:
+        # Partial miss: download only the older head the store has never seen
+        store.record(hit=False)
+        head_to = from_epoch(covered).replace(tzinfo=None)
+        _download_into_store(store, token, from_dt, head_to, interval, client, covered_from=from_ts)
+    else:
+        store.record(hit=True)
+
+    # Top up the tail; re-fetching the last stored bar refreshes a still-forming candle
+    last_ts = store.last_timestamp(token, interval)
+    if last_ts is not None:
+        tail_from = from_epoch(last_ts).replace(tzinfo=None)
+        if tail_from < to_dt:
+            _download_into_store(store, token, tail_from, to_dt, interval, client)
+
+    return _read_store(store, token, interval, from_ts, as_series)
+
+
+def fetch_many(symbols, interval="day", days_back=300, max_workers=8, use_cache=True, as_series=False, client=None, exchange="NSE"):
+    """
+    Fetch many symbols concurrently. Threads only overlap network latency;
+    the shared limiters keep the request rate within Kite's limits, and
+    429 / network errors are retried with backoff.
+
+    Args:
+        symbols (List[str]): Trading symbols
+        interval, days_back, use_cache, as_series: as in fetch_ohlc_data
+        max_workers (int): worker threads
+        client: Kite client to use (defaults to auth.get_client())
+        exchange (str): Exchange code, e.g. "NSE"
+
+    Returns:
+        Dict[str, candles]: symbol -> candles (None if that symbol failed)
+    """
+    # Resolve every token up front: one index lookup (or one batched LTP) for all symbols.
+    # If a batch fails, each worker resolves its own symbol, so only that symbol fails.
     try:
-        data = kite.ltp(key)
-        return float(data[key]["last_price"])
+        get_resolver().resolve_many(symbols, exchange, client or get_client(), limiter=quote_limiter)
     except Exception as e:
-        print(f"Error fetching LTP for {symbol}: {e}")
-        return None
+        print(f"Batched token lookup failed, resolving per symbol: {e}")
+
+    def one(symbol):
+        try:
+            return fetch_ohlc_data(symbol, interval, days_back, use_cache=use_cache,
+                                   as_series=as_series, client=client, exchange=exchange)
+        except Exception as e:
+            print(f"Error fetching OHLC for {symbol}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(symbols, pool.map(one, symbols)))
+
+
+def _read_store(store, token, interval, from_ts, as_series):
+    if as_series:
+        return CandleSeries.from_rows(store.read_rows(token, interval, from_ts=from_ts))
+    return store.read(token, interval, from_ts=from_ts)
+
+
+def fetch_ltp(symbol: str, exchange: str = "NSE", ttl=None, client=None):
+    return fetch_ltp_many([symbol], exchange, ttl=ttl, client=client).get(symbol)
+
+
+def fetch_ltp_many(symbols, exchange="NSE", ttl=None, max_workers=4, client=None):
+    """
+    Last traded prices for many symbols with as few kite.ltp calls as possible.
+
+    Symbols are split into LTP_MAX_INSTRUMENTS-sized batches that run
+    concurrently under the shared quote limiter.
+
+    Args:
+        symbols (List[str]): Trading symbols
+        exchange (str): Exchange code, e.g. "NSE"
+        ttl (float): if given, prices fetched within the last `ttl` seconds are
+            served from the in-process snapshot instead of calling Kite again
+        max_workers (int): concurrent batches
+        client: Kite client to use (defaults to auth.get_client())
+
+    Returns:
+        Dict[str, float]: symbol -> last price (None if it could not be fetched)
+    """
+    client = client or get_client()
+    now = time.monotonic()
+    out, missing = {}, []
+    with _ltp_lock:
+        for sym in dict.fromkeys(symbols):
+            hit = _ltp_cache.get(f"{exchange}:{sym}") if ttl is not None else None
+            if hit is not None and now - hit[0] <= ttl:
+                out[sym] = hit[1]
+            else:
+                missing.append(sym)
+
+    def one_batch(batch):
+        keys = [f"{exchange}:{sym}" for sym in batch]
+        try:
+            data = call_with_retry(client.ltp, keys, limiter=quote_limiter)
+        except Exception as e:
+            print(f"Error fetching LTP for {len(batch)} symbols: {e}")
+            data = {}
+        stamp = time.monotonic()
+        got = {}
+        with _ltp_lock:
+            for sym, key in zip(batch, keys):
+                info = data.get(key)
+                if info and "last_price" in info:
+                    got[sym] = float(info["last_price"])
+                    _ltp_cache[key] = (stamp, got[sym])
+                else:
+                    got[sym] = None
+        return got
+
+    batches = [missing[i:i + LTP_MAX_INSTRUMENTS] for i in range(0, len(missing), LTP_MAX_INSTRUMENTS)]
+    if len(batches) == 1:
+        out.update(one_batch(batches[0]))
+    elif batches:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for got in pool.map(one_batch, batches):
+                out.update(got)
+    return out
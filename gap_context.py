@@ -0,0 +1,106 @@
+# gap_context.py
+# O(1) move-context and gap-window checks for the pro / novice gap detectors.
+#
+# The detectors ask, per candidate bar, "did closes rise/fall by pct from the
+# min/max of the last N bars" and "was there a simple gap in the last N bars".
+# Sliced min()/max() and window walks make that O(N) per bar; here one sparse
+# table per direction over CLOSE answers any window in O(1), and prefix counts
+# of the simple-gap masks answer any gap window in O(1). Nothing depends on N,
+# so a sweep over many window sizes shares one GapContext (cached on the series).
+#
+# Windows holding a NaN close fall back to Python's min()/max() over the slice,
+# whose NaN handling depends on position, so results stay identical to the
+# original helpers.
+
+from typing import List, Optional
+
+import numpy as np
+
+from candle_series import as_series
+from range_index import SparseTable
+
+
+class GapContext:
+    """
+    Attributes:
+        cols (tuple): open, high, low, close as Python lists
+        closes (List[float]): close per bar (cols[3])
+        gap_up, gap_down (np.ndarray[bool]): low[i] > close[i-1] / high[i] < close[i-1] (False at 0)
+        novice_down, novice_up (np.ndarray[bool]): the novice gap candle patterns at bar i
+    """
+
+    def __init__(self, candles):
+        s = as_series(candles)
+        n = len(s)
+        self.n = n
+        self.cols = (s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist())
+        self.closes: List[float] = self.cols[3]
+        self._close_min = SparseTable(s.close, "min")
+        self._close_max = SparseTable(s.close, "max")
+        self._nan_before = np.concatenate(([0], np.cumsum(np.isnan(s.close)))).tolist()
+
+        self.gap_up = np.zeros(n, dtype=bool)
+        self.gap_down = np.zeros(n, dtype=bool)
+        if n >= 2:
+            self.gap_up[1:] = s.low[1:] > s.close[:-1]
+            self.gap_down[1:] = s.high[1:] < s.close[:-1]
+        # novice candle patterns (no window involved): open beyond prev close, close beyond prior range
+        self.novice_down = np.zeros(n, dtype=bool)
+        self.novice_up = np.zeros(n, dtype=bool)
+        if n >= 2:
+            self.novice_down[1:] = (s.open[1:] > s.close[:-1]) & (s.close[1:] < s.low[:-1])
+            self.novice_up[1:] = (s.open[1:] < s.close[:-1]) & (s.close[1:] > s.high[:-1])
+        self._ups_before = np.concatenate(([0], np.cumsum(self.gap_up))).tolist()
+        self._downs_before = np.concatenate(([0], np.cumsum(self.gap_down))).tolist()
+
+    # -------------------- close windows --------------------
+
+    def close_min(self, a: int, b: int) -> Optional[float]:
+        """min(closes[a..b]) exactly as Python's min() gives it; None for an empty window."""
+        if a > b:
+            return None
+        if self._nan_before[b + 1] - self._nan_before[a]:
+            return min(self.closes[a:b + 1])
+        return self._close_min.query_one(a, b)
+
+    def close_max(self, a: int, b: int) -> Optional[float]:
+        """max(closes[a..b]) exactly as Python's max() gives it; None for an empty window."""
+        if a > b:
+            return None
+        if self._nan_before[b + 1] - self._nan_before[a]:
+            return max(self.closes[a:b + 1])
+        return self._close_max.query_one(a, b)
+
+    def rise_from_min(self, idx: int, a: int, b: int, pct: float) -> bool:
+        """(close[idx] - min(close[a..b])) / min >= pct, False for an empty window or min <= 0."""
+        cmin = self.close_min(a, b)
+        if cmin is None or cmin <= 0:
+            return False
+        return (self.closes[idx] - cmin) / cmin >= pct
+
+    def drop_from_max(self, idx: int, a: int, b: int, pct: float) -> bool:
+        """(max(close[a..b]) - close[idx]) / max >= pct, False for an empty window or max <= 0."""
+        cmax = self.close_max(a, b)
+        if cmax is None or cmax <= 0:
+            return False
+        return (cmax - self.closes[idx]) / cmax >= pct
+
+    # -------------------- simple-gap windows --------------------
+
+    def any_gap_up(self, a: int, b: int) -> bool:
+        """Any low[k] > close[k-1] for k in [a..b] (a >= 1)."""
+        return a <= b and self._ups_before[b + 1] - self._ups_before[a] > 0
+
+    def any_gap_down(self, a: int, b: int) -> bool:
+        """Any high[k] < close[k-1] for k in [a..b] (a >= 1)."""
+        return a <= b and self._downs_before[b + 1] - self._downs_before[a] > 0
+
+
+def gap_context(candles) -> GapContext:
+    """GapContext for a series, built once and cached on the CandleSeries."""
+    s = as_series(candles)
+    ctx = s._derived.get("gap_context")
+    if ctx is None:
+        ctx = GapContext(s)
+        s._derived["gap_context"] = ctx
+    return ctx
@@ -0,0 +1,120 @@
+# gap_engine.py
+# Every gap family (simple, novice, pro, momentum) from one pass over shared arrays.
+#
+# The per-module detectors each walk the whole series and re-read the same
+# prior/current fields. GapEngine builds the columns, the candle colors and the
+# GapContext (raw "low[i] > close[i-1]" / "high[i] < close[i-1]" masks, O(1)
+# close-window and gap-window checks) once, turns each family's bar-level
+# condition into a vectorized mask, and only runs the context checks on the
+# few bars that pass it. Results are exactly the per-module result dicts.
+#
+#   out = GapEngine().run(candles, {"pro": {"min_pct": 0.03}})
+#   out["simple"]    -> detect_simple_gaps(candles)
+#   out["novice"]    -> detect_novice_gaps(candles, **config["novice"])
+#   out["pro"]       -> detect_pro_gaps(candles, **config["pro"])
+#   out["momentum"]  -> detect_momentum_gaps(candles, out["simple"], resistances, supports)
+
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from candle_series import as_series
+from candle_colors import BASING_THRESHOLD
+from level_index import level_index
+from gaps_simple import detect_simple_gaps, _gap, _is_chronological
+from gap_context import GapContext, gap_context
+from novice_gaps import _novice_gaps
+from pro_gaps import _pro_gaps
+from momentum_gaps import _momentum_gaps
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+
+Candle = Dict[str, float]
+
+# Same defaults as the individual detectors (levels: the momentum gap scripts' R/S split)
+DEFAULT_CONFIG: Dict[str, Dict] = {
+    "novice": {"N": 3, "pct": 0.02},
+    "pro": {"min_bars": 3, "min_pct": 0.02, "basing_threshold": BASING_THRESHOLD},
+    "levels": {"pct_left": 0.02, "pct_right": 0.03},
+}
+
+FAMILIES = ("simple", "novice", "pro", "momentum")
+
+
+def _merge(base: Dict[str, Dict], override: Optional[Dict[str, Dict]]) -> Dict[str, Dict]:
+    out = {k: dict(v) for k, v in base.items()}
+    for k, v in (override or {}).items():
+        if k == "families":
+            out[k] = tuple(v)
+        else:
+            out.setdefault(k, {}).update(v)
+    return out
+
+
+class GapEngine:
+    """
+    Args:
+        config (dict): per-family overrides of DEFAULT_CONFIG, e.g. {"novice": {"N": 5}};
+                       "families" limits which families run (default: all of FAMILIES)
+    """
+
+    def __init__(self, config: Optional[Dict[str, Dict]] = None):
+        self.config = _merge(DEFAULT_CONFIG, config)
+
+    def run(
+        self,
+        candles: List[Candle],
+        config: Optional[Dict[str, Dict]] = None,
+        levels: Optional[Dict[str, List[Dict]]] = None,
+    ) -> Dict[str, object]:
+        """
+        Args:
+            candles: list of candle dicts or a CandleSeries (chronological)
+            config (dict): overrides on top of the engine's config for this run
+            levels (dict): precomputed {"resistances", "supports"} for momentum gaps;
+                           computed with config["levels"] when omitted
+
+        Returns:
+            dict: {"simple": [...], "novice": {...}, "pro": {...}, "momentum": {...}}
+                  for the families that ran
+        """
+        cfg = _merge(self.config, config)
+        families = cfg.get("families", FAMILIES)
+        s = as_series(candles)
+        ctx = gap_context(s)   # shared columns, gap masks, close windows and gap counts
+        cols = ctx.cols
+
+        out: Dict[str, object] = {}
+        simple = None
+        if "simple" in families or "momentum" in families:
+            simple = _simple(candles, s, cols, ctx)
+            if "simple" in families:
+                out["simple"] = simple
+        if "novice" in families:
+            out["novice"] = _novice_gaps(candles, cols, ctx, **cfg["novice"])
+        if "pro" in families:
+            out["pro"] = _pro_gaps(candles, s, cols, ctx, **cfg["pro"])
+        if "momentum" in families:
+            if levels is None:
+                levels = all_bilateral_resistance_support(candles, **cfg["levels"])
+            out["momentum"] = _momentum_gaps(
+                candles, s, cols, simple, level_index(levels["resistances"]), level_index(levels["supports"])
+            )
+        return out
+
+
+# -------------------- families --------------------
+
+def _simple(candles, s, cols, ctx: GapContext) -> List[Dict]:
+    if len(s) < 2:
+        return []
+    if not _is_chronological(candles):
+        return detect_simple_gaps(candles)   # the detector re-sorts; keep its exact behaviour
+    _, H, L, C = cols
+    gap_up, gap_down = ctx.gap_up, ctx.gap_down
+    gaps = []
+    for i in np.flatnonzero(gap_up | gap_down).tolist():
+        if gap_up[i]:
+            gaps.append(_gap(candles, i, "gap_up", C[i - 1], L[i]))
+        else:
+            gaps.append(_gap(candles, i, "gap_down", C[i - 1], H[i]))
+    return gaps
@@ -11,15 +11,45 @@
 #                           | candles[i]["high"] (if gap_down)
 #   }
 
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from candle_series import CandleSeries, MISSING_TIME
 
 Candle = Dict[str, float]  
 
 def _is_chronological(candles: List[Candle]) -> bool:
 
+    if isinstance(candles, CandleSeries):
+        a, b = candles.time[:-1], candles.time[1:]
+        return bool(np.all((a <= b) | (a == MISSING_TIME) | (b == MISSING_TIME)))
     dates = [c.get("date") for c in candles]
     return all(dates[i] <= dates[i+1] for i in range(len(dates)-1) if dates[i] is not None and dates[i+1] is not None)
 
+def _float_or_none(c: Candle, key: str) -> Optional[float]:
+    try:
+        return float(c[key])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _columns(candles: List[Candle]):
+    """LOW/HIGH/CLOSE lists; unreadable fields become None (those bars are skipped)."""
+    if isinstance(candles, CandleSeries):
+        return candles.low.tolist(), candles.high.tolist(), candles.close.tolist()
+    return ([_float_or_none(c, "low") for c in candles],
+            [_float_or_none(c, "high") for c in candles],
+            [_float_or_none(c, "close") for c in candles])
+
+def _gap(candles, i: int, kind: str, prev_close: float, low_or_high: float) -> Dict:
+    return {
+        "index": i,
+        "date": candles[i].get("date"),
+        "type": kind,
+        "prev_close": prev_close,
+        "current_low_or_high": low_or_high,
+    }
+
 def detect_simple_gaps(candles: List[Candle]) -> List[Dict]:
 
     n = len(candles)
@@ -28,34 +58,24 @@ def detect_simple_gaps(candles: List[Candle]) -> List[Dict]:
 
     
     if not _is_chronological(candles):
-        candles = list(sorted(candles, key=lambda c: c.get("date")))
+        if isinstance(candles, CandleSeries):
+            candles = candles[np.argsort(candles.time, kind="stable")]
+        else:
+            candles = list(sorted(candles, key=lambda c: c.get("date")))
+
+    lows, highs, closes = _columns(candles)
 
     gaps = []
     for i in range(1, n):
-        prev = candles[i-1]
-        curr = candles[i]
-        try:
-            prev_close = float(prev["close"])
-            low_i  = float(curr["low"])
-            high_i = float(curr["high"])
-        except (KeyError, TypeError, ValueError):
+        prev_close = closes[i-1]
+        low_i  = lows[i]
+        high_i = highs[i]
+        if prev_close is None or low_i is None or high_i is None:
             continue  
 
         if low_i > prev_close:
-            gaps.append({
-                "index": i,
-                "date": curr.get("date"),
-                "type": "gap_up",
-                "prev_close": prev_close,
-                "current_low_or_high": low_i,
-            })
+            gaps.append(_gap(candles, i, "gap_up", prev_close, low_i))
         elif high_i < prev_close:
-            gaps.append({
-                "index": i,
-                "date": curr.get("date"),
-                "type": "gap_down",
-                "prev_close": prev_close,
-                "current_low_or_high": high_i,
-            })
+            gaps.append(_gap(candles, i, "gap_down", prev_close, high_i))
 
     return gaps
@@ -0,0 +1,257 @@
+# incremental_levels.py
+# Streaming resistance/support + swing detection, one bar at a time.
+#
+# Only the RIGHT-side confirmation depends on future bars, so each new bar:
+#   1. settles pending candidates: a higher high (lower low) invalidates them,
+#      otherwise a hit of their right-side target confirms them;
+#   2. becomes a candidate itself if its LEFT side already holds.
+#
+# Left side uses "record stacks" (bars whose low/high beats every later bar);
+# the nearest bar past a threshold is always on that stack, found by bisect.
+# Pending candidates sit on a stack ordered by price (for invalidation) plus a
+# heap ordered by target (for confirmation). Everything is amortized O(1) to
+# O(log n) per bar and the confirmed sets always equal a full recompute with
+# all_bilateral_resistance_support / all_bilateral_swings on the bars so far.
+#
+# NaN prices are masked as in those batch detectors: a NaN high never blocks
+# (-inf), a NaN low never hits (+inf), and a NaN target confirms nothing.
+
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Optional
+
+from candle_colors import classify_ohlc, GREEN, RED, BASING_THRESHOLD
+
+Candle = Dict[str, float]
+
+
+class _RecordStack:
+    """
+    Bars whose value is strictly below ("min") / above ("max") every later bar.
+    The last bar at or past a threshold is always one of them.
+    """
+
+    def __init__(self, kind: str):
+        self._sign = 1.0 if kind == "min" else -1.0
+        self._vals: List[float] = []  # signed, strictly increasing bottom -> top
+        self._idxs: List[int] = []
+
+    def append(self, idx: int, x: float) -> None:
+        v = x * self._sign
+        while self._vals and self._vals[-1] >= v:
+            self._vals.pop()
+            self._idxs.pop()
+        self._vals.append(v)
+        self._idxs.append(idx)
+
+    def last(self, t: float, strict: bool = False) -> Optional[int]:
+        """Nearest index with x <= t ("min") / x >= t ("max"); strict: < / >."""
+        v = t * self._sign
+        pos = (bisect_left(self._vals, v) if strict else bisect_right(self._vals, v)) - 1
+        return self._idxs[pos] if pos >= 0 else None
+
+
+class _Pending:
+    """
+    Candidates awaiting right-side confirmation.
+
+    For highs (sign=+1): invalidated by a bar with high > price, confirmed by a
+    bar whose probe value <= target. Lows use sign=-1 with the comparisons flipped.
+    """
+
+    def __init__(self, sign: float):
+        self._sign = sign
+        self._stack: List[dict] = []   # signed price non-increasing bottom -> top
+        self._heap: List[tuple] = []   # (-signed target, seq, entry)
+        self._seq = 0
+
+    def add(self, entry: dict) -> None:
+        if not math.isnan(entry["_price"]):   # a NaN price is never exceeded
+            self._stack.append(entry)
+        heapq.heappush(self._heap, (-entry["_target"] * self._sign, self._seq, entry))
+        self._seq += 1
+
+    def settle(self, extreme: float, probe: float):
+        """Apply one new bar; returns (invalidated, confirmed) entries."""
+        sign = self._sign
+        invalidated = []
+        while self._stack and self._stack[-1]["_price"] * sign < extreme * sign:
+            e = self._stack.pop()
+            if e["_alive"]:
+                e["_alive"] = False
+                invalidated.append(e)
+        confirmed = []
+        while self._heap and -self._heap[0][0] >= probe * sign:
+            e = heapq.heappop(self._heap)[2]
+            if e["_alive"]:
+                e["_alive"] = False
+                confirmed.append(e)
+        return invalidated, confirmed
+
+
+class _SortedLevels:
+    """Confirmed levels kept in index order, like a full recompute returns them."""
+
+    def __init__(self):
+        self._idxs: List[int] = []
+        self.items: List[Dict] = []
+
+    def add(self, level: Dict) -> None:
+        pos = bisect_right(self._idxs, level["index"])
+        self._idxs.insert(pos, level["index"])
+        self.items.insert(pos, level)
+
+
+class IncrementalLevelTracker:
+    """
+    Args:
+        pct_left, pct_right (float): resistance/support thresholds (as in all_bilateral_resistance_support)
+        swing_pct (float): swing threshold (as in all_bilateral_swings)
+        basing_threshold (float): candle color threshold (as in candle_colors)
+    """
+
+    def __init__(self, pct_left: float = 0.02, pct_right: float = 0.03, swing_pct: float = 0.07,
+                 basing_threshold: float = BASING_THRESHOLD):
+        self.pct_left = pct_left
+        self.pct_right = pct_right
+        self.swing_pct = swing_pct
+        self.basing_threshold = basing_threshold
+        self.n = 0
+        self._closes: List[float] = []
+
+        self._low_rec = _RecordStack("min")    # resistance left hit / lower-low blocker
+        self._high_rec = _RecordStack("max")   # support left hit / higher-high blocker
+        self._drop_rec = _RecordStack("min")   # min(close, low): swing-high left hit
+        self._rise_rec = _RecordStack("max")   # max(close, high): swing-low left hit
+
+        self._pending = {
+            "resistance": _Pending(+1.0),
+            "support": _Pending(-1.0),
+            "swing_high": _Pending(+1.0),
+            "swing_low": _Pending(-1.0),
+        }
+        self._confirmed = {kind: _SortedLevels() for kind in self._pending}
+
+    # -------------------- results --------------------
+
+    @property
+    def resistances(self) -> List[Dict]:
+        return self._confirmed["resistance"].items
+
+    @property
+    def supports(self) -> List[Dict]:
+        return self._confirmed["support"].items
+
+    @property
+    def swing_highs(self) -> List[Dict]:
+        return self._confirmed["swing_high"].items
+
+    @property
+    def swing_lows(self) -> List[Dict]:
+        return self._confirmed["swing_low"].items
+
+    # -------------------- streaming --------------------
+
+    def push_many(self, candles: List[Candle]) -> List[Dict]:
+        events = []
+        for c in candles:
+            events.extend(self.push(c))
+        return events
+
+    def push(self, candle: Candle) -> List[Dict]:
+        """
+        Add the next (closed) bar.
+
+        Returns:
+            List[dict]: events {"event": "confirmed"|"invalidated",
+                                "kind": "resistance"|"support"|"swing_high"|"swing_low",
+                                "level": {...}}
+        """
+        i = self.n
+        o = float(candle["open"]); h = float(candle["high"])
+        l = float(candle["low"]); c = float(candle["close"])
+        date = candle.get("date")
+        self._closes.append(c)
+        # masked copies: a NaN high never exceeds, a NaN low never undercuts anything
+        hx = -math.inf if math.isnan(h) else h
+        lx = math.inf if math.isnan(l) else l
+        drop = lx if math.isnan(c) else min(c, lx)
+        rise = hx if math.isnan(c) else max(c, hx)
+
+        # 1. this bar is the right side for everything pending
+        events: List[Dict] = []
+        for kind, extreme, probe in (
+            ("resistance", hx, lx), ("support", lx, hx), ("swing_high", hx, drop), ("swing_low", lx, rise),
+        ):
+            invalidated, confirmed = self._pending[kind].settle(extreme, probe)
+            for e in invalidated:
+                events.append({"event": "invalidated", "kind": kind, "level": self._public(e, invalidated_idx=i)})
+            for e in confirmed:
+                level = self._level(kind, e, right_idx=i)
+                self._confirmed[kind].add(level)
+                events.append({"event": "confirmed", "kind": kind, "level": level})
+
+        # 2. this bar as a candidate (left side only looks at bars 0..i-1)
+        if i > 0:
+            if not math.isnan(h):
+                self._maybe_pending("resistance", i, date, h, self._low_rec.last(h * (1.0 - self.pct_left)),
+                                    self._high_rec.last(h, strict=True), h * (1.0 - self.pct_right))
+            if not math.isnan(l):
+                self._maybe_pending("support", i, date, l, self._high_rec.last(l * (1.0 + self.pct_left)),
+                                    self._low_rec.last(l, strict=True), l * (1.0 + self.pct_right))
+            # swings only need a target: a NaN high / low is a level nothing exceeds
+            color = classify_ohlc(o, h, l, c, self.basing_threshold)
+            target = (o if color == RED else c) * (1.0 - self.swing_pct)
+            if not math.isnan(target):
+                self._maybe_pending("swing_high", i, date, h, self._drop_rec.last(target),
+                                    self._high_rec.last(math.inf if math.isnan(h) else h, strict=True), target)
+            target = (o if color == GREEN else c) * (1.0 + self.swing_pct)
+            if not math.isnan(target):
+                self._maybe_pending("swing_low", i, date, l, self._rise_rec.last(target),
+                                    self._low_rec.last(-math.inf if math.isnan(l) else l, strict=True), target)
+
+        self._low_rec.append(i, lx)
+        self._high_rec.append(i, hx)
+        self._drop_rec.append(i, drop)
+        self._rise_rec.append(i, rise)
+        self.n += 1
+        return events
+
+    # -------------------- helpers --------------------
+
+    def _maybe_pending(self, kind, i, date, price, k_left, blocker, target) -> None:
+        if k_left is None or (blocker is not None and k_left <= blocker):
+            return
+        self._pending[kind].add({
+            "_alive": True, "_price": price, "_target": target,
+            "index": i, "date": date, "left_confirm_idx": k_left,
+        })
+
+    @staticmethod
+    def _public(e: dict, **extra) -> Dict:
+        out = {"index": e["index"], "date": e["date"], "price": e["_price"], "left_confirm_idx": e["left_confirm_idx"]}
+        out.update(extra)
+        return out
+
+    def _level(self, kind: str, e: dict, right_idx: int) -> Dict:
+        i = e["index"]
+        if kind in ("resistance", "support"):
+            return {
+                "type": kind,
+                "index": i,
+                "date": e["date"],
+                "price": e["_price"],
+                "left_confirm_idx": e["left_confirm_idx"],
+                "right_confirm_idx": right_idx,
+                "pct_left": self.pct_left,
+                "pct_right": self.pct_right,
+            }
+        return {
+            "index": i,
+            "date": e["date"],
+            "high" if kind == "swing_high" else "low": e["_price"],
+            "close": self._closes[i],
+            "left_confirm_idx": e["left_confirm_idx"],
+            "right_confirm_idx": right_idx,
+        }
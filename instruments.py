@@ -0,0 +1,134 @@
+# instruments.py
+# Symbol -> instrument_token resolver backed by a daily instruments dump.
+#
+# The dump (kite.instruments(exchange)) is pulled at most once per day into a
+# SQLite table and held in memory as a dict, so lookups cost a dict hit.
+# Symbols missing from the dump (or when the dump can't be downloaded) are
+# resolved with one batched kite.ltp([...]) call and cached in the same table.
+
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Iterable
+
+from candle_store import IST, DEFAULT_STORE_PATH
+from rate_limit import TokenBucket, call_with_retry, LTP_MAX_INSTRUMENTS
+
+
+def _today() -> str:
+    return datetime.now(IST).strftime("%Y-%m-%d")
+
+
+class InstrumentResolver:
+    """
+    Args:
+        path (str): SQLite file (defaults to the candle store's file; separate tables)
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("CANDLE_STORE_PATH") or DEFAULT_STORE_PATH
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()   # one thread checks / refreshes the dump at a time
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS instruments ("
+                " exchange TEXT NOT NULL, symbol TEXT NOT NULL, token INTEGER NOT NULL,"
+                " PRIMARY KEY (exchange, symbol)) WITHOUT ROWID"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS instruments_loaded ("
+                " exchange TEXT PRIMARY KEY, loaded_on TEXT NOT NULL)"
+            )
+        self._tokens: Dict[str, Dict[str, int]] = {}   # exchange -> {symbol: token}
+        self._checked_on: Dict[str, str] = {}          # exchange -> day the dump was last tried
+
+    # -------------------- dump --------------------
+
+    def refresh(self, exchange: str, client) -> int:
+        """Download the instruments dump for `exchange` and replace the stored index."""
+        rows = call_with_retry(client.instruments, exchange)
+        data = [(exchange, r["tradingsymbol"], int(r["instrument_token"])) for r in rows]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM instruments WHERE exchange=?", (exchange,))
+            self._conn.executemany("INSERT OR REPLACE INTO instruments VALUES (?, ?, ?)", data)
+            self._conn.execute("INSERT OR REPLACE INTO instruments_loaded VALUES (?, ?)", (exchange, _today()))
+            self._tokens[exchange] = {sym: tok for _, sym, tok in data}
+        return len(data)
+
+    def _ensure_loaded(self, exchange: str, client) -> Dict[str, int]:
+        today = _today()
+        with self._load_lock:
+            if self._checked_on.get(exchange) == today:
+                return self._tokens[exchange]
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT loaded_on FROM instruments_loaded WHERE exchange=?", (exchange,)
+                ).fetchone()
+            if (row is None or row[0] != today) and client is not None:
+                try:
+                    self.refresh(exchange, client)
+                except Exception as e:
+                    # Keep yesterday's index (tokens rarely change); gaps fall back to LTP
+                    print(f"Instruments dump for {exchange} unavailable, using stored index: {e}")
+            if exchange not in self._tokens:
+                with self._lock:
+                    rows = self._conn.execute(
+                        "SELECT symbol, token FROM instruments WHERE exchange=?", (exchange,)
+                    ).fetchall()
+                self._tokens[exchange] = dict(rows)
+            self._checked_on[exchange] = today
+            return self._tokens[exchange]
+
+    # -------------------- lookups --------------------
+
+    def resolve(self, symbol: str, exchange: str = "NSE", client=None, limiter: Optional[TokenBucket] = None) -> int:
+        """
+        Token for one symbol.
+
+        Raises:
+            ValueError: if the symbol is neither in the dump nor known to LTP
+        """
+        tok = self._ensure_loaded(exchange, client).get(symbol)
+        if tok is not None:
+            return tok
+        found = self.resolve_many([symbol], exchange, client, limiter)
+        if symbol not in found:
+            raise ValueError(f"Could not get instrument_token for {symbol}")
+        return found[symbol]
+
+    def resolve_many(
+        self,
+        symbols: Iterable[str],
+        exchange: str = "NSE",
+        client=None,
+        limiter: Optional[TokenBucket] = None,
+    ) -> Dict[str, int]:
+        """
+        Tokens for many symbols; anything missing from the index is looked up with
+        batched kite.ltp calls (LTP_MAX_INSTRUMENTS per call). Unknown symbols are omitted.
+        """
+        index = self._ensure_loaded(exchange, client)
+        symbols = list(symbols)
+        out = {s: index[s] for s in symbols if s in index}
+        missing = [s for s in symbols if s not in out]
+        if missing and client is not None:
+            learned = []
+            for start in range(0, len(missing), LTP_MAX_INSTRUMENTS):
+                chunk = missing[start:start + LTP_MAX_INSTRUMENTS]
+                resp = call_with_retry(client.ltp, [f"{exchange}:{s}" for s in chunk], limiter=limiter)
+                for s in chunk:
+                    info = resp.get(f"{exchange}:{s}")
+                    if info and "instrument_token" in info:
+                        out[s] = int(info["instrument_token"])
+                        learned.append((exchange, s, out[s]))
+            if learned:
+                with self._lock, self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO instruments VALUES (?, ?, ?)", learned)
+                    index.update({s: tok for _, s, tok in learned})
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
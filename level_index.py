@@ -0,0 +1,109 @@
+# level_index.py
+# Sorted, index-keyed lookups over levels (resistances / supports) and zones,
+# shared by the momentum detectors so no query rescans the whole list.
+#
+#   - first_after(i)            -> first level with index >  i   O(log n)
+#   - first_at_or_after(i)      -> first level with index >= i   O(log n)
+#   - before(i)                 -> levels with index < i, nearest first
+#   - in_band(lo, hi, before=i) -> levels priced in [lo, hi] (and index < i), nearest first
+#
+# Ties keep the order of the input list, exactly like the stable sorts the
+# detectors used to run per query.
+
+import math
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Iterator, Optional
+
+Level = Dict[str, float]
+Zone = Dict[str, float]
+
+
+class LevelIndex:
+    """
+    Args:
+        levels (List[dict]): levels (any order); each has an integer position under `key`
+        key (str): field holding the bar index ("index" for levels)
+        price_key (str): field holding the price, for in_band (None disables it)
+    """
+
+    def __init__(self, levels: List[Level], key: str = "index", price_key: Optional[str] = "price"):
+        order = sorted(range(len(levels)), key=lambda k: int(levels[k][key]))  # stable
+        self.items: List[Level] = [levels[k] for k in order]
+        self._keys: List[int] = [int(levels[k][key]) for k in order]
+        self._price_key = price_key
+        if price_key is not None:
+            # (price, rank) for every level with a comparable price; rank = position in self.items
+            by_price = sorted(
+                (float(L[price_key]), rank) for rank, L in enumerate(self.items) if not math.isnan(float(L[price_key]))
+            )
+            self._prices = [p for p, _ in by_price]
+            self._price_ranks = [r for _, r in by_price]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Level]:
+        return iter(self.items)
+
+    # -------------------- index queries --------------------
+
+    def position_after(self, idx: int) -> int:
+        """Position in self.items of the first level with index > idx (len(self) if none)."""
+        return bisect_right(self._keys, idx)
+
+    def first_after(self, idx: int) -> Optional[Level]:
+        """First level (lowest index) with index > idx."""
+        pos = self.position_after(idx)
+        return self.items[pos] if pos < len(self.items) else None
+
+    def first_at_or_after(self, idx: int) -> Optional[Level]:
+        """First level (lowest index) with index >= idx."""
+        pos = bisect_left(self._keys, idx)
+        return self.items[pos] if pos < len(self.items) else None
+
+    def before(self, idx: int) -> Iterator[Level]:
+        """Levels with index < idx, nearest first (equal indices in input order)."""
+        keys, items = self._keys, self.items
+        pos = bisect_left(keys, idx)
+        while pos > 0:
+            start = bisect_left(keys, keys[pos - 1], 0, pos)
+            yield from items[start:pos]
+            pos = start
+
+    # -------------------- price queries --------------------
+
+    def in_band(self, lo: float, hi: float, before: Optional[int] = None) -> List[Level]:
+        """
+        Levels priced inside [lo, hi] (inclusive), optionally only those with
+        index < before; nearest (highest index) first, equal indices in input order.
+        A NaN bound matches nothing, as the `lo <= price <= hi` test does.
+        """
+        if self._price_key is None:
+            raise ValueError("in_band needs a LevelIndex built with a price_key")
+        if math.isnan(lo) or math.isnan(hi):
+            return []
+        a = bisect_left(self._prices, lo)
+        b = bisect_right(self._prices, hi)
+        keys = self._keys
+        ranks = self._price_ranks[a:b]
+        if before is not None:
+            ranks = [r for r in ranks if keys[r] < before]
+        ranks.sort(key=lambda r: (-keys[r], r))
+        return [self.items[r] for r in ranks]
+
+
+class ZoneIndex(LevelIndex):
+    """LevelIndex over zones, keyed by where the zone's base starts."""
+
+    def __init__(self, zones: List[Zone], key: str = "base_start"):
+        super().__init__(zones, key=key, price_key=None)
+
+
+def level_index(levels, **kwargs) -> LevelIndex:
+    """Return `levels` as a LevelIndex; an existing LevelIndex is returned as-is."""
+    return levels if isinstance(levels, LevelIndex) else LevelIndex(levels, **kwargs)
+
+
+def zone_index(zones, **kwargs) -> ZoneIndex:
+    """Return `zones` as a ZoneIndex; an existing ZoneIndex is returned as-is."""
+    return zones if isinstance(zones, ZoneIndex) else ZoneIndex(zones, **kwargs)
@@ -0,0 +1,454 @@
+# live_ticks.py
+# Live ticks -> minute / 60-minute bars -> detectors, without touching REST.
+#
+#   ticker = KiteTicker(api_key, access_token)       # or SimulatedTicker() offline
+#   live = LiveBars(ticker, tokens, on_bar=print)
+#   live.seed(738561, fetch_ohlc_data("RELIANCE", "60minute", 120))   # history once, optional
+#   ticker.connect(threaded=True)
+#
+# LiveBars installs the ticker's on_connect / on_ticks callbacks (subscribe +
+# MODE_FULL, so ticks carry exchange_timestamp). Every tick updates the forming
+# bar of each interval; a bar closes when its instrument's next tick falls in
+# a later bucket, or when the feed's clock passes the bucket end (illiquid
+# instruments, session close). Closed bars go into a fixed-size per-instrument
+# ring buffer (NumPy columns) and, for the detect interval, straight into that
+# instrument's IncrementalLevelTracker, whose level events reach on_bar with
+# the bar. Buckets follow Kite's candles: anchored at the 09:15 IST open,
+# the last one cut at the 15:30 close (so the 15:15 hourly bar is 15 minutes).
+# A bar whose bucket began before the feed started is partial and dropped,
+# unless seed() handed over REST's still-forming candle for it.
+
+import random
+import threading
+import time
+from datetime import datetime
+from collections import deque
+from typing import Callable, List, Dict, Optional, Iterable
+
+import numpy as np
+
+from candle_series import CandleSeries, as_series
+from candle_store import IST, to_epoch, from_epoch
+from incremental_levels import IncrementalLevelTracker
+
+INTERVAL_SECONDS = {"minute": 60, "3minute": 180, "5minute": 300, "15minute": 900, "30minute": 1800, "60minute": 3600}
+
+SESSION_OPEN = 9 * 3600 + 15 * 60   # 09:15 IST, seconds after midnight
+SESSION_CLOSE = 15 * 3600 + 30 * 60 # 15:30 IST
+
+_IST_OFFSET = 5 * 3600 + 30 * 60
+
+
+def bucket(ts: int, seconds: int, session_open: int = SESSION_OPEN, session_close: int = SESSION_CLOSE):
+    """(start, end) epoch of the bar holding tick time `ts`, or None outside the session."""
+    local = ts + _IST_OFFSET
+    day = local - local % 86400
+    sec = local - day
+    if sec < session_open or sec >= session_close:
+        return None
+    start = day + session_open + (sec - session_open) // seconds * seconds
+    return start - _IST_OFFSET, min(start + seconds, day + session_close) - _IST_OFFSET
+
+
+# -------------------- ring buffer --------------------
+
+class BarRing:
+    """
+    The last `capacity` closed bars of one instrument / interval, as NumPy columns.
+
+    Args:
+        capacity (int): bars kept; older bars are overwritten
+    """
+
+    __slots__ = ("capacity", "_cols", "_next", "count")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._cols = np.empty((5, capacity), dtype=np.float64)   # time, open, high, low, close
+        self._next = 0
+        self.count = 0   # bars ever appended
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, ts: int, o: float, h: float, l: float, c: float) -> None:
+        col = self._cols[:, self._next]
+        col[0], col[1], col[2], col[3], col[4] = ts, o, h, l, c
+        self._next = (self._next + 1) % self.capacity
+        self.count += 1
+
+    def last_time(self) -> Optional[int]:
+        return int(self._cols[0, self._next - 1]) if self.count else None
+
+    def to_series(self, last: Optional[int] = None) -> CandleSeries:
+        """The buffered bars (or the newest `last` of them) in chronological order."""
+        n = len(self) if last is None else min(last, len(self))
+        idx = (np.arange(self._next - n, self._next)) % self.capacity
+        cols = self._cols[:, idx]
+        return CandleSeries(cols[0].astype(np.int64), cols[1], cols[2], cols[3], cols[4])
+
+
+# -------------------- aggregation --------------------
+
+class BarAggregator:
+    """
+    Ticks -> closed OHLC bars for one interval, all instruments.
+
+    Args:
+        interval (str): key of INTERVAL_SECONDS
+        on_bar: callable(token, ts, open, high, low, close) for every complete closed bar
+        since (int): epoch the feed started; bars starting earlier are partial and dropped
+    """
+
+    def __init__(self, interval: str, on_bar: Callable, since: Optional[int] = None):
+        self.interval = interval
+        self.seconds = INTERVAL_SECONDS[interval]
+        self.on_bar = on_bar
+        self.since = since
+        self._forming: Dict[int, list] = {}   # token -> [start, end, open, high, low, close, complete]
+        self._next_end: Optional[int] = None  # earliest end among forming bars
+        self.stats = {"ticks": 0, "bars": 0, "partial": 0, "late": 0, "off_session": 0}
+
+    def add(self, token: int, ts: int, price: float) -> None:
+        self.stats["ticks"] += 1
+        bar = self._forming.get(token)
+        if bar is not None and bar[0] <= ts < bar[1]:
+            if price > bar[3]:
+                bar[3] = price
+            elif price < bar[4]:
+                bar[4] = price
+            bar[5] = price
+            return
+        if bar is not None and ts < bar[0]:
+            self.stats["late"] += 1   # older than the forming bar: its own bar is already closed
+            return
+        span = bucket(ts, self.seconds)
+        if span is None:
+            self.stats["off_session"] += 1
+            return
+        if self.since is None:
+            self.since = ts
+        if bar is not None:
+            self._close(token, bar)
+        self._open(token, [span[0], span[1], price, price, price, price, span[0] >= self.since])
+
+    def resume(self, token: int, start: int, o: float, h: float, l: float, c: float) -> None:
+        """Continue a bar already formed elsewhere (e.g. REST's still-forming candle) with live ticks."""
+        span = bucket(start, self.seconds)
+        if span is not None:
+            self._open(token, [span[0], span[1], o, h, l, c, True])
+
+    def _open(self, token: int, bar: list) -> None:
+        self._forming[token] = bar
+        if self._next_end is None or bar[1] < self._next_end:
+            self._next_end = bar[1]
+
+    def flush(self, now: int) -> None:
+        """Close every forming bar whose bucket ended at or before `now`."""
+        if self._next_end is None or now < self._next_end:
+            return
+        next_end = None
+        for token, bar in list(self._forming.items()):
+            if bar[1] <= now:
+                del self._forming[token]
+                self._close(token, bar)
+            elif next_end is None or bar[1] < next_end:
+                next_end = bar[1]
+        self._next_end = next_end
+
+    def _close(self, token: int, bar: list) -> None:
+        if not bar[6]:
+            self.stats["partial"] += 1
+            return
+        self.stats["bars"] += 1
+        self.on_bar(token, bar[0], bar[2], bar[3], bar[4], bar[5])
+
+
+class LiveBars:
+    """
+    Ticker -> per-instrument bar rings and level trackers.
+
+    Args:
+        ticker: KiteTicker or SimulatedTicker (callbacks are installed here)
+        tokens (List[int]): instrument tokens to subscribe
+        intervals: bar intervals to build (keys of INTERVAL_SECONDS)
+        detect_interval (str): interval whose closed bars feed the IncrementalLevelTrackers
+        capacity (dict): ring size per interval
+        tracker_params (dict): IncrementalLevelTracker(**tracker_params) per instrument
+        on_bar: callable(token, interval, bar dict, level events) for every closed bar
+        store: CandleStore to append closed bars to (optional)
+
+    Closed bars are queued while the bar state is locked and handed to
+    store / on_bar after the lock is released, in closing order. Callbacks may
+    therefore call series() / stats() (or add more ticks). If one raises, the
+    bar state is already complete, and the bars still queued go out on the next call.
+    """
+
+    def __init__(
+        self,
+        ticker,
+        tokens: Iterable[int],
+        intervals=("minute", "60minute"),
+        detect_interval: str = "60minute",
+        capacity: Optional[Dict[str, int]] = None,
+        tracker_params: Optional[Dict] = None,
+        on_bar: Optional[Callable] = None,
+        store=None,
+    ):
+        self.ticker = ticker
+        self.tokens = [int(t) for t in tokens]
+        self.detect_interval = detect_interval
+        self.capacity = {"minute": 375 * 5, "60minute": 7 * 250, **(capacity or {})}
+        self.tracker_params = tracker_params or {}
+        self.on_bar = on_bar
+        self.store = store
+        self._lock = threading.Lock()
+        self._pending = deque()                   # closed bars waiting for store / on_bar
+        self._deliver_lock = threading.RLock()    # keeps deliveries in order; re-entered by callbacks
+        self.rings: Dict[str, Dict[int, BarRing]] = {iv: {} for iv in intervals}
+        self.trackers: Dict[int, IncrementalLevelTracker] = {}
+        self.aggregators = [BarAggregator(iv, self._bar_closer(iv)) for iv in intervals]
+        self.clock: Optional[int] = None   # newest tick time seen
+
+        ticker.on_connect = self._on_connect
+        ticker.on_ticks = self._on_ticks
+
+    # -------------------- ticker callbacks --------------------
+
+    def _on_connect(self, ws, response=None) -> None:
+        ws.subscribe(self.tokens)
+        ws.set_mode(ws.MODE_FULL, self.tokens)
+
+    def _on_ticks(self, ws, ticks: List[Dict]) -> None:
+        self.add_ticks(ticks)
+
+    # -------------------- ingestion --------------------
+
+    def add_ticks(self, ticks: List[Dict]) -> None:
+        """One batch of Kite tick dicts (instrument_token, last_price, exchange_timestamp)."""
+        with self._lock:
+            clock = self.clock
+            aggregators = self.aggregators
+            for tick in ticks:
+                d = tick.get("exchange_timestamp") or tick.get("last_trade_time")
+                ts = to_epoch(d) if d is not None else int(time.time())
+                token, price = tick["instrument_token"], float(tick["last_price"])
+                for agg in aggregators:
+                    agg.add(token, ts, price)
+                if clock is None or ts > clock:
+                    clock = ts
+            if clock is not None:
+                self.clock = clock
+                for agg in aggregators:
+                    agg.flush(clock)
+        self._deliver()
+
+    def flush(self, now: Optional[int] = None) -> None:
+        """Close bars whose bucket has ended by `now` (default: wall clock), e.g. after the session close."""
+        with self._lock:
+            for agg in self.aggregators:
+                agg.flush(int(time.time()) if now is None else now)
+        self._deliver()
+
+    def seed(self, token: int, candles, interval: Optional[str] = None, now: Optional[int] = None) -> int:
+        """
+        Load stored history for one instrument into its ring (and tracker, for the
+        detect interval) so live bars continue it. A last bar whose bucket has not
+        ended by `now` (default: wall clock) is still forming: live ticks carry it
+        on instead of it being dropped as partial.
+
+        Returns:
+            int: closed bars loaded
+        """
+        interval = interval or self.detect_interval
+        token = int(token)
+        s = as_series(candles)
+        now = int(time.time()) if now is None else now
+        seconds = INTERVAL_SECONDS[interval]
+        n = len(s)
+        forming = n > 0 and (bucket(int(s.time[-1]), seconds) or (0, 0))[1] > now
+        with self._lock:
+            for i in range(n - 1 if forming else n):
+                self._store_bar(interval, token, int(s.time[i]), s.open[i], s.high[i], s.low[i], s.close[i], seeded=True)
+            if forming:
+                for agg in self.aggregators:
+                    if agg.interval == interval:
+                        agg.resume(token, int(s.time[-1]), s.open[-1], s.high[-1], s.low[-1], s.close[-1])
+        return n - 1 if forming else n
+
+    # -------------------- closed bars --------------------
+
+    def _bar_closer(self, interval: str) -> Callable:
+        def on_bar(token, ts, o, h, l, c):
+            self._store_bar(interval, token, ts, o, h, l, c)
+        return on_bar
+
+    def _store_bar(self, interval, token, ts, o, h, l, c, seeded=False) -> None:
+        # caller holds the lock
+        ring = self.rings[interval].get(token)
+        if ring is None:
+            ring = self.rings[interval][token] = BarRing(self.capacity.get(interval, 1000))
+        last = ring.last_time()
+        if last is not None and ts <= last:
+            return   # already have this bar (seeded history overlapping the live feed)
+        ring.append(ts, o, h, l, c)
+        bar = {"date": from_epoch(ts), "open": float(o), "high": float(h), "low": float(l), "close": float(c)}
+        events = []
+        if interval == self.detect_interval:
+            tracker = self.trackers.get(token)
+            if tracker is None:
+                tracker = self.trackers[token] = IncrementalLevelTracker(**self.tracker_params)
+            events = tracker.push(bar)
+        if not seeded and (self.store is not None or self.on_bar is not None):
+            self._pending.append((token, interval, bar, events))
+
+    def _deliver(self) -> None:
+        # called without self._lock: store writes and callbacks never run under it
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        return
+                    token, interval, bar, events = self._pending.popleft()
+                if self.store is not None:
+                    self.store.write(token, interval, [bar])
+                if self.on_bar is not None:
+                    self.on_bar(token, interval, bar, events)
+
+    def series(self, token: int, interval: Optional[str] = None, last: Optional[int] = None) -> CandleSeries:
+        """Closed bars of one instrument as a CandleSeries (for the batch detectors)."""
+        with self._lock:
+            ring = self.rings[interval or self.detect_interval].get(int(token))
+            return ring.to_series(last) if ring is not None else CandleSeries.empty()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {agg.interval: dict(agg.stats) for agg in self.aggregators}
+
+
+# -------------------- simulator --------------------
+
+class SimulatedTicker:
+    """
+    Offline stand-in for kiteconnect.KiteTicker: same callbacks (on_connect,
+    on_ticks, on_close, on_error), subscribe / set_mode / unsubscribe / close
+    and connect(threaded=...). Each step sends one tick per subscribed token
+    with a random-walk last_price and a simulated exchange_timestamp that
+    advances `step` seconds through the 09:15-15:30 IST session, day after day.
+
+    Args:
+        start (datetime): first tick time (naive = IST); default: today's 09:15
+        step (float): simulated seconds between tick batches
+        steps (int): batches to send before closing (None = until close())
+        seed (int): seeds prices and moves
+        vol (float): per-tick return standard deviation
+        realtime (float): wall-clock seconds slept between batches (0 = as fast as possible)
+    """
+
+    MODE_LTP, MODE_QUOTE, MODE_FULL = "ltp", "quote", "full"
+
+    def __init__(self, start: Optional[datetime] = None, step: float = 1.0, steps: Optional[int] = None,
+                 seed: int = 0, vol: float = 0.0005, realtime: float = 0.0):
+        if start is None:
+            start = datetime.now(IST).replace(hour=9, minute=15, second=0, microsecond=0)
+        self.clock = float(to_epoch(start))
+        self.step = step
+        self.steps = steps
+        self.vol = vol
+        self.realtime = realtime
+        self._rnd = random.Random(seed)
+        self._prices: Dict[int, float] = {}
+        self._modes: Dict[int, str] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self.on_connect = self.on_ticks = self.on_close = self.on_error = None
+        self.sent = 0
+
+    # -------------------- KiteTicker surface --------------------
+
+    def subscribe(self, tokens: List[int]) -> bool:
+        for t in tokens:
+            self._prices.setdefault(int(t), self._rnd.uniform(50.0, 3000.0))
+            self._modes.setdefault(int(t), self.MODE_QUOTE)
+        return True
+
+    def unsubscribe(self, tokens: List[int]) -> bool:
+        for t in tokens:
+            self._prices.pop(int(t), None)
+            self._modes.pop(int(t), None)
+        return True
+
+    def set_mode(self, mode: str, tokens: List[int]) -> bool:
+        for t in tokens:
+            if int(t) in self._modes:
+                self._modes[int(t)] = mode
+        return True
+
+    def is_connected(self) -> bool:
+        return self._running
+
+    def connect(self, threaded: bool = False, **kwargs) -> None:
+        self._running = True
+        if threaded:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        else:
+            self._run()
+
+    def close(self, code=None, reason=None) -> None:
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def stop(self) -> None:
+        self.close()
+
+    # -------------------- feed --------------------
+
+    def _advance(self) -> datetime:
+        """Current tick time, then move the clock one step (jumping to the next 09:15 after the close)."""
+        now = int(self.clock)
+        span = bucket(now, 60)
+        if span is None:
+            local = now + _IST_OFFSET
+            day = local - local % 86400
+            next_open = day + SESSION_OPEN if local - day < SESSION_OPEN else day + 86400 + SESSION_OPEN
+            self.clock = float(next_open - _IST_OFFSET)
+            now = int(self.clock)
+        self.clock += self.step
+        return from_epoch(now)
+
+    def ticks(self) -> List[Dict]:
+        """The next batch, one tick per subscribed token (what on_ticks receives)."""
+        when = self._advance()
+        batch = []
+        for token, p in self._prices.items():
+            p = max(0.05, p * (1.0 + self._rnd.gauss(0.0, self.vol)))
+            p = round(p * 20) / 20   # NSE tick size 0.05
+            self._prices[token] = p
+            tick = {"instrument_token": token, "last_price": p, "mode": self._modes[token], "tradable": True}
+            if self._modes[token] != self.MODE_LTP:
+                tick["exchange_timestamp"] = when
+                tick["last_trade_time"] = when
+            batch.append(tick)
+        return batch
+
+    def _run(self) -> None:
+        try:
+            if self.on_connect is not None:
+                self.on_connect(self, {})
+            while self._running and (self.steps is None or self.sent < self.steps):
+                batch = self.ticks()
+                self.sent += 1
+                if self.on_ticks is not None and batch:
+                    self.on_ticks(self, batch)
+                if self.realtime:
+                    time.sleep(self.realtime)
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            self.on_error(self, 1011, str(e))
+        finally:
+            self._running = False
+            if self.on_close is not None:
+                self.on_close(self, 1000, "simulation finished")
@@ -1,49 +1,25 @@
 from typing import List, Dict, Optional
 
+from candle_series import as_series
+from level_index import level_index, zone_index
+from range_index import first_breaches
+
 Candle = Dict[str, float]
 Level  = Dict[str, float]
 Zone   = Dict[str, float]
 
-def _first_wick_breach_up(candles: List[Candle], start_idx: int, level_price: float) -> Optional[int]:
-    n = len(candles)
-    for j in range(start_idx + 1, n):
-        if float(candles[j]["high"]) > level_price:
-            return j
-    return None
-
-def _first_wick_breach_down(candles: List[Candle], start_idx: int, level_price: float) -> Optional[int]:
-    n = len(candles)
-    for j in range(start_idx + 1, n):
-        if float(candles[j]["low"]) < level_price:
-            return j
-    return None
-
-def _origin_low_between(candles: List[Candle], i1: int, b1: int) -> Optional[float]:
+def _origin_low_between(lows_all: List[float], i1: int, b1: int) -> Optional[float]:
     if b1 - i1 <= 1:
         return None
-    lows = [float(candles[k]["low"]) for k in range(i1 + 1, b1)]
+    lows = lows_all[i1 + 1:b1]
     return min(lows) if lows else None
 
-def _origin_high_between(candles: List[Candle], i1: int, b1: int) -> Optional[float]:
+def _origin_high_between(highs_all: List[float], i1: int, b1: int) -> Optional[float]:
     if b1 - i1 <= 1:
         return None
-    highs = [float(candles[k]["high"]) for k in range(i1 + 1, b1)]
+    highs = highs_all[i1 + 1:b1]
     return max(highs) if highs else None
 
-def _first_level_after(levels: List[Level], after_idx: int) -> Optional[Level]:
-    cands = [L for L in levels if int(L["index"]) > after_idx]
-    if not cands:
-        return None
-    cands.sort(key=lambda L: int(L["index"]))
-    return cands[0]
-
-def _first_zone_after(zones: List[Zone], after_idx: int) -> Optional[Zone]:
-    cands = [Z for Z in zones if int(Z["base_start"]) >= after_idx]
-    if not cands:
-        return None
-    cands.sort(key=lambda Z: int(Z["base_start"]))
-    return cands[0]
-
 def detect_momentum_continuation_zones(
     candles: List[Candle],
     resistances: List[Level],
@@ -54,25 +30,35 @@ def detect_momentum_continuation_zones(
     out_demand: List[Dict] = []
     out_supply: List[Dict] = []
 
-    res_sorted = sorted(resistances, key=lambda L: int(L["index"]))
-    sup_sorted = sorted(supports,    key=lambda L: int(L["index"]))
+    res_index = level_index(resistances)
+    sup_index = level_index(supports)
+    dbr_index = zone_index(dbr_zones)
+    rbd_index = zone_index(rbd_zones)
+
+    s = as_series(candles)
+    H, L = s.high.tolist(), s.low.tolist()
+
+    # First wick breach of every level, in one batch per side (-1 = never breached)
+    res_breach = first_breaches(s, [int(R["index"]) for R in res_index], [float(R["price"]) for R in res_index], "up").tolist()
+    sup_breach = first_breaches(s, [int(S["index"]) for S in sup_index], [float(S["price"]) for S in sup_index], "down").tolist()
 
-    for R1 in res_sorted:
+    for r1, R1 in enumerate(res_index):
         i1 = int(R1["index"]); p1 = float(R1["price"])
-        b1 = _first_wick_breach_up(candles, start_idx=i1, level_price=p1)
-        if b1 is None:
+        b1 = res_breach[r1]
+        if b1 < 0:
             continue
-        origin_low = _origin_low_between(candles, i1, b1)
+        origin_low = _origin_low_between(L, i1, b1)
         if origin_low is None:
             continue
-        R2 = _first_level_after(res_sorted, after_idx=b1)
-        if R2 is None:
+        r2 = res_index.position_after(b1)
+        if r2 == len(res_index):
             continue
+        R2 = res_index.items[r2]
         i2 = int(R2["index"]); p2 = float(R2["price"])
-        first_breach_r2 = _first_wick_breach_up(candles, start_idx=i2, level_price=p2)
-        if first_breach_r2 is None:
+        first_breach_r2 = res_breach[r2]
+        if first_breach_r2 < 0:
             continue
-        Z = _first_zone_after(dbr_zones, after_idx=i2)
+        Z = dbr_index.first_at_or_after(i2)
         if Z is None:
             continue
         zl = float(Z["zone_low"]); zh = float(Z["zone_high"])
@@ -91,22 +77,23 @@ def detect_momentum_continuation_zones(
             "zone_low": zl, "zone_high": zh,
         })
 
-    for S1 in sup_sorted:
+    for s1, S1 in enumerate(sup_index):
         i1 = int(S1["index"]); p1 = float(S1["price"])
-        b1 = _first_wick_breach_down(candles, start_idx=i1, level_price=p1)
-        if b1 is None:
+        b1 = sup_breach[s1]
+        if b1 < 0:
             continue
-        origin_high = _origin_high_between(candles, i1, b1)
+        origin_high = _origin_high_between(H, i1, b1)
         if origin_high is None:
             continue
-        S2 = _first_level_after(sup_sorted, after_idx=b1)
-        if S2 is None:
+        s2 = sup_index.position_after(b1)
+        if s2 == len(sup_index):
             continue
+        S2 = sup_index.items[s2]
         i2 = int(S2["index"]); p2 = float(S2["price"])
-        first_breach_s2 = _first_wick_breach_down(candles, start_idx=i2, level_price=p2)
-        if first_breach_s2 is None:
+        first_breach_s2 = sup_breach[s2]
+        if first_breach_s2 < 0:
             continue
-        Z = _first_zone_after(rbd_zones, after_idx=i2)
+        Z = rbd_index.first_at_or_after(i2)
         if Z is None:
             continue
         zl = float(Z["zone_low"]); zh = float(Z["zone_high"])
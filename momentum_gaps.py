@@ -1,40 +1,35 @@
 from typing import List, Dict, Tuple
 
+from candle_series import as_series
+from range_index import StraddleIndex, straddle_index
+from level_index import LevelIndex, level_index
+
 Candle = Dict[str, float]
+Columns = Tuple[List[float], List[float], List[float], List[float]]  # open, high, low, close
 
-def _body_low(c: Candle) -> float:
-    return min(float(c["open"]), float(c["close"]))
+def _body_low(cols: Columns, i: int) -> float:
+    return min(cols[0][i], cols[3][i])
 
-def _body_high(c: Candle) -> float:
-    return max(float(c["open"]), float(c["close"]))
+def _body_high(cols: Columns, i: int) -> float:
+    return max(cols[0][i], cols[3][i])
 
-def _zone_for_gap_up(prior: Candle, current: Candle) -> Tuple[float, float]:
+def _zone_for_gap_up(cols: Columns, prior_idx: int, current_idx: int) -> Tuple[float, float]:
     # Gap up: 'upper candle' = current, 'lower candle' = prior
-    upper_level = _body_low(current)
-    lower_level = _body_high(prior)
+    upper_level = _body_low(cols, current_idx)
+    lower_level = _body_high(cols, prior_idx)
     lo, hi = (lower_level, upper_level) if lower_level <= upper_level else (upper_level, lower_level)
     return lo, hi
 
-def _zone_for_gap_down(prior: Candle, current: Candle) -> Tuple[float, float]:
+def _zone_for_gap_down(cols: Columns, prior_idx: int, current_idx: int) -> Tuple[float, float]:
     # Gap down: 'upper candle' = prior, 'lower candle' = current
-    upper_level = _body_low(prior)
-    lower_level = _body_high(current)
+    upper_level = _body_low(cols, prior_idx)
+    lower_level = _body_high(cols, current_idx)
     lo, hi = (lower_level, upper_level) if lower_level <= upper_level else (upper_level, lower_level)
     return lo, hi
 
-def _inside_zone(price: float, lo: float, hi: float) -> bool:
-    return lo <= price <= hi  
-
-def _no_obstruction_between(candles: List[Candle], start_idx: int, end_idx: int, level_price: float) -> bool:
-
-    if start_idx > end_idx:
-        return True
-    for t in range(start_idx, end_idx + 1):
-        lo = float(candles[t]["low"])
-        hi = float(candles[t]["high"])
-        if lo < level_price < hi: 
-            return False
-    return True
+def _no_obstruction_between(straddles: StraddleIndex, start_idx: int, end_idx: int, level_price: float) -> bool:
+    # any bar with low < level < high between the two indices obstructs
+    return not straddles.any(start_idx, end_idx, level_price)
 
 def detect_momentum_gaps(
     candles: List[Candle],
@@ -43,63 +38,61 @@ def detect_momentum_gaps(
     supports: List[Dict],
 ) -> Dict[str, List[Dict]]:
 
+    s = as_series(candles)
+    cols = (s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist())
+    return _momentum_gaps(candles, s, cols, gaps, level_index(resistances), level_index(supports))
+
+def _momentum_gaps(candles, s, cols: Columns, gaps: List[Dict], res_index: LevelIndex, sup_index: LevelIndex) -> Dict[str, List[Dict]]:
+    """detect_momentum_gaps on an already-built series and columns (dates still read from `candles`)."""
     m_up: List[Dict] = []
     m_dn: List[Dict] = []
 
-    res_levels = [(float(r["price"]), int(r["index"])) for r in resistances]
-    sup_levels = [(float(s["price"]), int(s["index"])) for s in supports]
-
     n = len(candles)
+    straddles = straddle_index(s)
     for g in gaps:
         i = int(g["index"])  # current (right) bar of the gap
         if i <= 0 or i >= n:
             continue
         prior_idx = i - 1
-        prior = candles[prior_idx]
-        current = candles[i]
 
         if g["type"] == "gap_up":
-            zl, zh = _zone_for_gap_up(prior, current)
-            # Consider PRIOR resistances only; check nearest first
-            res_prior = [(p, idx) for (p, idx) in res_levels if idx < i]
-            res_prior.sort(key=lambda t: t[1], reverse=True)
-            for price, lvl_idx in res_prior:
-                if _inside_zone(price, zl, zh):
-                    # No obstruction between resistance bar (lvl_idx) and prior candle (prior_idx)
-                    if _no_obstruction_between(candles, lvl_idx + 1, prior_idx - 1, price):
-                        m_up.append({
-                            "index": i,
-                            "current_date": current.get("date"),
-                            "prior_date": prior.get("date"),
-                            "level_date": candles[lvl_idx].get("date"),
-                            "zone_low": zl,
-                            "zone_high": zh,
-                            "level_type": "resistance",
-                            "level_price": price,
-                            "level_index": lvl_idx,
-                        })
-                        break  # one valid prior resistance is enough
+            zl, zh = _zone_for_gap_up(cols, prior_idx, i)
+            # Consider PRIOR resistances inside the zone only; check nearest first
+            for r in res_index.in_band(zl, zh, before=i):
+                price, lvl_idx = float(r["price"]), int(r["index"])
+                # No obstruction between resistance bar (lvl_idx) and prior candle (prior_idx)
+                if _no_obstruction_between(straddles, lvl_idx + 1, prior_idx - 1, price):
+                    m_up.append({
+                        "index": i,
+                        "current_date": candles[i].get("date"),
+                        "prior_date": candles[prior_idx].get("date"),
+                        "level_date": candles[lvl_idx].get("date"),
+                        "zone_low": zl,
+                        "zone_high": zh,
+                        "level_type": "resistance",
+                        "level_price": price,
+                        "level_index": lvl_idx,
+                    })
+                    break  # one valid prior resistance is enough
 
         elif g["type"] == "gap_down":
-            zl, zh = _zone_for_gap_down(prior, current)
-            # Consider PRIOR supports only; check nearest first
-            sup_prior = [(p, idx) for (p, idx) in sup_levels if idx < i]
-            sup_prior.sort(key=lambda t: t[1], reverse=True)
-            for price, lvl_idx in sup_prior:
-                if _inside_zone(price, zl, zh):
-                    # No obstruction between support bar (lvl_idx) and prior candle (prior_idx)
-                    if _no_obstruction_between(candles, lvl_idx + 1, prior_idx - 1, price):
-                        m_dn.append({
-                            "index": i,
-                            "current_date": current.get("date"),
-                            "prior_date": prior.get("date"),
-                            "level_date": candles[lvl_idx].get("date"),
-                            "zone_low": zl,
-                            "zone_high": zh,
-                            "level_type": "support",
-                            "level_price": price,
-                            "level_index": lvl_idx,
-                        })
-                        break
+            zl, zh = _zone_for_gap_down(cols, prior_idx, i)
+            # Consider PRIOR supports inside the zone only; check nearest first
+            for sp in sup_index.in_band(zl, zh, before=i):
+                price, lvl_idx = float(sp["price"]), int(sp["index"])
+                # No obstruction between support bar (lvl_idx) and prior candle (prior_idx)
+                if _no_obstruction_between(straddles, lvl_idx + 1, prior_idx - 1, price):
+                    m_dn.append({
+                        "index": i,
+                        "current_date": candles[i].get("date"),
+                        "prior_date": candles[prior_idx].get("date"),
+                        "level_date": candles[lvl_idx].get("date"),
+                        "zone_low": zl,
+                        "zone_high": zh,
+                        "level_type": "support",
+                        "level_price": price,
+                        "level_index": lvl_idx,
+                    })
+                    break
 
     return {"momentum_gap_ups": m_up, "momentum_gap_downs": m_dn}
@@ -1,6 +1,11 @@
 
 from typing import List, Dict, Tuple
 
+import numpy as np
+
+from candle_series import as_series
+from gap_context import GapContext, gap_context
+
 Candle = Dict[str, float] 
 
 def _fmt_date(d):
@@ -15,99 +20,65 @@ def _window_bounds(prior_idx: int, N: int) -> Tuple[int, int]:
     start = max(1, prior_idx - N)  
     return start, prior_idx
 
-def _has_rapid_upmove(candles: List[Candle], prior_idx: int, N: int, pct: float) -> bool:
-    start, end = _window_bounds(prior_idx, N)
-    if start > prior_idx - 1:
-        return False
-    closes = [float(candles[j]["close"]) for j in range(start, prior_idx)]
-    if not closes:
-        return False
-    cmin = min(closes)
-    c_prior = float(candles[prior_idx]["close"])
-    if cmin <= 0:
-        return False
-    return (c_prior - cmin) / cmin >= pct
+def _rapid_upmove(ctx: GapContext, prior_idx: int, N: int, pct: float) -> bool:
+    """Closes rose by pct from the min of the window before prior_idx (O(1) from the GapContext)."""
+    start, _ = _window_bounds(prior_idx, N)
+    return ctx.rise_from_min(prior_idx, start, prior_idx - 1, pct)
 
-def _has_rapid_downmove(candles: List[Candle], prior_idx: int, N: int, pct: float) -> bool:
-    start, end = _window_bounds(prior_idx, N)
-    if start > prior_idx - 1:
-        return False
-    closes = [float(candles[j]["close"]) for j in range(start, prior_idx)]
-    if not closes:
-        return False
-    cmax = max(closes)
-    c_prior = float(candles[prior_idx]["close"])
-    if cmax <= 0:
-        return False
-    return (cmax - c_prior) / cmax >= pct
+def _rapid_downmove(ctx: GapContext, prior_idx: int, N: int, pct: float) -> bool:
+    """Closes fell by pct from the max of the window before prior_idx (O(1) from the GapContext)."""
+    start, _ = _window_bounds(prior_idx, N)
+    return ctx.drop_from_max(prior_idx, start, prior_idx - 1, pct)
 
-def _has_simple_gap_up_in_window(candles: List[Candle], start_k: int, end_k: int) -> bool:
-    # Check low[k] > close[k-1] for any k in [start_k .. end_k]
-    for k in range(start_k, end_k + 1):
-        if float(candles[k]["low"]) > float(candles[k-1]["close"]):
-            return True
-    return False
+def _novice_gap_down(candles, cols, i: int) -> Dict:
+    O, H, L, C = cols
+    return {
+        "index": i,
+        "prior_date": candles[i-1].get("date"),
+        "current_date": candles[i].get("date"),
+        "type": "novice_gap_down",
+        "prev_close": C[i-1],
+        "curr_open": O[i],
+        "curr_close": C[i],
+        "prior_low": L[i-1],
+    }
 
-def _has_simple_gap_down_in_window(candles: List[Candle], start_k: int, end_k: int) -> bool:
-    # Check high[k] < close[k-1] for any k in [start_k .. end_k]
-    for k in range(start_k, end_k + 1):
-        if float(candles[k]["high"]) < float(candles[k-1]["close"]):
-            return True
-    return False
+def _novice_gap_up(candles, cols, i: int) -> Dict:
+    O, H, L, C = cols
+    return {
+        "index": i,
+        "prior_date": candles[i-1].get("date"),
+        "current_date": candles[i].get("date"),
+        "type": "novice_gap_up",
+        "prev_close": C[i-1],
+        "curr_open": O[i],
+        "curr_close": C[i],
+        "prior_high": H[i-1],
+    }
 
 def detect_novice_gaps(
     candles: List[Candle],
     N: int = 3,
     pct: float = 0.02,   # 2%
 ) -> Dict[str, List[Dict]]:
-   
-    downs, ups = [], []
-    n = len(candles)
-    if n < 2:
-        return {"novice_gap_downs": downs, "novice_gap_ups": ups}
 
-    for i in range(1, n):
-        prior = candles[i-1]
-        curr  = candles[i]
+    if len(candles) < 2:
+        return {"novice_gap_downs": [], "novice_gap_ups": []}
+    ctx = gap_context(as_series(candles))
+    return _novice_gaps(candles, ctx.cols, ctx, N, pct)
 
-        prev_close = float(prior["close"])
-        prior_low  = float(prior["low"])
-        prior_high = float(prior["high"])
-        open_i     = float(curr["open"])
-        close_i    = float(curr["close"])
-
-        
-        
-        # open[i] > close[i-1]  AND  close[i] < low[i-1]
-        if open_i > prev_close and close_i < prior_low:
-            start_k, end_k = _window_bounds(i-1, N)
-            if _has_rapid_upmove(candles, i-1, N, pct) and _has_simple_gap_up_in_window(candles, start_k, end_k):
-                downs.append({
-                    "index": i,
-                    "prior_date": prior.get("date"),
-                    "current_date": curr.get("date"),
-                    "type": "novice_gap_down",
-                    "prev_close": prev_close,
-                    "curr_open": open_i,
-                    "curr_close": close_i,
-                    "prior_low": prior_low,
-                })
+def _novice_gaps(candles, cols, ctx: GapContext, N: int, pct: float) -> Dict[str, List[Dict]]:
+    """detect_novice_gaps on prebuilt columns / context; only bars matching the candle pattern are checked."""
+    downs, ups = [], []
+    # down: open[i] > close[i-1]  AND  close[i] < low[i-1]
+    # up:   open[i] < close[i-1]  AND  close[i] > high[i-1]
+    down_bar, up_bar = ctx.novice_down, ctx.novice_up
 
-        
-        
-        # open[i] < close[i-1]  AND  close[i] > high[i-1]
-        if open_i < prev_close and close_i > prior_high:
-            start_k, end_k = _window_bounds(i-1, N)
-            if _has_rapid_downmove(candles, i-1, N, pct) and _has_simple_gap_down_in_window(candles, start_k, end_k):
-                ups.append({
-                    "index": i,
-                    "prior_date": prior.get("date"),
-                    "current_date": curr.get("date"),
-                    "type": "novice_gap_up",
-                    "prev_close": prev_close,
-                    "curr_open": open_i,
-                    "curr_close": close_i,
-                    "prior_high": prior_high,
-                })
+    for i in np.flatnonzero(down_bar | up_bar).tolist():
+        start_k, end_k = _window_bounds(i-1, N)
+        if down_bar[i] and _rapid_upmove(ctx, i-1, N, pct) and ctx.any_gap_up(start_k, end_k):
+            downs.append(_novice_gap_down(candles, cols, i))
+        if up_bar[i] and _rapid_downmove(ctx, i-1, N, pct) and ctx.any_gap_down(start_k, end_k):
+            ups.append(_novice_gap_up(candles, cols, i))
 
     return {"novice_gap_downs": downs, "novice_gap_ups": ups}
@@ -1,19 +1,15 @@
 
-from typing import List, Dict, Optional
+from typing import List, Dict
 
-Candle = Dict[str, float]  
+import numpy as np
 
-GREEN = "green"
-RED = "red"
-BASING = "basing"
+from candle_series import as_series
+from gap_context import GapContext, gap_context
+from candle_colors import GREEN_CODE, RED_CODE, BASING_THRESHOLD, candle_colors
+# GREEN / RED / BASING / classify used to be defined here; kept importable from this module
+from candle_colors import GREEN, RED, BASING, classify
 
-def classify(c: Candle) -> str:
-    
-    rng = float(c["high"]) - float(c["low"])
-    body = abs(float(c["close"]) - float(c["open"]))
-    if rng == 0 or (rng > 0 and body / rng < 0.5):
-        return BASING
-    return GREEN if float(c["close"]) > float(c["open"]) else RED
+Candle = Dict[str, float]  
 
 def _fmt_date(d):
     try:
@@ -21,84 +17,76 @@ def _fmt_date(d):
     except Exception:
         return str(d)
 
-def _has_downmove(candles: List[Candle], prior_idx: int, min_bars: int, min_pct: float) -> bool:
-    
+def _downmove(ctx: GapContext, prior_idx: int, min_bars: int, min_pct: float) -> bool:
+    """Closes fell by min_pct from the max of the min_bars bars before prior_idx (O(1) from the GapContext)."""
     start = prior_idx - min_bars
-    end = prior_idx - 1
-    if start < 0 or end < 0 or start > end:
-        return False
-    closes = [float(candles[j]["close"]) for j in range(start, end + 1)]
-    if not closes:
+    if start < 0:
         return False
-    cmax = max(closes)
-    c_prior = float(candles[prior_idx]["close"])
-    if cmax <= 0:
-        return False
-    return (cmax - c_prior) / cmax >= min_pct
+    return ctx.drop_from_max(prior_idx, start, prior_idx - 1, min_pct)
 
-def _has_upmove(candles: List[Candle], prior_idx: int, min_bars: int, min_pct: float) -> bool:
-   
+def _upmove(ctx: GapContext, prior_idx: int, min_bars: int, min_pct: float) -> bool:
+    """Closes rose by min_pct from the min of the min_bars bars before prior_idx (O(1) from the GapContext)."""
     start = prior_idx - min_bars
-    end = prior_idx - 1
-    if start < 0 or end < 0 or start > end:
-        return False
-    closes = [float(candles[j]["close"]) for j in range(start, end + 1)]
-    if not closes:
-        return False
-    cmin = min(closes)
-    c_prior = float(candles[prior_idx]["close"])
-    if cmin <= 0:
+    if start < 0:
         return False
-    return (c_prior - cmin) / cmin >= min_pct
+    return ctx.rise_from_min(prior_idx, start, prior_idx - 1, min_pct)
+
+def _pro_gap_up(candles, cols, i: int) -> Dict:
+    O, H, L, C = cols
+    return {
+        "index": i,
+        "prior_date": candles[i - 1].get("date"),
+        "current_date": candles[i].get("date"),
+        "type": "pro_gap_up",
+        "prev_close": C[i - 1],
+        "curr_low": L[i],
+        # Zone: from low of red (prior) to open of green (current)
+        "zone_low": L[i - 1],
+        "zone_high": O[i],
+    }
+
+def _pro_gap_down(candles, cols, i: int) -> Dict:
+    O, H, L, C = cols
+    return {
+        "index": i,
+        "prior_date": candles[i - 1].get("date"),
+        "current_date": candles[i].get("date"),
+        "type": "pro_gap_down",
+        "prev_close": C[i - 1],
+        "curr_high": H[i],
+        # Zone: from open of red (current) to high of green (prior)
+        "zone_low": O[i],
+        "zone_high": H[i - 1],
+    }
 
 def detect_pro_gaps(
     candles: List[Candle],
     min_bars: int = 3,
     min_pct: float = 0.02,  
+    basing_threshold: float = BASING_THRESHOLD,
 ) -> Dict[str, List[Dict]]:
-   
-    n = len(candles)
-    ups, downs = [], []
 
-    for i in range(1, n):  # compare prior (i-1) and current (i)
-        prior = candles[i - 1]
-        curr = candles[i]
+    s = as_series(candles)
+    ctx = gap_context(s)
+    return _pro_gaps(candles, s, ctx.cols, ctx, min_bars, min_pct, basing_threshold)
 
-        color_prior = classify(prior)
-        color_curr = classify(curr)
-
-        prev_close = float(prior["close"])
-        curr_low = float(curr["low"])
-        curr_high = float(curr["high"])
-
-        # -------- Pro Gap Up: prior RED, current GREEN, strict low>prev_close, downmove context --------
-        if color_prior == RED and color_curr == GREEN and curr_low > prev_close:
-            if _has_downmove(candles, prior_idx=i - 1, min_bars=min_bars, min_pct=min_pct):
-                ups.append({
-                    "index": i,
-                    "prior_date": prior.get("date"),
-                    "current_date": curr.get("date"),
-                    "type": "pro_gap_up",
-                    "prev_close": prev_close,
-                    "curr_low": curr_low,
-                    # Zone: from low of red (prior) to open of green (current)
-                    "zone_low": float(prior["low"]),
-                    "zone_high": float(curr["open"]),
-                })
+def _pro_gaps(candles, s, cols, ctx: GapContext, min_bars: int, min_pct: float, basing_threshold: float) -> Dict[str, List[Dict]]:
+    """detect_pro_gaps on prebuilt columns / context; only bars matching the color pattern are checked."""
+    ups, downs = [], []
+    colors = candle_colors(s, basing_threshold)
+    up_bar = np.zeros(len(s), dtype=bool)
+    down_bar = np.zeros(len(s), dtype=bool)
+    if len(s) >= 2:
+        # Pro Gap Up: prior RED, current GREEN, strict low > prev_close
+        up_bar[1:] = (colors[:-1] == RED_CODE) & (colors[1:] == GREEN_CODE) & ctx.gap_up[1:]
+        # Pro Gap Down: prior GREEN, current RED, strict high < prev_close
+        down_bar[1:] = (colors[:-1] == GREEN_CODE) & (colors[1:] == RED_CODE) & ctx.gap_down[1:]
 
-        # -------- Pro Gap Down: prior GREEN, current RED, strict high<prev_close, upmove context --------
-        if color_prior == GREEN and color_curr == RED and curr_high < prev_close:
-            if _has_upmove(candles, prior_idx=i - 1, min_bars=min_bars, min_pct=min_pct):
-                downs.append({
-                    "index": i,
-                    "prior_date": prior.get("date"),
-                    "current_date": curr.get("date"),
-                    "type": "pro_gap_down",
-                    "prev_close": prev_close,
-                    "curr_high": curr_high,
-                    # Zone: from open of red (current) to high of green (prior)
-                    "zone_low": float(curr["open"]),
-                    "zone_high": float(prior["high"]),
-                })
+    for i in np.flatnonzero(up_bar | down_bar).tolist():
+        # downmove context before a gap up, upmove context before a gap down
+        if up_bar[i] and _downmove(ctx, i - 1, min_bars, min_pct):
+            ups.append(_pro_gap_up(candles, cols, i))
+        if down_bar[i] and _upmove(ctx, i - 1, min_bars, min_pct):
+            downs.append(_pro_gap_down(candles, cols, i))
 
     return {"pro_gap_ups": ups, "pro_gap_downs": downs}
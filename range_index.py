@@ -0,0 +1,247 @@
+# range_index.py
+# Sparse-table range index over one price column (e.g. highs or lows).
+#
+#   - query(a, b)                 -> min/max over [a..b] in O(1)
+#   - first_index(a, b, t)        -> first k in [a..b] past threshold t, O(log n)
+#   - last_index(a, b, t)         -> last  k in [a..b] past threshold t, O(log n)
+#
+# "Past threshold" means x[k] <= t for a "min" table and x[k] >= t for a "max"
+# table (strict=True makes it < / >). All queries accept scalars or NumPy
+# arrays of equal shape, so a whole series of probes runs as a handful of
+# vectorized steps instead of one Python scan per bar.
+#
+# StraddleIndex (highs + lows together) answers "does any bar in [a..b]
+# strictly straddle price p" for the momentum obstruction checks, and
+# first_breaches() finds the first wick breach of many levels in one pass.
+
+from typing import Union
+
+import numpy as np
+
+from candle_series import as_series
+
+Index = Union[int, np.ndarray]
+
+
+class SparseTable:
+    """
+    Args:
+        values (array-like): one float per bar
+        op (str): "min" or "max"
+    """
+
+    def __init__(self, values, op: str = "min"):
+        if op not in ("min", "max"):
+            raise ValueError(f"op must be 'min' or 'max', got {op!r}")
+        x = np.asarray(values, dtype=np.float64)
+        self.op = op
+        self.n = n = len(x)
+        # Everything is stored as a min-table; a max-table keeps -x.
+        self._sign = 1.0 if op == "min" else -1.0
+        key = x * self._sign
+        self._levels = max(n.bit_length(), 1)
+        # table[j, p] = min(key[p .. p + 2^j - 1]); +inf where the block runs past the end
+        table = np.full((self._levels, max(n, 1)), np.inf)
+        table[0, :n] = key
+        for j in range(1, self._levels):
+            half = 1 << (j - 1)
+            width = n - (1 << j) + 1
+            table[j, :width] = np.minimum(table[j - 1, :width], table[j - 1, half:half + width])
+        self._table = table
+        self._rows = None  # Python-list copy for scalar queries, built on first use
+
+    # -------------------- range min / max --------------------
+
+    def query(self, a: Index, b: Index):
+        """min (or max) over [a..b] inclusive; requires a <= b."""
+        if np.ndim(a) == 0 and np.ndim(b) == 0:
+            return self.query_one(int(a), int(b))
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        j = np.floor(np.log2(b - a + 1)).astype(np.int64)
+        v = np.minimum(self._table[j, a], self._table[j, b - (1 << j) + 1])
+        return v * self._sign
+
+    def query_one(self, a: int, b: int) -> float:
+        """query() for one window of plain ints, without the NumPy dispatch (per-bar loops)."""
+        rows = self._rows
+        if rows is None:
+            rows = self._rows = self._table.tolist()
+        j = (b - a + 1).bit_length() - 1
+        row = rows[j]
+        return min(row[a], row[b - (1 << j) + 1]) * self._sign
+
+    # -------------------- threshold searches --------------------
+
+    def _prep(self, a, b, t, strict):
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        a, b, t = np.broadcast_arrays(a, b, np.asarray(t, dtype=np.float64) * self._sign)
+        return a.copy(), b.copy(), t, strict
+
+    def first_index(self, a: Index, b: Index, t, strict: bool = False):
+        """
+        First k in [a..b] with x[k] <= t ("min") / x[k] >= t ("max");
+        strict=True uses < / >. Returns -1 where there is none (or a > b).
+        """
+        if np.ndim(a) == 0 and np.ndim(b) == 0 and np.ndim(t) == 0:
+            return self._first_scalar(int(a), int(b), float(t), strict)
+        pos, b, t, strict = self._prep(a, b, t, strict)
+        last = max(self.n - 1, 0)
+        for j in range(self._levels - 1, -1, -1):
+            step = 1 << j
+            block = self._table[j, np.clip(pos, 0, last)]
+            keep_going = (block >= t) if strict else (block > t)
+            skip = (pos + step - 1 <= b) & keep_going
+            pos = np.where(skip, pos + step, pos)
+        out = np.where(pos <= b, pos, -1)
+        return int(out) if out.ndim == 0 else out
+
+    def _first_scalar(self, pos: int, b: int, t: float, strict: bool) -> int:
+        # Same binary lifting as the vectorized path, one table cell per step
+        if pos > b:
+            return -1
+        t *= self._sign
+        cell = self._table.item
+        for j in range(self._levels - 1, -1, -1):
+            step = 1 << j
+            if pos + step - 1 <= b:
+                block = cell(j, pos)
+                if (block >= t) if strict else (block > t):
+                    pos += step
+        return pos if pos <= b else -1
+
+    def last_index(self, a: Index, b: Index, t, strict: bool = False):
+        """
+        Last k in [a..b] with x[k] <= t ("min") / x[k] >= t ("max");
+        strict=True uses < / >. Returns -1 where there is none (or a > b).
+        """
+        if np.ndim(a) == 0 and np.ndim(b) == 0 and np.ndim(t) == 0:
+            return self._last_scalar(int(a), int(b), float(t), strict)
+        a, pos, t, strict = self._prep(a, b, t, strict)
+        last = max(self.n - 1, 0)
+        for j in range(self._levels - 1, -1, -1):
+            step = 1 << j
+            start = pos - step + 1
+            block = self._table[j, np.clip(start, 0, last)]
+            keep_going = (block >= t) if strict else (block > t)
+            skip = (start >= a) & keep_going
+            pos = np.where(skip, pos - step, pos)
+        out = np.where(pos >= a, pos, -1)
+        return int(out) if out.ndim == 0 else out
+
+    def _last_scalar(self, a: int, pos: int, t: float, strict: bool) -> int:
+        # Mirror of _first_scalar, walking left from pos
+        if a > pos:
+            return -1
+        t *= self._sign
+        cell = self._table.item
+        for j in range(self._levels - 1, -1, -1):
+            step = 1 << j
+            start = pos - step + 1
+            if start >= a:
+                block = cell(j, start)
+                if (block >= t) if strict else (block > t):
+                    pos -= step
+        return pos if pos >= a else -1
+
+
+class StraddleIndex:
+    """
+    Answers "does any bar in [a..b] strictly straddle price p" (low[k] < p < high[k])
+    for obstruction checks between a level and a later bar.
+
+    Two sparse tables, no per-price state: find the first bar with low < p;
+    if its high is not above p, the price sits at or below p there, so find the
+    first later bar with high > p; if its low is not below p, price gapped over
+    p, so repeat. Each round is O(log n) and only a gap across p costs another
+    round, so a query is O(log n) in practice. The first SCAN bars are checked
+    directly since obstructions usually sit right after the level.
+
+    Args:
+        highs, lows (array-like): one float per bar
+    """
+
+    SCAN = 16
+
+    def __init__(self, highs, lows, high_max: "SparseTable" = None, low_min: "SparseTable" = None):
+        h = np.asarray(highs, dtype=np.float64)
+        l = np.asarray(lows, dtype=np.float64)
+        self.n = len(h)
+        # NaN bars can never straddle; keep them out of the searches
+        h = np.where(np.isnan(h), -np.inf, h)
+        l = np.where(np.isnan(l), np.inf, l)
+        self._highs, self._lows = h.tolist(), l.tolist()
+        self._high_max = high_max if high_max is not None else SparseTable(h, "max")
+        self._low_min = low_min if low_min is not None else SparseTable(l, "min")
+
+    def any(self, a: int, b: int, p: float) -> bool:
+        """True if some bar in [a..b] has low < p < high; False for an empty range."""
+        a = max(int(a), 0)
+        b = min(int(b), self.n - 1)
+        highs, lows = self._highs, self._lows
+        head = min(b, a + self.SCAN - 1)
+        for k in range(a, head + 1):
+            if lows[k] < p < highs[k]:
+                return True
+        k = head + 1
+        while k <= b:
+            k = self._low_min._first_scalar(k, b, p, True)
+            if k < 0:
+                return False
+            if highs[k] > p:
+                return True
+            k = self._high_max._first_scalar(k, b, p, True)
+            if k < 0:
+                return False
+            if lows[k] < p:
+                return True
+        return False
+
+
+def series_table(candles, column: str) -> SparseTable:
+    """
+    Shared sparse table over a series' highs ("high", max) or lows ("low", min),
+    built once and cached on the CandleSeries. NaN bars never count as past a threshold.
+    """
+    s = as_series(candles)
+    key = ("sparse", column)
+    table = s._derived.get(key)
+    if table is None:
+        if column == "high":
+            table = SparseTable(np.where(np.isnan(s.high), -np.inf, s.high), "max")
+        elif column == "low":
+            table = SparseTable(np.where(np.isnan(s.low), np.inf, s.low), "min")
+        else:
+            raise ValueError(f"column must be 'high' or 'low', got {column!r}")
+        s._derived[key] = table
+    return table
+
+
+def straddle_index(candles) -> StraddleIndex:
+    """StraddleIndex over a series' highs/lows, built once and cached on the CandleSeries."""
+    s = as_series(candles)
+    idx = s._derived.get("straddle")
+    if idx is None:
+        idx = StraddleIndex(s.high, s.low, series_table(s, "high"), series_table(s, "low"))
+        s._derived["straddle"] = idx
+    return idx
+
+
+def first_breaches(candles, starts, prices, direction: str = "up") -> np.ndarray:
+    """
+    Batch wick-breach search: for every (start, price) pair, the first bar
+    j > start with high[j] > price ("up") or low[j] < price ("down").
+    All queries run together as one vectorized search over the series' table.
+
+    Returns:
+        np.ndarray[int64]: bar index per query, -1 where the level is never breached
+    """
+    s = as_series(candles)
+    starts = np.asarray(starts, dtype=np.int64)
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    table = series_table(s, "high" if direction == "up" else "low")
+    out = np.atleast_1d(table.first_index(starts + 1, len(s) - 1, prices, strict=True))
+    return np.where(np.isnan(prices), -1, out)  # nothing is ever past a NaN level
@@ -0,0 +1,81 @@
+# rate_limit.py
+# Thread-safe token bucket + retry-with-backoff for Kite API calls.
+
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+# Kite Connect published limits (requests per second)
+HISTORICAL_RATE = 3
+QUOTE_RATE = 1
+
+# Max instruments per kite.ltp() call
+LTP_MAX_INSTRUMENTS = 1000
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average, with bursts up to `capacity`.
+
+    Args:
+        rate (float): tokens added per second
+        capacity (float): bucket size; defaults to rate (one second of burst)
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1.0))
+        self._tokens = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> None:
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """HTTP 429 / Kite NetworkException / socket-level errors are worth retrying."""
+    if getattr(exc, "code", None) == 429:
+        return True
+    if type(exc).__name__ == "NetworkException":
+        return True
+    return isinstance(exc, OSError)  # ConnectionError, TimeoutError, requests' IOError family
+
+
+def call_with_retry(
+    fn: Callable,
+    *args,
+    limiter: Optional[TokenBucket] = None,
+    retries: int = 4,
+    backoff: float = 0.5,
+    max_backoff: float = 8.0,
+    **kwargs,
+):
+    """
+    Call fn(*args, **kwargs), taking a limiter token before every attempt.
+    Retryable errors are retried with exponential backoff + jitter; anything
+    else (or the last failure) is raised.
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt >= retries or not is_retryable(e):
+                raise
+            delay = min(max_backoff, backoff * (2 ** attempt))
+            time.sleep(delay * (0.5 + random.random() / 2))
+            attempt += 1
@@ -0,0 +1,244 @@
+# replay_kite.py
+# Offline stand-in for KiteConnect: serves instruments / ltp / historical_data
+# from recorded fixture files, with optional latency and rate-limit errors.
+#
+# Fixture directory layout (all JSON):
+#   instruments_<EXCHANGE>.json   [{"tradingsymbol", "instrument_token", "exchange"}, ...]
+#   ltp.json                      {"NSE:SYM": {"instrument_token", "last_price"}, ...}
+#   history/<interval>/<token>.json   [[iso_date, open, high, low, close], ...] sorted by date
+#
+# Record once against the live API with RecordingKite, or generate synthetic
+# fixtures with write_synthetic_fixtures(), then:
+#   auth.set_client(ReplayKite("fixtures", latency=0.05, enforce_rates=True))
+
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from candle_store import IST
+from rate_limit import HISTORICAL_RATE, QUOTE_RATE
+
+
+class ReplayRateLimit(Exception):
+    """Shaped like kiteconnect's NetworkException for HTTP 429 (code=429)."""
+
+    def __init__(self, message: str = "Too many requests"):
+        super().__init__(message)
+        self.code = 429
+
+
+def _parse_date(val) -> datetime:
+    dt = datetime.fromisoformat(val) if isinstance(val, str) else val
+    return dt.replace(tzinfo=IST) if dt.tzinfo is None else dt
+
+
+def _history_path(root: str, token: int, interval: str) -> str:
+    return os.path.join(root, "history", interval, f"{int(token)}.json")
+
+
+def _write_json(path: str, obj) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
+
+
+# -------------------- replay --------------------
+
+class ReplayKite:
+    """
+    Args:
+        path (str): fixture directory
+        latency (float): seconds slept per call (simulated round trip)
+        jitter (float): extra uniform random latency in [0, jitter]
+        fail_every (int): raise a 429 on every n-th call of each kind (0 = never)
+        enforce_rates (bool): raise a 429 whenever a call exceeds Kite's published
+            per-second limits (HISTORICAL_RATE / QUOTE_RATE) over a sliding second
+        seed (int): seeds the jitter so runs are reproducible
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        fail_every: int = 0,
+        enforce_rates: bool = False,
+        seed: int = 0,
+    ):
+        self.path = path
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_every = fail_every
+        self.enforce_rates = enforce_rates
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+        self._history: Dict[tuple, List[list]] = {}   # (token, interval) -> rows, loaded on demand
+        self._ltp: Optional[Dict[str, Dict]] = None
+        self._windows = {"historical": deque(), "quote": deque()}
+        self._limits = {"historical": HISTORICAL_RATE, "quote": QUOTE_RATE}
+        self.counts = {"historical": 0, "quote": 0, "instruments": 0, "rate_limited": 0}
+
+    # -------------------- simulation --------------------
+
+    def _call(self, kind: str) -> None:
+        with self._lock:
+            self.counts[kind] += 1
+            n = self.counts[kind]
+            delay = self.latency + (self._rnd.random() * self.jitter if self.jitter else 0.0)
+            limited = bool(self.fail_every) and n % self.fail_every == 0
+            window = self._windows.get(kind)
+            if self.enforce_rates and window is not None:
+                now = time.monotonic()
+                while window and now - window[0] >= 1.0:
+                    window.popleft()
+                if len(window) >= self._limits[kind]:
+                    limited = True
+                else:
+                    window.append(now)
+            if limited:
+                self.counts["rate_limited"] += 1
+        if delay:
+            time.sleep(delay)
+        if limited:
+            raise ReplayRateLimit()
+
+    # -------------------- KiteConnect surface --------------------
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict]:
+        self._call("instruments")
+        path = os.path.join(self.path, f"instruments_{exchange or 'NSE'}.json")
+        if not os.path.exists(path):
+            raise RuntimeError(f"no recorded instruments dump for {exchange}")
+        with open(path) as f:
+            return json.load(f)
+
+    def ltp(self, *instruments) -> Dict[str, Dict]:
+        self._call("quote")
+        keys = instruments[0] if len(instruments) == 1 and isinstance(instruments[0], (list, tuple)) else instruments
+        with self._lock:
+            if self._ltp is None:
+                self._ltp = {}
+                path = os.path.join(self.path, "ltp.json")
+                if os.path.exists(path):
+                    with open(path) as f:
+                        self._ltp = json.load(f)
+            return {k: dict(self._ltp[k]) for k in keys if k in self._ltp}
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False) -> List[Dict]:
+        self._call("historical")
+        key = (int(instrument_token), interval)
+        with self._lock:
+            rows = self._history.get(key)
+            if rows is None:
+                path = _history_path(self.path, instrument_token, interval)
+                rows = []
+                if os.path.exists(path):
+                    with open(path) as f:
+                        rows = [[_parse_date(r[0])] + r[1:] for r in json.load(f)]
+                self._history[key] = rows
+        lo, hi = _parse_date(from_date), _parse_date(to_date)
+        return [
+            {"date": d, "open": o, "high": h, "low": l, "close": c, "volume": 0}
+            for d, o, h, l, c in rows if lo <= d <= hi
+        ]
+
+
+# -------------------- record --------------------
+
+class RecordingKite:
+    """
+    Wraps a live KiteConnect client and saves every instruments / ltp /
+    historical_data response into a fixture directory ReplayKite can serve.
+
+    Args:
+        client: live client (e.g. auth.get_kite())
+        path (str): fixture directory to write into
+    """
+
+    def __init__(self, client, path: str):
+        self.client = client
+        self.path = path
+        self._lock = threading.Lock()
+
+    def instruments(self, exchange: Optional[str] = None) -> List[Dict]:
+        rows = self.client.instruments(exchange)
+        slim = [{"tradingsymbol": r["tradingsymbol"], "instrument_token": int(r["instrument_token"]),
+                 "exchange": r.get("exchange", exchange)} for r in rows]
+        with self._lock:
+            _write_json(os.path.join(self.path, f"instruments_{exchange or 'NSE'}.json"), slim)
+        return rows
+
+    def ltp(self, *instruments) -> Dict[str, Dict]:
+        data = self.client.ltp(*instruments)
+        path = os.path.join(self.path, "ltp.json")
+        with self._lock:
+            saved = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    saved = json.load(f)
+            for k, v in data.items():
+                saved[k] = {"instrument_token": int(v["instrument_token"]), "last_price": float(v["last_price"])}
+            _write_json(path, saved)
+        return data
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False) -> List[Dict]:
+        bars = self.client.historical_data(instrument_token, from_date, to_date, interval, continuous, oi)
+        path = _history_path(self.path, instrument_token, interval)
+        with self._lock:
+            merged = {}
+            if os.path.exists(path):
+                with open(path) as f:
+                    merged = {r[0]: r for r in json.load(f)}
+            for b in bars:
+                d = _parse_date(b["date"]).isoformat()
+                merged[d] = [d, float(b["open"]), float(b["high"]), float(b["low"]), float(b["close"])]
+            _write_json(path, sorted(merged.values(), key=lambda r: _parse_date(r[0])))
+        return bars
+
+
+# -------------------- synthetic fixtures --------------------
+
+def write_synthetic_fixtures(
+    path: str,
+    symbols: List[str],
+    interval: str = "day",
+    n_bars: int = 500,
+    end: Optional[datetime] = None,
+    seed: int = 0,
+    exchange: str = "NSE",
+) -> None:
+    """
+    Deterministic random-walk fixtures for CI boxes with nothing recorded.
+    Daily bars step one calendar day; intraday bars step by the interval's minutes.
+    """
+    rnd = random.Random(seed)
+    step = timedelta(days=1) if interval == "day" else timedelta(minutes=int(interval.replace("minute", "") or 1))
+    end = (end or datetime.now()).replace(second=0, microsecond=0, tzinfo=IST)
+    if interval == "day":
+        end = end.replace(hour=0, minute=0)   # Kite stamps daily bars at midnight
+    start = end - step * (n_bars - 1)
+
+    dump, ltp = [], {}
+    for k, sym in enumerate(symbols):
+        token = 100000 + k
+        dump.append({"tradingsymbol": sym, "instrument_token": token, "exchange": exchange})
+        rows, p = [], rnd.uniform(50.0, 3000.0)
+        for i in range(n_bars):
+            o = p
+            c = max(1.0, o * (1.0 + rnd.gauss(0.0, 0.015)))
+            h = max(o, c) * (1.0 + abs(rnd.gauss(0.0, 0.006)))
+            l = min(o, c) * (1.0 - abs(rnd.gauss(0.0, 0.006)))
+            rows.append([(start + step * i).isoformat(), round(o, 2), round(h, 2), round(l, 2), round(c, 2)])
+            p = c
+        _write_json(_history_path(path, token, interval), rows)
+        ltp[f"{exchange}:{sym}"] = {"instrument_token": token, "last_price": rows[-1][4]}
+
+    _write_json(os.path.join(path, f"instruments_{exchange}.json"), dump)
+    _write_json(os.path.join(path, "ltp.json"), ltp)
@@ -9,10 +9,26 @@
 #       LEFT:  nearest k<i with HIGH[k] >= LOW[i]*(1 + pct_left)
 #              AND no bar in [k..i] has LOW < LOW[i]
 #       RIGHT: before any LOW < LOW[i], exists k>i with HIGH[k] >= LOW[i]*(1 + pct_right)
+#
+# is_bilateral_* scan one index at a time (reference rules). all_bilateral_*
+# evaluate every index at once with sparse-table searches (range_index):
+#   "nearest k<i with LOW<=target"  + "nearest k<i with HIGH>HIGH[i]"  -> LEFT
+#   "first  k>i with LOW<=target"   + "first  k>i with HIGH>HIGH[i]"   -> RIGHT
+# which is O(n log n) instead of O(n^2) and gives identical results.
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from candle_series import as_series, column_lists
+from range_index import series_table
 
 Candle = Dict[str, float]  # must include: 'open','high','low','close'; optional: 'date'
+Columns = Tuple[Sequence[float], Sequence[float]]  # highs, lows
+
+def _columns(candles) -> Columns:
+    """HIGH/LOW for the per-index scans (cached lists for a series, lazy views for a list)."""
+    return column_lists(candles, "high", "low")
 
 def _fmt_date(val):
     try:
@@ -22,34 +38,36 @@ def _fmt_date(val):
 
 # -------------------- Resistance (from HIGH down to LOW) --------------------
 
-def _left_confirm_drop_from_high(candles: List[Candle], i: int, pct_left: float) -> Optional[int]:
+def _left_confirm_drop_from_high(cols: Columns, i: int, pct_left: float) -> Optional[int]:
     """Nearest k<i with LOW[k] <= HIGH[i] * (1 - pct_left)."""
-    Hi = candles[i]['high']
-    target = Hi * (1.0 - pct_left)
+    H, L = cols
+    target = H[i] * (1.0 - pct_left)
     for k in range(i - 1, -1, -1):  # nearest first
-        if candles[k]['low'] <= target:
+        if L[k] <= target:
             return k
     return None
 
-def _left_no_higher_high_between(candles: List[Candle], i: int, k: int) -> bool:
+def _left_no_higher_high_between(cols: Columns, i: int, k: int) -> bool:
     """No HIGH > HIGH[i] in [k..i]."""
-    Hi = candles[i]['high']
+    H = cols[0]
+    Hi = H[i]
     for t in range(k, i + 1):
-        if candles[t]['high'] > Hi:
+        if H[t] > Hi:
             return False
     return True
 
-def _right_confirm_drop_from_high(candles: List[Candle], i: int, pct_right: float) -> Optional[int]:
+def _right_confirm_drop_from_high(cols: Columns, i: int, pct_right: float) -> Optional[int]:
     """
     Scan forward; if any HIGH > HIGH[i] before LOW<=target (with pct_right), invalidate.
     Else return first k>i where LOW<=target.
     """
-    Hi = candles[i]['high']
+    H, L = cols
+    Hi = H[i]
     target = Hi * (1.0 - pct_right)
-    for k in range(i + 1, len(candles)):
-        if candles[k]['high'] > Hi:
+    for k in range(i + 1, len(H)):
+        if H[k] > Hi:
             return None
-        if candles[k]['low'] <= target:
+        if L[k] <= target:
             return k
     return None
 
@@ -62,19 +80,22 @@ def is_bilateral_resistance(
     """Return details if index i is a confirmed resistance; else None."""
     if i <= 0 or i >= len(candles) - 1:
         return None
-    k_left = _left_confirm_drop_from_high(candles, i, pct_left)
+    return _resistance_at(candles, _columns(candles), i, pct_left, pct_right)
+
+def _resistance_at(candles, cols: Columns, i: int, pct_left: float, pct_right: float) -> Optional[Dict]:
+    k_left = _left_confirm_drop_from_high(cols, i, pct_left)
     if k_left is None:
         return None
-    if not _left_no_higher_high_between(candles, i, k_left):
+    if not _left_no_higher_high_between(cols, i, k_left):
         return None
-    k_right = _right_confirm_drop_from_high(candles, i, pct_right)
+    k_right = _right_confirm_drop_from_high(cols, i, pct_right)
     if k_right is None:
         return None
     return {
         "type": "resistance",
         "index": i,
         "date": candles[i].get("date"),
-        "price": candles[i]["high"],
+        "price": cols[0][i],
         "left_confirm_idx": k_left,
         "right_confirm_idx": k_right,
         "pct_left": pct_left,
@@ -87,44 +108,71 @@ def all_bilateral_resistances(
     pct_right: float = 0.03,
 ) -> List[Dict]:
     """Collect ALL resistances across the series."""
-    out = []
-    n = len(candles)
-    for i in range(1, n - 1):
-        r = is_bilateral_resistance(candles, i, pct_left=pct_left, pct_right=pct_right)
-        if r:
-            out.append(r)
-    return out
+    return _all_resistances(candles, _RangeIndexes(candles), pct_left, pct_right)
+
+def _all_resistances(candles, idx: "_RangeIndexes", pct_left: float, pct_right: float) -> List[Dict]:
+    n = idx.n
+    if n < 3:
+        return []
+    i = np.arange(1, n - 1)
+    Hi = idx.high[i]
+
+    # LEFT: nearest low-hit must come after the nearest higher high
+    k_left = idx.low_min.last_index(0, i - 1, Hi * (1.0 - pct_left))
+    blocker = idx.high_max.last_index(0, i - 1, Hi, strict=True)
+    ok = (k_left >= 0) & (k_left > blocker) & ~np.isnan(Hi)   # a NaN bar is never a level
+
+    # RIGHT: first low-hit must come before the first higher high
+    k_right = idx.low_min.first_index(i + 1, n - 1, Hi * (1.0 - pct_right))
+    breaker = idx.high_max.first_index(i + 1, n - 1, Hi, strict=True)
+    ok &= (k_right >= 0) & ((breaker < 0) | (k_right < breaker))
+
+    return [
+        {
+            "type": "resistance",
+            "index": int(i[t]),
+            "date": candles[int(i[t])].get("date"),
+            "price": float(Hi[t]),
+            "left_confirm_idx": int(k_left[t]),
+            "right_confirm_idx": int(k_right[t]),
+            "pct_left": pct_left,
+            "pct_right": pct_right,
+        }
+        for t in np.flatnonzero(ok)
+    ]
 
 # -------------------- Support (from LOW up to HIGH) --------------------
 
-def _left_confirm_rise_from_low(candles: List[Candle], i: int, pct_left: float) -> Optional[int]:
+def _left_confirm_rise_from_low(cols: Columns, i: int, pct_left: float) -> Optional[int]:
     """Nearest k<i with HIGH[k] >= LOW[i] * (1 + pct_left)."""
-    Li = candles[i]['low']
-    target = Li * (1.0 + pct_left)
+    H, L = cols
+    target = L[i] * (1.0 + pct_left)
     for k in range(i - 1, -1, -1):
-        if candles[k]['high'] >= target:
+        if H[k] >= target:
             return k
     return None
 
-def _left_no_lower_low_between(candles: List[Candle], i: int, k: int) -> bool:
+def _left_no_lower_low_between(cols: Columns, i: int, k: int) -> bool:
     """No LOW < LOW[i] in [k..i]."""
-    Li = candles[i]['low']
+    L = cols[1]
+    Li = L[i]
     for t in range(k, i + 1):
-        if candles[t]['low'] < Li:
+        if L[t] < Li:
             return False
     return True
 
-def _right_confirm_rise_from_low(candles: List[Candle], i: int, pct_right: float) -> Optional[int]:
+def _right_confirm_rise_from_low(cols: Columns, i: int, pct_right: float) -> Optional[int]:
     """
     Scan forward; if any LOW < LOW[i] before HIGH>=target (with pct_right), invalidate.
     Else return first k>i where HIGH>=target.
     """
-    Li = candles[i]['low']
+    H, L = cols
+    Li = L[i]
     target = Li * (1.0 + pct_right)
-    for k in range(i + 1, len(candles)):
-        if candles[k]['low'] < Li:
+    for k in range(i + 1, len(L)):
+        if L[k] < Li:
             return None
-        if candles[k]['high'] >= target:
+        if H[k] >= target:
             return k
     return None
 
@@ -137,19 +185,22 @@ def is_bilateral_support(
     """Return details if index i is a confirmed support; else None."""
     if i <= 0 or i >= len(candles) - 1:
         return None
-    k_left = _left_confirm_rise_from_low(candles, i, pct_left)
+    return _support_at(candles, _columns(candles), i, pct_left, pct_right)
+
+def _support_at(candles, cols: Columns, i: int, pct_left: float, pct_right: float) -> Optional[Dict]:
+    k_left = _left_confirm_rise_from_low(cols, i, pct_left)
     if k_left is None:
         return None
-    if not _left_no_lower_low_between(candles, i, k_left):
+    if not _left_no_lower_low_between(cols, i, k_left):
         return None
-    k_right = _right_confirm_rise_from_low(candles, i, pct_right)
+    k_right = _right_confirm_rise_from_low(cols, i, pct_right)
     if k_right is None:
         return None
     return {
         "type": "support",
         "index": i,
         "date": candles[i].get("date"),
-        "price": candles[i]["low"],
+        "price": cols[1][i],
         "left_confirm_idx": k_left,
         "right_confirm_idx": k_right,
         "pct_left": pct_left,
@@ -162,13 +213,51 @@ def all_bilateral_supports(
     pct_right: float = 0.03,
 ) -> List[Dict]:
     """Collect ALL supports across the series."""
-    out = []
-    n = len(candles)
-    for i in range(1, n - 1):
-        s = is_bilateral_support(candles, i, pct_left=pct_left, pct_right=pct_right)
-        if s:
-            out.append(s)
-    return out
+    return _all_supports(candles, _RangeIndexes(candles), pct_left, pct_right)
+
+def _all_supports(candles, idx: "_RangeIndexes", pct_left: float, pct_right: float) -> List[Dict]:
+    n = idx.n
+    if n < 3:
+        return []
+    i = np.arange(1, n - 1)
+    Li = idx.low[i]
+
+    # LEFT: nearest high-hit must come after the nearest lower low
+    k_left = idx.high_max.last_index(0, i - 1, Li * (1.0 + pct_left))
+    blocker = idx.low_min.last_index(0, i - 1, Li, strict=True)
+    ok = (k_left >= 0) & (k_left > blocker) & ~np.isnan(Li)   # a NaN bar is never a level
+
+    # RIGHT: first high-hit must come before the first lower low
+    k_right = idx.high_max.first_index(i + 1, n - 1, Li * (1.0 + pct_right))
+    breaker = idx.low_min.first_index(i + 1, n - 1, Li, strict=True)
+    ok &= (k_right >= 0) & ((breaker < 0) | (k_right < breaker))
+
+    return [
+        {
+            "type": "support",
+            "index": int(i[t]),
+            "date": candles[int(i[t])].get("date"),
+            "price": float(Li[t]),
+            "left_confirm_idx": int(k_left[t]),
+            "right_confirm_idx": int(k_right[t]),
+            "pct_left": pct_left,
+            "pct_right": pct_right,
+        }
+        for t in np.flatnonzero(ok)
+    ]
+
+# -------------------- Shared range indexes --------------------
+
+class _RangeIndexes:
+    """Range-max over HIGH and range-min over LOW for one series (shared, NaN-masked tables)."""
+
+    def __init__(self, candles):
+        s = as_series(candles)
+        self.n = len(s)
+        self.high = s.high
+        self.low = s.low
+        self.high_max = series_table(s, "high")
+        self.low_min = series_table(s, "low")
 
 # -------------------- Convenience: both at once --------------------
 
@@ -182,7 +271,8 @@ def all_bilateral_resistance_support(
       - 'resistances': all confirmed resistances (wick-based bilateral with split thresholds)
       - 'supports':    all confirmed supports (wick-based bilateral with split thresholds)
     """
+    idx = _RangeIndexes(candles)
     return {
-        "resistances": all_bilateral_resistances(candles, pct_left=pct_left, pct_right=pct_right),
-        "supports":    all_bilateral_supports(candles, pct_left=pct_left,  pct_right=pct_right),
+        "resistances": _all_resistances(candles, idx, pct_left, pct_right),
+        "supports":    _all_supports(candles, idx, pct_left, pct_right),
     }
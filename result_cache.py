@@ -0,0 +1,255 @@
+# result_cache.py
+# Detector results memoized by series fingerprint and parameters.
+#
+# A result is keyed by (symbol, interval, last bar timestamp and OHLC, bar
+# count, detector, parameter tuple): as long as no new bar has arrived and the
+# forming last bar has not been refreshed, rerunning a detector with the same
+# parameters is a dict lookup. Two tiers:
+#   - memory: LRU over pickled size (max_memory_bytes), per process
+#   - disk:   SQLite table of pickled results (max_disk_bytes), shared by
+#             processes and runs; least-recently-used rows are evicted first
+# Writes go to both tiers; a disk hit is promoted into memory.
+#
+#   cache = get_result_cache()
+#   rs = cache.run("RELIANCE", "60minute", candles, "resistance_support", pct_left=0.01, pct_right=0.015)
+#
+# Cached values are shared, not copied: treat them as read-only.
+
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Union
+
+from candle_series import as_series
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from demandZone import find_demand_zones
+from supplyZone import find_supply_zones
+from gaps_simple import detect_simple_gaps
+from pro_gaps import detect_pro_gaps
+from novice_gaps import detect_novice_gaps
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.sqlite3")
+
+# Detectors cache.run() knows by name; any other callable is keyed by its qualified name
+DETECTORS: Dict[str, Callable] = {
+    "resistance_support": all_bilateral_resistance_support,
+    "demand_zones": find_demand_zones,
+    "supply_zones": find_supply_zones,
+    "simple_gaps": detect_simple_gaps,
+    "pro_gaps": detect_pro_gaps,
+    "novice_gaps": detect_novice_gaps,
+}
+
+
+def _full_params(fn: Callable, params: Dict) -> Dict:
+    """params with fn's defaults filled in, so f(c) and f(c, pct=<default>) share a key."""
+    sig = inspect.signature(fn)
+    bound = sig.bind_partial(None, **params)
+    bound.apply_defaults()
+    first = next(iter(sig.parameters))
+    return {k: v for k, v in bound.arguments.items() if k != first}
+
+
+class ResultCache:
+    """
+    Args:
+        path (str): SQLite file for the disk tier; defaults to $RESULT_CACHE_PATH or
+                    results.sqlite3 next to this file
+        max_memory_bytes (int): bound on the in-memory tier (pickled sizes)
+        max_disk_bytes (int): bound on the disk tier
+        memory_only (bool): keep results in this process only
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_memory_bytes: int = 64 << 20,
+        max_disk_bytes: int = 512 << 20,
+        memory_only: bool = False,
+    ):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # key -> (value, pickled size)
+        self._memory_bytes = 0
+        self._conn = None
+        self.path = None
+        if not memory_only:
+            self.path = path or os.getenv("RESULT_CACHE_PATH") or DEFAULT_CACHE_PATH
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+            # a cache can lose its last writes on power loss; skip the per-commit fsync
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+                # running SUM(size), kept in the same transactions as the rows (shared by every process)
+                self._conn.execute("CREATE TABLE IF NOT EXISTS results_size (total INTEGER NOT NULL)")
+                if self._conn.execute("SELECT COUNT(*) FROM results_size").fetchone()[0] == 0:
+                    self._conn.execute("INSERT INTO results_size SELECT COALESCE(SUM(size), 0) FROM results")
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "memory_evictions": 0, "disk_evictions": 0}
+
+    # -------------------- keys --------------------
+
+    @staticmethod
+    def key(symbol: str, interval: str, n_bars: int, last_ts: Optional[int], detector: str, params: Dict,
+            last_bar: Optional[tuple] = None) -> str:
+        """
+        Cache key for one detector run on a series with `n_bars` bars ending at `last_ts`.
+        `last_bar` is that bar's (open, high, low, close): a forming candle refreshed in
+        place keeps its count and timestamp, but not its prices.
+        """
+        return repr((symbol, interval, int(last_ts) if last_ts is not None else None, int(n_bars),
+                     tuple(float(v) for v in last_bar) if last_bar is not None else None,
+                     detector, tuple(sorted(params.items()))))
+
+    @classmethod
+    def series_key(cls, symbol: str, interval: str, candles, detector: str, params: Dict) -> str:
+        """key() with the bar count, last timestamp and last bar read off the candles."""
+        s = as_series(candles)
+        if not len(s):
+            return cls.key(symbol, interval, 0, None, detector, params)
+        last_bar = (s.open[-1], s.high[-1], s.low[-1], s.close[-1])
+        return cls.key(symbol, interval, len(s), s.time[-1], detector, params, last_bar)
+
+    # -------------------- get / put --------------------
+
+    def get(self, key: str):
+        """Cached value or None (detectors never return None)."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry[0]
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute("SELECT value FROM results WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE results SET used=? WHERE key=?", (time.time(), key))
+            self._stats["disk_hits"] += 1
+            value = pickle.loads(row[0])
+            self._remember(key, value, len(row[0]))
+            return value
+
+    def put(self, key: str, value) -> None:
+        blob = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._remember(key, value, len(blob))
+            if self._conn is None or len(blob) > self.max_disk_bytes:
+                return
+            with self._conn:
+                old = self._conn.execute("SELECT size FROM results WHERE key=?", (key,)).fetchone()
+                self._conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                                   (key, blob, len(blob), time.time()))
+                self._conn.execute("UPDATE results_size SET total = total + ?", (len(blob) - (old[0] if old else 0),))
+                self._evict_disk()
+
+    def _remember(self, key: str, value, size: int) -> None:
+        # caller holds the lock
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+        if size > self.max_memory_bytes:
+            return
+        self._memory[key] = (value, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, dropped) = self._memory.popitem(last=False)
+            self._memory_bytes -= dropped
+            self._stats["memory_evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        # caller holds the lock and an open transaction
+        total = self._conn.execute("SELECT total FROM results_size").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        freed, stale = 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM results ORDER BY used").fetchall():
+            if total - freed <= self.max_disk_bytes:
+                break
+            stale.append((key,))
+            freed += size
+        self._conn.executemany("DELETE FROM results WHERE key=?", stale)
+        self._conn.execute("UPDATE results_size SET total = total - ?", (freed,))
+        self._stats["disk_evictions"] += len(stale)
+
+    # -------------------- detectors --------------------
+
+    def get_or_compute(self, key: str, compute: Callable[[], object]):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def run(self, symbol: str, interval: str, candles, detector: Union[str, Callable], **params):
+        """
+        detector(candles, **params), served from the cache when this series
+        (same bar count, same last bar time and prices) was already run with the same params.
+
+        Args:
+            detector: a DETECTORS name or any callable(candles, **params)
+        """
+        if isinstance(detector, str):
+            fn, name = DETECTORS[detector], detector
+        else:
+            fn, name = detector, f"{detector.__module__}.{detector.__qualname__}"
+        params = _full_params(fn, params)
+        return self.get_or_compute(self.series_key(symbol, interval, candles, name, params),
+                                   lambda: fn(candles, **params))
+
+    # -------------------- stats --------------------
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_entries"] = len(self._memory)
+            s["memory_bytes"] = self._memory_bytes
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_rate"] = ((s["memory_hits"] + s["disk_hits"]) / lookups) if lookups else 0.0
+        return s
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+
+    def clear(self) -> None:
+        """Drop every cached result (both tiers)."""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("DELETE FROM results")
+                    self._conn.execute("UPDATE results_size SET total = 0")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Shared ResultCache, opened on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+    return _cache
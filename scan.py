@@ -0,0 +1,300 @@
+# scan.py
+# One entry point for the tester-script workflow: any set of detectors over a
+# whole universe, fanned out across all cores, reading candles from the store.
+#
+#   python scan.py universe.txt -d levels -d gaps:pro.min_pct=0.03 -i 60minute --days 120
+#   python scan.py universe.txt -d zones:lookback=300 --no-fetch --out zones.json
+#
+# The main process resolves tokens and tops the candle store up once
+# (fetch_many; --no-fetch skips it, --fixtures DIR replays ReplayKite fixtures
+# instead of calling Kite). Symbols then go to a process pool whose workers are
+# warmed by the pool initializer: detector modules imported and one CandleStore
+# handle opened per process, so each task is just read_rows -> CandleSeries ->
+# detectors, and only the structured results travel back.
+#
+# Universe file: one trading symbol per line; blank lines and "#" comments are skipped.
+
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import fetch
+from candle_series import CandleSeries
+from candle_store import CandleStore, to_epoch
+from analysis_graph import analyze
+from gap_engine import FAMILIES, GapEngine
+from result_cache import ResultCache, get_result_cache
+from swings_percent_bilateral import all_bilateral_swings
+from zone_scanner import find_zones
+
+
+# -------------------- detectors --------------------
+# name -> (callable(series, **params), default params). Params given on the
+# command line are merged over the defaults. Levels and the momentum detectors
+# are analysis_graph nodes: within one symbol they share S/R and the zone sweep.
+
+def _node(name):
+    def run(candles, **params):
+        return analyze(candles, name, **params)
+    return run
+
+
+def _gap_config(params: Dict) -> Dict[str, Dict]:
+    """
+    Dotted keys ("pro.min_pct") -> GapEngine config sections.
+
+    Raises:
+        ValueError: a key or family that GapEngine would silently ignore
+    """
+    config: Dict[str, Dict] = {}
+    for key, val in params.items():
+        if key == "families":
+            families = val.split("+") if isinstance(val, str) else list(val)
+            unknown = [f for f in families if f not in FAMILIES]
+            if unknown:
+                raise ValueError(f"Unknown gap families {unknown} (choose from {', '.join(FAMILIES)})")
+            config["families"] = families
+            continue
+        section, _, name = key.partition(".")
+        if section not in FAMILIES + ("levels",) or not name:
+            raise ValueError(f"Gap parameter {key!r} is not families=... or <section>.<name> "
+                             f"(sections: {', '.join(FAMILIES + ('levels',))})")
+        config.setdefault(section, {})[name] = val
+    return config
+
+
+def _gaps(candles, **params):
+    return GapEngine(_gap_config(params)).run(candles)
+
+
+DETECTORS = {
+    "swings": (all_bilateral_swings, {"pct": 0.05}),
+    "levels": (_node("levels"), {"pct_left": 0.02, "pct_right": 0.03}),
+    "zones": (find_zones, {"lookback": 100}),
+    "gaps": (_gaps, {}),
+    "momentum_zones": (_node("momentum_zones"), {"pct_left": 0.02, "pct_right": 0.03}),
+    "continuation_zones": (_node("continuation_zones"), {"pct_left": 0.02, "pct_right": 0.03}),
+    "momentum_gaps": (_node("momentum_gaps"), {"pct_left": 0.02, "pct_right": 0.03}),
+}
+
+
+def parse_detector(spec: str) -> Tuple[str, Dict]:
+    """
+    "name" or "name:key=value,key=value" -> (name, params). Values are Python
+    literals where they parse as one (0.03, 5, True), plain strings otherwise.
+
+    Raises:
+        ValueError: unknown detector name, a parameter without "=", or a gaps
+                    parameter outside the GapEngine families
+    """
+    name, _, rest = spec.partition(":")
+    if name not in DETECTORS:
+        raise ValueError(f"Unknown detector {name!r} (choose from {', '.join(DETECTORS)})")
+    params = dict(DETECTORS[name][1])
+    for item in filter(None, rest.split(",")):
+        key, eq, raw = item.partition("=")
+        if not eq:
+            raise ValueError(f"Detector parameter {item!r} is not key=value")
+        try:
+            params[key.strip()] = ast.literal_eval(raw.strip())
+        except (ValueError, SyntaxError):
+            params[key.strip()] = raw.strip()
+    if name == "gaps":
+        _gap_config(params)
+    return name, params
+
+
+def read_universe(path: str) -> List[str]:
+    """Symbols from a universe file, in file order, duplicates dropped."""
+    out = []
+    with open(path) as f:
+        for line in f:
+            sym = line.split("#", 1)[0].strip()
+            if sym and sym not in out:
+                out.append(sym)
+    return out
+
+
+# -------------------- workers --------------------
+# Per-process state set once by the pool initializer.
+
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(store_path: str, interval: str, from_ts: Optional[int], detectors: List[Tuple[str, Dict]],
+                 cache_path: Optional[str] = None) -> None:
+    _worker["store"] = CandleStore(store_path)
+    _worker["interval"] = interval
+    _worker["from_ts"] = from_ts
+    _worker["detectors"] = detectors
+    _worker["cache"] = ResultCache(cache_path) if cache_path else None
+
+
+def _scan_one(job: Tuple[str, int]):
+    """(symbol, token) -> (symbol, bars, {detector: result}, results served from cache, error or None)."""
+    symbol, token = job
+    store, interval, from_ts, cache = _worker["store"], _worker["interval"], _worker["from_ts"], _worker["cache"]
+    try:
+        results, keys = {}, {}
+        if cache is not None:
+            # key on the stored series' bar count + last bar (time and prices, so a refreshed
+            # forming candle misses); unchanged series never get read
+            n, last_ts, last_bar = store.span(token, interval, from_ts=from_ts)
+            for name, params in _worker["detectors"]:
+                keys[name] = cache.key(symbol, interval, n, last_ts, name, params, last_bar)
+                value = cache.get(keys[name])
+                if value is not None:
+                    results[name] = value
+            if len(results) == len(keys):
+                return symbol, n, results, len(results), None
+        s = CandleSeries.from_rows(store.read_rows(token, interval, from_ts=from_ts))
+        cached = len(results)
+        for name, params in _worker["detectors"]:
+            if name not in results:
+                results[name] = DETECTORS[name][0](s, **params)
+                if cache is not None:
+                    cache.put(keys[name], results[name])
+        return symbol, len(s), results, cached, None
+    except Exception as e:
+        return symbol, 0, {}, 0, f"{type(e).__name__}: {e}"
+
+
+# -------------------- scan --------------------
+
+def scan(
+    symbols: List[str],
+    detectors: List[Tuple[str, Dict]],
+    interval: str = "day",
+    days_back: int = 300,
+    workers: Optional[int] = None,
+    refresh: bool = True,
+    client=None,
+    exchange: str = "NSE",
+    cache: bool = True,
+) -> Dict[str, object]:
+    """
+    Run `detectors` over every symbol's stored candles (fetch's shared store) in a process pool.
+
+    Args:
+        symbols (List[str]): trading symbols
+        detectors: [(name, params)] as returned by parse_detector
+        interval (str): "day", "60minute", ...
+        days_back (int): bars from the last `days_back` days
+        workers (int): processes (default: os.cpu_count())
+        refresh (bool): top the store up with fetch_many before scanning
+        client: Kite client for the refresh / token lookups (defaults to auth.get_client())
+        exchange (str): Exchange code, e.g. "NSE"
+        cache (bool): serve / store results in the shared ResultCache file (result_cache.py),
+                      so a rescan of unchanged series only reads each series' bar count
+
+    Returns:
+        dict: {"interval", "detectors": {name: params}, "results": {symbol: {"bars", name: result, ...}},
+               "errors": {symbol: message}, "stats": {"symbols", "bars", "cached", "seconds"}}
+    """
+    t0 = time.perf_counter()
+    store_path = fetch.get_store().path
+    from_ts = to_epoch(datetime.now() - timedelta(days=days_back))
+
+    if refresh:
+        fetch.fetch_many(symbols, interval, days_back, as_series=True, client=client, exchange=exchange)
+    tokens = fetch.get_resolver().resolve_many(symbols, exchange, client if refresh else None)
+
+    results: Dict[str, Dict] = {}
+    errors = {s: "unknown symbol" for s in symbols if s not in tokens}
+    jobs = [(s, tokens[s]) for s in symbols if s in tokens]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+    cache_path = get_result_cache().path if cache else None
+    bars = cached = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(store_path, interval, from_ts, detectors, cache_path)) as pool:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        for symbol, n, out, hits, err in pool.map(_scan_one, jobs, chunksize=chunksize):
+            if err is not None:
+                errors[symbol] = err
+            else:
+                results[symbol] = {"bars": n, **out}
+                bars += n
+                cached += hits
+
+    return {
+        "interval": interval,
+        "detectors": dict(detectors),
+        "results": {s: results[s] for s in symbols if s in results},
+        "errors": errors,
+        "stats": {"symbols": len(results), "bars": bars, "cached": cached, "seconds": time.perf_counter() - t0},
+    }
+
+
+def _counts(result) -> Dict[str, int]:
+    """Hits per list inside one detector result (e.g. {"resistances": 4, "supports": 3})."""
+    if isinstance(result, list):
+        return {"": len(result)}
+    out = {}
+    for key, val in result.items():
+        if not isinstance(val, (list, dict)):
+            continue
+        for sub, n in _counts(val).items():
+            out[f"{key}.{sub}" if sub else key] = n
+    return out
+
+
+# -------------------- CLI --------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Run detectors over a universe of symbols.")
+    p.add_argument("universe", help="file with one trading symbol per line")
+    p.add_argument("-d", "--detector", action="append", dest="detectors", metavar="NAME[:k=v,...]",
+                   help=f"detector to run, repeatable ({', '.join(DETECTORS)}); default: all")
+    p.add_argument("-i", "--interval", default="day")
+    p.add_argument("--days", type=int, default=300, help="history window in days")
+    p.add_argument("-j", "--workers", type=int, default=None, help="processes (default: all cores)")
+    p.add_argument("--no-fetch", action="store_true", help="scan the store as it is, no Kite calls")
+    p.add_argument("--fixtures", metavar="DIR", help="serve Kite calls from ReplayKite fixtures in DIR")
+    p.add_argument("--store", metavar="PATH", help="candle store file")
+    p.add_argument("--no-cache", action="store_true", help="recompute every result (skip the result cache)")
+    p.add_argument("--exchange", default="NSE")
+    p.add_argument("--out", metavar="PATH", help="write the full JSON result here (default: stdout)")
+    args = p.parse_args(argv)
+
+    try:
+        detectors = [parse_detector(spec) for spec in (args.detectors or DETECTORS)]
+    except ValueError as e:
+        p.error(str(e))
+
+    client = None
+    if args.fixtures:
+        from replay_kite import ReplayKite
+        client = ReplayKite(args.fixtures)
+    if args.store:
+        os.environ["CANDLE_STORE_PATH"] = args.store   # fetch's shared store / resolver open this file
+
+    out = scan(read_universe(args.universe), detectors, args.interval, args.days, args.workers,
+               refresh=not args.no_fetch, client=client, exchange=args.exchange, cache=not args.no_cache)
+
+    text = json.dumps(out, default=str, indent=1)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    st = out["stats"]
+    print(f"{st['symbols']} symbols, {st['bars']} bars in {st['seconds']:.2f}s "
+          f"({st['cached']} results from cache, {len(out['errors'])} errors)", file=sys.stderr)
+    for symbol, res in out["results"].items():
+        summary = ", ".join(f"{name}.{key}={n}" if key else f"{name}={n}"
+                            for name, _ in detectors for key, n in _counts(res[name]).items())
+        print(f"  {symbol:<12} {res['bars']:>6} bars  {summary}", file=sys.stderr)
+    for symbol, err in out["errors"].items():
+        print(f"  {symbol:<12} ERROR {err}", file=sys.stderr)
+    return 1 if out["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,27 @@
 # PSH base:  OPEN if RED, else CLOSE (GREEN or BASING)
 # PSL base:  OPEN if GREEN, else CLOSE (RED or BASING)
 # Confirmation is bilateral and accepts either a close hit or a wick touch.
+#
+# all_bilateral_swings finds every swing in one vectorized pass: the PSH/PSL
+# bases are computed once as arrays and the left/right scans become range
+# searches over min(close, low) / max(close, high) and high/low (range_index).
+# is_bilateral_swing_* keep the per-index reference scans.
 
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple
 
-GREEN = "green"
-RED = "red"
-BASING = "basing"
+import numpy as np
 
-def classify(c: Dict[str, float]) -> str:
-    range_of_candle = c["high"] - c["low"]
-    body = abs(c["close"] - c["open"])
-    if range_of_candle == 0 or (body / range_of_candle) < 0.5:
-        return BASING
-    return GREEN if c["close"] > c["open"] else RED
+from candle_series import as_series, column_lists
+from range_index import SparseTable, series_table
+from candle_colors import GREEN, RED, GREEN_CODE, RED_CODE, BASING_THRESHOLD, classify_ohlc, candle_colors
 
 Candle = Dict[str, float] 
+Columns = Tuple[Sequence[float], Sequence[float], Sequence[float], Sequence[float]]  # open, high, low, close
+
+def _columns(candles) -> Columns:
+    """OHLC for the per-index scans (cached lists for a series, lazy views for a list)."""
+    return column_lists(candles, "open", "high", "low", "close")
 
 def _fmt_date(val):
     try:
@@ -26,47 +31,49 @@ def _fmt_date(val):
 
 
 
-def _psh_base(c: Candle) -> float:
+def _psh_base(cols: Columns, i: int) -> float:
     """For PSH: base = OPEN if RED, else CLOSE (GREEN or BASING)."""
-    color = classify(c)
-    return c["open"] if color == RED else c["close"]
+    O, H, L, C = cols
+    color = classify_ohlc(O[i], H[i], L[i], C[i])
+    return O[i] if color == RED else C[i]
 
-def _left_confirm_drop_any_hit_psh(candles: List[Candle], i: int, pct: float) -> Optional[int]:
+def _left_confirm_drop_any_hit_psh(cols: Columns, i: int, pct: float) -> Optional[int]:
     """
     LEFT side for PSH @ i:
       target = base * (1 - pct), where base = OPEN if RED else CLOSE.
       Return nearest k < i where (close[k] <= target) OR (low[k] <= target).
     """
-    base = _psh_base(candles[i])
+    _, _, L, C = cols
+    base = _psh_base(cols, i)
     target = base * (1.0 - pct)
     for k in range(i - 1, -1, -1):  # nearest first
-        ck = candles[k]
-        if ck["close"] <= target or ck["low"] <= target:
+        if C[k] <= target or L[k] <= target:
             return k
     return None
 
-def _right_confirm_drop_any_hit_psh(candles: List[Candle], i: int, pct: float) -> Optional[int]:
+def _right_confirm_drop_any_hit_psh(cols: Columns, i: int, pct: float) -> Optional[int]:
     """
     RIGHT side for PSH @ i:
       target = base * (1 - pct)
       If we hit target first, return that index.
     """
-    Hi = candles[i]["high"]
-    base = _psh_base(candles[i])
+    _, H, L, C = cols
+    Hi = H[i]
+    base = _psh_base(cols, i)
     target = base * (1.0 - pct)
-    for k in range(i + 1, len(candles)):
-        ck = candles[k]
-        if ck["high"] > Hi:
+    for k in range(i + 1, len(C)):
+        if H[k] > Hi:
             return None  # invalidated to the right
-        if ck["close"] <= target or ck["low"] <= target:
+        if C[k] <= target or L[k] <= target:
             return k      # confirmed on the right
     return None
 
-def _left_no_higher_high_between(candles: List[Candle], i: int, k: int) -> bool:
+def _left_no_higher_high_between(cols: Columns, i: int, k: int) -> bool:
     """Ensure no bar in [k..i] has high > high[i]."""
-    Hi = candles[i]["high"]
+    H = cols[1]
+    Hi = H[i]
     for t in range(k, i + 1):
-        if candles[t]["high"] > Hi:
+        if H[t] > Hi:
             return False
     return True
 
@@ -76,70 +83,75 @@ def is_bilateral_swing_high(candles: List[Candle], i: int, pct: float = 0.07) ->
       LEFT:  exists nearest k<i with (close<=target OR low<=target) AND no high>Hi in [k..i]
       RIGHT: before any higher-high, exists k>i with (close<=target OR low<=target)
     """
+    return _swing_high_at(candles, _columns(candles), i, pct)
+
+def _swing_high_at(candles, cols: Columns, i: int, pct: float) -> Optional[Dict]:
     # Left side
-    k_left = _left_confirm_drop_any_hit_psh(candles, i, pct)
+    k_left = _left_confirm_drop_any_hit_psh(cols, i, pct)
     if k_left is None:
         return None
-    if not _left_no_higher_high_between(candles, i, k_left):
+    if not _left_no_higher_high_between(cols, i, k_left):
         return None
 
     # Right side
-    k_right = _right_confirm_drop_any_hit_psh(candles, i, pct)
+    k_right = _right_confirm_drop_any_hit_psh(cols, i, pct)
     if k_right is None:
         return None
 
     return {
         "index": i,
         "date": candles[i].get("date"),
-        "high": candles[i]["high"],
-        "close": candles[i]["close"],
+        "high": cols[1][i],
+        "close": cols[3][i],
         "left_confirm_idx": k_left,
         "right_confirm_idx": k_right,
     }
 
 
-def _psl_base(c: Candle) -> float:
+def _psl_base(cols: Columns, i: int) -> float:
     """For PSL: base = OPEN if GREEN, else CLOSE (RED or BASING)."""
-    color = classify(c)
-    return c["open"] if color == GREEN else c["close"]
+    O, H, L, C = cols
+    color = classify_ohlc(O[i], H[i], L[i], C[i])
+    return O[i] if color == GREEN else C[i]
 
-def _left_confirm_rise_any_hit_psl(candles: List[Candle], i: int, pct: float) -> Optional[int]:
+def _left_confirm_rise_any_hit_psl(cols: Columns, i: int, pct: float) -> Optional[int]:
     """
     LEFT side for PSL @ i:
       target = base * (1 + pct), where base = OPEN if GREEN else CLOSE.
       Return nearest k < i where (close[k] >= target) OR (high[k] >= target).
     """
-    base = _psl_base(candles[i])
+    _, H, _, C = cols
+    base = _psl_base(cols, i)
     target = base * (1.0 + pct)
     for k in range(i - 1, -1, -1):
-        ck = candles[k]
-        if ck["close"] >= target or ck["high"] >= target:
+        if C[k] >= target or H[k] >= target:
             return k
     return None
 
-def _right_confirm_rise_any_hit_psl(candles: List[Candle], i: int, pct: float) -> Optional[int]:
+def _right_confirm_rise_any_hit_psl(cols: Columns, i: int, pct: float) -> Optional[int]:
     """
     RIGHT side for PSL @ i:
       target = base * (1 + pct)
       Scan forward; if any low < low[i] BEFORE we hit (close>=target or high>=target), invalidate (None).
       If we hit target first, return that index.
     """
-    Li = candles[i]["low"]
-    base = _psl_base(candles[i])
+    _, H, L, C = cols
+    Li = L[i]
+    base = _psl_base(cols, i)
     target = base * (1.0 + pct)
-    for k in range(i + 1, len(candles)):
-        ck = candles[k]
-        if ck["low"] < Li:
+    for k in range(i + 1, len(C)):
+        if L[k] < Li:
             return None  # invalidated to the right
-        if ck["close"] >= target or ck["high"] >= target:
+        if C[k] >= target or H[k] >= target:
             return k      # confirmed on the right
     return None
 
-def _left_no_lower_low_between(candles: List[Candle], i: int, k: int) -> bool:
+def _left_no_lower_low_between(cols: Columns, i: int, k: int) -> bool:
     """Ensure no bar in [k..i] has low < low[i]."""
-    Li = candles[i]["low"]
+    L = cols[2]
+    Li = L[i]
     for t in range(k, i + 1):
-        if candles[t]["low"] < Li:
+        if L[t] < Li:
             return False
     return True
 
@@ -149,43 +161,120 @@ def is_bilateral_swing_low(candles: List[Candle], i: int, pct: float = 0.07) ->
       LEFT:  exists nearest k<i with (close>=target OR high>=target) AND no low<Li in [k..i]
       RIGHT: before any lower-low, exists k>i with (close>=target OR high>=target)
     """
+    return _swing_low_at(candles, _columns(candles), i, pct)
+
+def _swing_low_at(candles, cols: Columns, i: int, pct: float) -> Optional[Dict]:
     # Left side
-    k_left = _left_confirm_rise_any_hit_psl(candles, i, pct)
+    k_left = _left_confirm_rise_any_hit_psl(cols, i, pct)
     if k_left is None:
         return None
-    if not _left_no_lower_low_between(candles, i, k_left):
+    if not _left_no_lower_low_between(cols, i, k_left):
         return None
 
     # Right side
-    k_right = _right_confirm_rise_any_hit_psl(candles, i, pct)
+    k_right = _right_confirm_rise_any_hit_psl(cols, i, pct)
     if k_right is None:
         return None
 
     return {
         "index": i,
         "date": candles[i].get("date"),
-        "low": candles[i]["low"],
-        "close": candles[i]["close"],
+        "low": cols[2][i],
+        "close": cols[3][i],
         "left_confirm_idx": k_left,
         "right_confirm_idx": k_right,
     }
 
 
-def latest_bilateral_swings(candles: List[Candle], pct: float = 0.07) -> Dict[str, Optional[Dict]]:
-    
-    n = len(candles)
-    sh = None
-    for i in range(n - 2, 0, -1):  # avoid endpoints
-        got = is_bilateral_swing_high(candles, i, pct)
-        if got:
-            sh = got
-            break
+def _base_arrays(s, basing_threshold: float = BASING_THRESHOLD) -> Tuple[np.ndarray, np.ndarray]:
+    """PSH and PSL base for every candle (same rule as _psh_base / _psl_base)."""
+    colors = candle_colors(s, basing_threshold)
+    return np.where(colors == RED_CODE, s.open, s.close), np.where(colors == GREEN_CODE, s.open, s.close)
+
+
+def all_bilateral_swings(
+    candles: List[Candle], pct: float = 0.07, basing_threshold: float = BASING_THRESHOLD
+) -> Dict[str, List[Dict]]:
+    """
+    Every bilateral swing high / low in the series (same rules as
+    is_bilateral_swing_high / is_bilateral_swing_low), oldest first.
+    Candle colors (for the PSH/PSL bases) come from candle_colors(basing_threshold).
+
+    Returns:
+        {"swing_highs": [...], "swing_lows": [...]}
+    """
+    s = as_series(candles)
+    n = len(s)
+    if n < 3:
+        return {"swing_highs": [], "swing_lows": []}
+
+    psh_base, psl_base = _base_arrays(s, basing_threshold)
+    # NaN never compares true in the scalar rules: masked tables never hit, and a
+    # NaN level (+/-inf below) is never exceeded; a NaN target confirms nothing
+    high_max = series_table(s, "high")
+    low_min = series_table(s, "low")
+    i = np.arange(1, n - 1)
+
+    # ---- swing highs: "close<=target OR low<=target" == min(close, low) <= target
+    drop = np.fmin(s.close, s.low)
+    drop = SparseTable(np.where(np.isnan(drop), np.inf, drop), "min")
+    Hi = s.high[i]
+    level = np.where(np.isnan(Hi), np.inf, Hi)
+    target = psh_base[i] * (1.0 - pct)
+    k_left = drop.last_index(0, i - 1, target)
+    ok = (k_left >= 0) & (k_left > high_max.last_index(0, i - 1, level, strict=True)) & ~np.isnan(target)
+    k_right = drop.first_index(i + 1, n - 1, target)
+    breaker = high_max.first_index(i + 1, n - 1, level, strict=True)
+    ok &= (k_right >= 0) & ((breaker < 0) | (k_right < breaker))
+    highs = [
+        {
+            "index": int(i[t]),
+            "date": candles[int(i[t])].get("date"),
+            "high": float(Hi[t]),
+            "close": float(s.close[i[t]]),
+            "left_confirm_idx": int(k_left[t]),
+            "right_confirm_idx": int(k_right[t]),
+        }
+        for t in np.flatnonzero(ok)
+    ]
+
+    # ---- swing lows: "close>=target OR high>=target" == max(close, high) >= target
+    rise = np.fmax(s.close, s.high)
+    rise = SparseTable(np.where(np.isnan(rise), -np.inf, rise), "max")
+    Li = s.low[i]
+    level = np.where(np.isnan(Li), -np.inf, Li)
+    target = psl_base[i] * (1.0 + pct)
+    k_left = rise.last_index(0, i - 1, target)
+    ok = (k_left >= 0) & (k_left > low_min.last_index(0, i - 1, level, strict=True)) & ~np.isnan(target)
+    k_right = rise.first_index(i + 1, n - 1, target)
+    breaker = low_min.first_index(i + 1, n - 1, level, strict=True)
+    ok &= (k_right >= 0) & ((breaker < 0) | (k_right < breaker))
+    lows = [
+        {
+            "index": int(i[t]),
+            "date": candles[int(i[t])].get("date"),
+            "low": float(Li[t]),
+            "close": float(s.close[i[t]]),
+            "left_confirm_idx": int(k_left[t]),
+            "right_confirm_idx": int(k_right[t]),
+        }
+        for t in np.flatnonzero(ok)
+    ]
 
-    sl = None
-    for i in range(n - 2, 0, -1):
-        got = is_bilateral_swing_low(candles, i, pct)
-        if got:
-            sl = got
-            break
+    return {"swing_highs": highs, "swing_lows": lows}
 
+
+def latest_bilateral_swings(
+    candles: List[Candle],
+    pct: float = 0.07,
+    swings: Optional[Dict[str, List[Dict]]] = None,
+) -> Dict[str, Optional[Dict]]:
+    """
+    Most recent swing high / low. Pass `swings` (an all_bilateral_swings result
+    for the same candles and pct) to make this a plain O(1) lookup.
+    """
+    if swings is None:
+        swings = all_bilateral_swings(candles, pct)
+    sh = swings["swing_highs"][-1] if swings["swing_highs"] else None
+    sl = swings["swing_lows"][-1] if swings["swing_lows"] else None
     return {"swing_high": sh, "swing_low": sl}
@@ -0,0 +1,113 @@
+# test_analysis_graph.py
+# AnalysisGraph returns exactly what the hand-wired tester pipelines compute,
+# runs every upstream node once for all momentum outputs, and only recomputes
+# what a changed param feeds. Run as a script for a graph-vs-recompute benchmark.
+
+import random
+import time
+
+from analysis_graph import (
+    AnalysisGraph, MOMENTUM, NODES, analyze, series_graph,
+    normalize_rbr_zones, normalize_dbd_zones, normalize_dbr_zones, normalize_rbd_zones,
+)
+from candle_series import as_series
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from demandZone import find_demand_zones
+from supplyZone import find_supply_zones
+from gaps_simple import detect_simple_gaps
+from momentum_zones import detect_momentum_zones
+from momentum_continuation_zones import detect_momentum_continuation_zones
+from momentum_gaps import detect_momentum_gaps
+from test_resistance_support_fuzz import random_candles
+
+def by_hand(candles, pct_left, pct_right, lookback):
+    """The three tester scripts' pipelines, each recomputing S/R and zones."""
+    out = {}
+    rs = all_bilateral_resistance_support(candles, pct_left=pct_left, pct_right=pct_right)
+    rbr = normalize_rbr_zones(find_demand_zones(candles, lookback=lookback))
+    dbd = normalize_dbd_zones(find_supply_zones(candles, lookback=lookback))
+    out["momentum_zones"] = detect_momentum_zones(candles, rs["resistances"], rs["supports"], rbr, dbd)
+    rs = all_bilateral_resistance_support(candles, pct_left=pct_left, pct_right=pct_right)
+    dbr = normalize_dbr_zones(find_demand_zones(candles, lookback=lookback))
+    rbd = normalize_rbd_zones(find_supply_zones(candles, lookback=lookback))
+    out["continuation_zones"] = detect_momentum_continuation_zones(candles, rs["resistances"], rs["supports"], dbr, rbd)
+    rs = all_bilateral_resistance_support(candles, pct_left=pct_left, pct_right=pct_right)
+    out["momentum_gaps"] = detect_momentum_gaps(candles, detect_simple_gaps(candles), rs["resistances"], rs["supports"])
+    return out
+
+def _graph(series):
+    """Graph whose loader serves {symbol: series}."""
+    return AnalysisGraph(loader=lambda symbol, interval: series[symbol])
+
+def test_graph_matches_tester_pipelines(trials: int = 40, seed: int = 21):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        s = as_series(random_candles(rnd.randint(0, 250), rnd, tick=rnd.choice([0.0, 0.5])))
+        params = {"pct_left": rnd.choice([0.005, 0.01, 0.02]), "pct_right": rnd.choice([0.005, 0.015, 0.03]),
+                  "lookback": rnd.choice([None, 50, 400])}
+        got = _graph({"X": s}).run("X", "day", params=params)
+        want = by_hand(s, params["pct_left"], params["pct_right"], len(s) if params["lookback"] is None else params["lookback"])
+        assert got == want, f"trial {t}"
+
+def test_each_upstream_node_runs_once():
+    s = as_series(random_candles(300, random.Random(2), vol=0.01))
+    g = _graph({"A": s, "B": s})
+    g.run("A", "day")
+    assert g.computed == {node: 1 for node in ("candles", "levels", "simple_gaps", "zones", "rbr_zones",
+                                                "dbd_zones", "dbr_zones", "rbd_zones", *MOMENTUM)}
+    assert g.run("A", "day") == g.run("A", "day")
+    assert g.computed["levels"] == 1
+    # a new pct only re-runs levels and what reads them; another symbol or interval is its own series
+    g.run("A", "day", params={"pct_left": 0.01})
+    assert g.computed["levels"] == 2 and g.computed["zones"] == 1 and g.computed["momentum_zones"] == 2
+    g.run("B", "day")
+    g.run("A", "60minute")
+    assert g.computed["candles"] == 3 and g.computed["zones"] == 3
+
+def test_set_candles_drops_stale_nodes():
+    rnd = random.Random(4)
+    a, b = as_series(random_candles(120, rnd)), as_series(random_candles(150, rnd))
+    g = AnalysisGraph(loader=lambda symbol, interval: None)
+    g.set_candles("X", "day", a)
+    first = g.get("X", "day", "momentum_gaps")
+    g.set_candles("X", "day", b)
+    assert g.get("X", "day", "candles") is b
+    assert g.get("X", "day", "momentum_gaps") == analyze(b, "momentum_gaps")
+    assert first == analyze(a, "momentum_gaps")
+    for bad in (lambda: g.get("X", "day", "nope"), lambda: g.get("X", "day", "levels", {"pct": 0.1})):
+        try:
+            bad()
+        except ValueError:
+            continue
+        raise AssertionError("accepted")
+
+def test_series_graph_is_cached():
+    s = as_series(random_candles(80, random.Random(5)))
+    assert series_graph(s) is series_graph(s)
+    assert analyze(s, "levels") is analyze(s, "levels")
+    assert set(NODES) >= set(MOMENTUM)
+
+if __name__ == "__main__":
+    test_graph_matches_tester_pipelines()
+    test_each_upstream_node_runs_once()
+    test_set_candles_drops_stale_nodes()
+    test_series_graph_is_cached()
+    print("analysis graph == tester pipelines, upstream nodes run once")
+
+    rnd = random.Random(7)
+    universe = {f"SYM{k}": as_series(random_candles(2000, rnd, vol=0.006)) for k in range(20)}
+    grid = [{"pct_left": l, "pct_right": r} for l in (0.005, 0.01) for r in (0.01, 0.015)]
+
+    t0 = time.perf_counter()
+    for s in universe.values():
+        for p in grid:
+            by_hand(s, p["pct_left"], p["pct_right"], len(s))
+    t1 = time.perf_counter()
+    g = _graph(universe)
+    for sym in universe:
+        for p in grid:
+            g.run(sym, "60minute", params=p)
+    t2 = time.perf_counter()
+    print(f"{len(universe)} symbols x 2000 bars x {len(grid)} S/R settings, all momentum outputs: "
+          f"per-tester recompute {t1 - t0:.2f}s  AnalysisGraph {t2 - t1:.2f}s "
+          f"(zones swept {g.computed['zones']}x, levels {g.computed['levels']}x)")
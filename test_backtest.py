@@ -0,0 +1,148 @@
+# test_backtest.py
+# simulate() / backtest() equal a bar-by-bar reference simulation (entries,
+# gap fills, stop-before-target on a shared bar, max_wait / max_hold), and
+# detector output (momentum / continuation zones, pro gaps, basing zones) backtests as-is.
+# Run as a script for a years-of-hourly-bars benchmark.
+
+import math
+import random
+import time
+
+from candle_series import as_series
+from analysis_graph import analyze
+from backtest import simulate, backtest, backtest_zones, summarize, formed_index
+from pro_gaps import detect_pro_gaps
+from zone_scanner import find_zones
+from test_resistance_support_fuzz import random_candles
+
+R = (1.0, 2.0, 3.5)
+
+def reference(s, formed, lo, hi, side, r, max_wait=None, max_hold=None):
+    """One zone, one R multiple, bar by bar: (status, entry_index, outcome, exit_index, r)."""
+    n = len(s)
+    O, H, L, C = s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()
+    long = side == "long"
+    entry, stop = (hi, lo) if long else (lo, hi)
+    risk = abs(entry - stop)
+    if risk <= 0:
+        return ("flat", -1, "", -1, None)
+    wait_end = n - 1 if max_wait is None else min(formed + max_wait, n - 1)
+    for k in range(formed + 1, wait_end + 1):
+        if (L[k] <= entry) if long else (H[k] >= entry):
+            break
+    else:
+        return ("untouched", -1, "", -1, None)
+    fill = min(entry, O[k]) if long else max(entry, O[k])
+    if (fill <= stop) if long else (fill >= stop):
+        return ("gapped", k, "", -1, None)
+    target = entry + r * risk if long else entry - r * risk
+    end = n - 1 if max_hold is None else min(k + max_hold, n - 1)
+    for j in range(k, end + 1):
+        if (L[j] <= stop) if long else (H[j] >= stop):
+            px = stop if j == k else (min(stop, O[j]) if long else max(stop, O[j]))
+            return ("filled", k, "stop", j, (px - fill) / risk * (1 if long else -1))
+        if j > k and ((H[j] >= target) if long else (L[j] <= target)):
+            px = max(target, O[j]) if long else min(target, O[j])
+            return ("filled", k, "target", j, (px - fill) / risk * (1 if long else -1))
+    return ("filled", k, "time" if end < n - 1 else "open", end, (C[end] - fill) / risk * (1 if long else -1))
+
+def random_setups(s, rnd, m):
+    formed, lo, hi = [], [], []
+    for _ in range(m):
+        i = rnd.randrange(len(s))
+        mid = s.close[i] * (1 + rnd.uniform(-0.03, 0.03))
+        width = 0.0 if rnd.random() < 0.03 else mid * rnd.uniform(0.001, 0.02)
+        formed.append(i); lo.append(round(mid - width / 2, 2)); hi.append(round(mid + width / 2, 2))
+    return formed, lo, hi
+
+def check(s, formed, lo, hi, side, max_wait=None, max_hold=None):
+    sim = simulate(s, formed, lo, hi, side, R, max_wait, max_hold)
+    for i in range(len(formed)):
+        for r in R:
+            status, k, outcome, j, got_r = reference(s, formed[i], lo[i], hi[i], side, r, max_wait, max_hold)
+            assert sim["status"][i] == status, (i, side)
+            assert sim["entry_index"][i] == (k if status in ("filled", "gapped") else -1), (i, side)
+            if status == "filled":
+                assert sim[("outcome", r)][i] == outcome and sim[("exit_index", r)][i] == j, (i, r, side)
+                assert math.isclose(sim[("r", r)][i], got_r, rel_tol=1e-9, abs_tol=1e-9), (i, r, side)
+            else:
+                assert math.isnan(sim[("r", r)][i]) and sim[("outcome", r)][i] == ""
+
+def test_matches_reference():
+    rnd = random.Random(11)
+    for trial in range(6):
+        s = as_series(random_candles(rnd.randint(2, 400), rnd, vol=0.02))
+        formed, lo, hi = random_setups(s, rnd, 150)
+        for side in ("long", "short"):
+            check(s, formed, lo, hi, side)
+            check(s, formed, lo, hi, side, max_wait=rnd.randint(1, 20), max_hold=rnd.randint(1, 30))
+
+def test_gap_fills():
+    # long zone 100-101: bar 1 opens at 100.5 (fill at the open), bar 2 gaps below the stop (stop at the open)
+    c = [dict(open=103, high=104, low=102, close=103), dict(open=100.5, high=101, low=100.2, close=100.8),
+         dict(open=98, high=99, low=97, close=98.5)]
+    sim = simulate(c, [0], [100.0], [101.0], "long", (1.0,))
+    assert sim["fill"][0] == 100.5 and sim[("outcome", 1.0)][0] == "stop"
+    assert math.isclose(sim[("r", 1.0)][0], (98 - 100.5) / 1.0)
+    # opening beyond the stop never fills
+    sim = simulate(c[:1] + c[2:], [0], [100.0], [101.0], "long", (1.0,))
+    assert sim["status"][0] == "gapped"
+
+def test_nan_opens_fill_at_the_order_price():
+    # a bar with a NaN open fills / stops / takes profit at the order price itself
+    rnd = random.Random(12)
+    for trial in range(4):
+        candles = random_candles(rnd.randint(2, 300), rnd, vol=0.02)
+        for c in rnd.sample(candles, len(candles) // 5):
+            c["open"] = float("nan")
+        s = as_series(candles)
+        formed, lo, hi = random_setups(s, rnd, 100)
+        for side in ("long", "short"):
+            check(s, formed, lo, hi, side)
+    c = [dict(open=103, high=104, low=102, close=103), dict(open=float("nan"), high=101, low=100.2, close=100.8),
+         dict(open=float("nan"), high=103.5, low=100.5, close=103)]
+    trades = backtest_zones(c, [{"zone_low": 100.0, "zone_high": 101.0, "index": 0}], "long", (1.0,))
+    assert trades[0]["fill"] == 101.0 and trades[0]["exits"][1.0]["outcome"] == "target"
+    assert summarize(trades, (1.0,))[1.0]["expectancy"] == 1.0
+
+def test_detector_output():
+    s = as_series(random_candles(1500, random.Random(8), vol=0.015))
+    results = {"momentum": analyze(s, "momentum_zones"), "continuation": analyze(s, "continuation_zones"),
+               "pro": detect_pro_gaps(s, min_pct=0.01), "basing": find_zones(s, lookback=len(s))}
+    bt = backtest(s, results, r_multiples=R)
+    kinds = set(bt["trades"])
+    assert {"momentum.momentum_demand", "continuation.continuation_demand", "pro.pro_gap_ups",
+            "basing.demand", "basing.supply"} <= kinds, kinds
+    for kind, trades in bt["trades"].items():
+        zones = [t["zone"] for t in trades]
+        assert trades == backtest_zones(s, zones, trades[0]["side"], R)
+        assert bt["summary"][kind] == summarize(trades, R)
+        for t in trades:
+            status, k, outcome, j, r = reference(s, formed_index(s, t["zone"]), min(t["entry"], t["stop"]),
+                                                 max(t["entry"], t["stop"]), t["side"], 2.0)
+            assert t["status"] == status
+            if status == "filled":
+                assert t["exits"][2.0]["outcome"] == outcome and t["exits"][2.0]["exit_index"] == j
+    summary = bt["summary"]["pro.pro_gap_ups"][1.0]
+    assert summary["trades"] == summary["wins"] + summary["losses"] + summary["open"] > 0
+
+if __name__ == "__main__":
+    test_matches_reference()
+    test_gap_fills()
+    test_nan_opens_fill_at_the_order_price()
+    test_detector_output()
+    print("backtest == bar-by-bar reference, detector output backtests as-is")
+
+    rnd = random.Random(2)
+    s = as_series(random_candles(5 * 250 * 7, rnd, vol=0.006))   # ~5 years of hourly bars
+    formed, lo, hi = random_setups(s, rnd, 5000)
+    t0 = time.perf_counter()
+    for side in ("long", "short"):
+        simulate(s, formed, lo, hi, side, (1.0, 1.5, 2.0, 3.0))
+    dt = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    bt = backtest(s, {"basing": find_zones(s, lookback=len(s)), "pro": detect_pro_gaps(s, min_pct=0.01)})
+    dt2 = time.perf_counter() - t0
+    n = sum(len(t) for t in bt["trades"].values())
+    print(f"{len(s):,} bars: 2 x {len(formed):,} zones x 4 R multiples in {dt * 1000:.0f} ms; "
+          f"detect + backtest of {n:,} detected zones in {dt2 * 1000:.0f} ms")
@@ -0,0 +1,58 @@
+# test_candle_colors.py
+# candle_colors (vectorized, cached per series) must agree with the scalar
+# classify_ohlc for every candle and threshold, and a series is classified once.
+
+import random
+import time
+
+from candle_colors import candle_colors, classify, classify_ohlc, GREEN, RED, BASING, COLOR_NAMES
+from candle_series import as_series
+from test_resistance_support_fuzz import random_candles
+
+def test_vectorized_matches_scalar(trials: int = 200, seed: int = 4):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        candles = random_candles(rnd.randint(0, 120), rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        for c in candles[::7]:
+            c["high"] = c["low"] = c["open"] = c["close"]   # zero-range candles are BASING
+        threshold = rnd.choice([0.3, 0.5, 0.7])
+        got = [COLOR_NAMES[k] for k in candle_colors(candles, threshold).tolist()]
+        exp = [classify(c, threshold) for c in candles]
+        assert got == exp, f"mismatch on trial {t} (threshold={threshold})"
+
+def test_codes_and_threshold():
+    c = {"open": 100.0, "high": 110.0, "low": 100.0, "close": 106.0}   # body/range = 0.6
+    assert classify(c) == GREEN and classify(c, 0.7) == BASING
+    assert classify_ohlc(106.0, 110.0, 100.0, 100.0) == RED
+    assert classify_ohlc(100.0, 100.0, 100.0, 100.0) == BASING
+    # the public names are unchanged; arrays carry the int8 codes
+    assert (GREEN, RED, BASING) == ("green", "red", "basing")
+
+def test_old_import_paths():
+    # demandZone / supplyZone / pro_gaps used to define the names themselves
+    import demandZone, supplyZone, pro_gaps
+    for mod in (demandZone, supplyZone, pro_gaps):
+        assert (mod.GREEN, mod.RED, mod.BASING, mod.classify) == (GREEN, RED, BASING, classify)
+
+def test_series_is_classified_once():
+    s = as_series(random_candles(300, random.Random(1)))
+    a = candle_colors(s)
+    assert candle_colors(s) is a and not a.flags.writeable
+    assert candle_colors(s, 0.6) is not a
+
+if __name__ == "__main__":
+    test_vectorized_matches_scalar()
+    test_codes_and_threshold()
+    test_old_import_paths()
+    test_series_is_classified_once()
+    print("candle_colors == classify_ohlc on 200 random series")
+
+    candles = random_candles(100000, random.Random(2))
+    s = as_series(candles)
+    t0 = time.perf_counter()
+    [classify(c) for c in candles]
+    t1 = time.perf_counter()
+    candle_colors(s)
+    t2 = time.perf_counter()
+    print(f"100000 candles: per-candle classify {t1 - t0:.3f}s  vectorized {t2 - t1:.4f}s  "
+          f"({candle_colors(s).nbytes} bytes)")
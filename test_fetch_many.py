@@ -0,0 +1,218 @@
+# test_fetch_many.py
+# fetch_many against a local fake Kite client: every symbol arrives, the
+# request rate never exceeds the limiter, and 429s are retried.
+
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import fetch
+from candle_store import IST, CandleStore, to_epoch
+from instruments import InstrumentResolver
+
+class FakeRateLimit(Exception):
+    """Shaped like kiteconnect's NetworkException for HTTP 429."""
+    def __init__(self):
+        super().__init__("Too many requests")
+        self.code = 429
+
+class FakeKite:
+    """
+    instruments + ltp + historical_data with fixed latency and a 429 on every
+    `fail_every`-th history call. dump_symbols=None makes instruments() fail.
+    """
+
+    def __init__(self, latency: float = 0.05, fail_every: int = 7, dump_symbols=None):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.dump_symbols = dump_symbols
+        self.calls = []
+        self.ranges = []   # (from_date, to_date) of every history call
+        self._lock = threading.Lock()
+
+    def _hit(self, kind):
+        with self._lock:
+            self.calls.append((kind, time.monotonic()))
+            return len(self.calls)
+
+    @staticmethod
+    def token_of(symbol):
+        return sum(ord(ch) * 31 ** i for i, ch in enumerate(symbol)) % 10**6
+
+    def instruments(self, exchange=None):
+        self._hit("instruments")
+        if self.dump_symbols is None:
+            raise RuntimeError("instruments dump unavailable")
+        return [{"tradingsymbol": s, "instrument_token": self.token_of(s), "exchange": exchange}
+                for s in self.dump_symbols]
+
+    def ltp(self, *instruments):
+        self._hit("ltp")
+        time.sleep(self.latency)
+        keys = instruments[0] if instruments and isinstance(instruments[0], list) else instruments
+        return {k: {"instrument_token": self.token_of(k.split(":", 1)[1]), "last_price": 100.0} for k in keys}
+
+    def historical_data(self, instrument_token, from_date, to_date, interval, continuous=False, oi=False):
+        n = self._hit("historical")
+        with self._lock:
+            self.ranges.append((datetime.fromisoformat(from_date), datetime.fromisoformat(to_date)))
+        time.sleep(self.latency)
+        if self.fail_every and n % self.fail_every == 0:
+            raise FakeRateLimit()
+        start = datetime.fromisoformat(from_date).replace(hour=0, minute=0, second=0)
+        end = datetime.fromisoformat(to_date)
+        out, d, p = [], start, 100.0 + instrument_token % 50
+        while d <= end:
+            out.append({"date": d.replace(tzinfo=IST), "open": p, "high": p + 1, "low": p - 1, "close": p + 0.5})
+            d += timedelta(days=1)
+            p += 0.5
+        return out
+
+def _max_in_window(stamps, window=1.0):
+    stamps = sorted(stamps)
+    best, lo = 0, 0
+    for hi in range(len(stamps)):
+        while stamps[hi] - stamps[lo] >= window:
+            lo += 1
+        best = max(best, hi - lo + 1)
+    return best
+
+@contextmanager
+def fresh_fetch(historical=None, quote=None):
+    """
+    fetch's shared store / resolver (in a temp dir), rate limiters and LTP cache
+    swapped for fresh ones; everything is put back on exit.
+    """
+    old = fetch._store, fetch._resolver, fetch.historical_limiter, fetch.quote_limiter
+    old_ltp = dict(fetch._ltp_cache)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "candles.sqlite3")
+        fetch._store, fetch._resolver = CandleStore(path), InstrumentResolver(path)
+        fetch.configure_rate_limits(historical=historical, quote=quote)
+        fetch._ltp_cache.clear()
+        try:
+            yield
+        finally:
+            fetch._store.close()
+            fetch._resolver.close()
+            fetch._store, fetch._resolver, fetch.historical_limiter, fetch.quote_limiter = old
+            fetch._ltp_cache.clear()
+            fetch._ltp_cache.update(old_ltp)
+
+def run_fetch_many(n_symbols: int, rate: float, fake=None):
+    """fetch_many over a temp store; returns (wall seconds, fake client)."""
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    fake = fake or FakeKite(dump_symbols=symbols)
+    with fresh_fetch(historical=rate, quote=rate):
+        t0 = time.perf_counter()
+        out = fetch.fetch_many(symbols, "day", 30, max_workers=16, client=fake)
+        wall = time.perf_counter() - t0
+    assert all(out[s] for s in symbols), "some symbols came back empty"
+    return wall, fake
+
+def _stamps(fake, kind):
+    return [t for k, t in fake.calls if k == kind]
+
+def test_fetch_many_respects_rate_limit(n_symbols: int = 40, rate: float = 20.0):
+    _, fake = run_fetch_many(n_symbols, rate)
+    hist = _stamps(fake, "historical")
+    assert len(hist) > n_symbols, "429s should have been retried"
+    assert _max_in_window(hist) <= rate * 2, "historical rate exceeded bucket capacity + refill"
+
+def test_tokens_come_from_dump(n_symbols: int = 20):
+    _, fake = run_fetch_many(n_symbols, rate=50.0)
+    assert len(_stamps(fake, "instruments")) == 1
+    assert not _stamps(fake, "ltp"), "no per-symbol LTP round trips when the dump is available"
+
+def test_tokens_fall_back_to_one_batched_ltp(n_symbols: int = 20):
+    fake = FakeKite(dump_symbols=None, fail_every=0)
+    _, fake = run_fetch_many(n_symbols, rate=50.0, fake=fake)
+    assert len(_stamps(fake, "ltp")) == 1
+
+def test_failed_token_batch_fails_only_its_symbols(n_symbols: int = 8):
+    # no dump and an LTP endpoint that rejects any request naming SYM3: the batched
+    # lookup fails, every other symbol still resolves on its own
+    fake = FakeKite(latency=0.0, dump_symbols=None, fail_every=0)
+    real_ltp = fake.ltp
+    def ltp(*instruments):
+        keys = instruments[0] if instruments and isinstance(instruments[0], list) else instruments
+        if "NSE:SYM3" in keys:
+            raise ValueError("invalid instrument")
+        return real_ltp(*instruments)
+    fake.ltp = ltp
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    with fresh_fetch(historical=1000.0, quote=1000.0):
+        out = fetch.fetch_many(symbols, "day", 30, max_workers=4, client=fake)
+    assert out["SYM3"] is None
+    assert all(out[s] for s in symbols if s != "SYM3")
+
+def test_ltp_many_batches_and_shares_snapshot(n_symbols: int = 2500):
+    fake = FakeKite(latency=0.0)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    with fresh_fetch(quote=50.0):
+        prices = fetch.fetch_ltp_many(symbols, ttl=60, client=fake)
+        assert len(prices) == n_symbols and all(p == 100.0 for p in prices.values())
+        assert len(_stamps(fake, "ltp")) == -(-n_symbols // 1000)
+        # a second consumer within the TTL reuses the snapshot
+        assert fetch.fetch_ltp("SYM7", ttl=60, client=fake) == 100.0
+        assert len(_stamps(fake, "ltp")) == -(-n_symbols // 1000)
+
+def test_long_intraday_range_is_chunked(days_back: int = 5 * 365):
+    fake = FakeKite(latency=0.01, fail_every=5, dump_symbols=["LONG"])
+    with fresh_fetch(historical=50.0, quote=50.0):
+        bars = fetch.fetch_ohlc_data("LONG", "60minute", days_back, client=fake)
+        n_chunks = -(-days_back // fetch.MAX_DAYS_PER_CALL["60minute"])
+        assert len(fake.ranges) >= n_chunks
+        assert all(b - a <= timedelta(days=400) for a, b in fake.ranges)
+        stamps = [b["date"] for b in bars]
+        assert stamps == sorted(set(stamps)), "chunks must be stitched without duplicates"
+        assert len(bars) >= days_back
+
+        # a second run only tops up the tail
+        fake.ranges.clear()
+        fake.fail_every = 0
+        again = fetch.fetch_ohlc_data("LONG", "60minute", days_back, client=fake)
+        assert len(fake.ranges) == 1 and [b["date"] for b in again] == stamps
+
+def test_failed_tail_chunk_leaves_no_hole():
+    fake = FakeKite(latency=0.0, fail_every=0, dump_symbols=["HOLE"])
+    token = FakeKite.token_of("HOLE")
+    now = datetime.now()
+    last = (now - timedelta(days=1000)).replace(hour=0, minute=0, second=0, microsecond=0)
+    with fresh_fetch(historical=1000.0, quote=1000.0):
+        fetch._store.write(token, "60minute", [{"date": last.replace(tzinfo=IST), "open": 1, "high": 1, "low": 1, "close": 1}],
+                           covered_from=to_epoch(now - timedelta(days=1300)))
+        # the tail spans three 400-day chunks; the middle one fails for good
+        chunks = fetch._chunks(last, now, "60minute")
+        assert len(chunks) == 3
+        bad_from = chunks[1][0]
+        real = fake.historical_data
+        def historical_data(instrument_token, from_date, to_date, interval, **kw):
+            if datetime.fromisoformat(from_date) == bad_from.replace(microsecond=0):
+                time.sleep(0.2)   # the later chunk lands first
+                raise RuntimeError("chunk lost")
+            return real(instrument_token, from_date, to_date, interval, **kw)
+        fake.historical_data = historical_data
+        try:
+            fetch.fetch_ohlc_data("HOLE", "60minute", 1200, client=fake)
+            assert False, "the failed chunk should surface"
+        except RuntimeError:
+            pass
+        assert fetch._store.last_timestamp(token, "60minute") <= to_epoch(bad_from)
+
+        # the next top-up starts before the lost range and fills it
+        fake.historical_data = real
+        bars = fetch.fetch_ohlc_data("HOLE", "60minute", 1200, client=fake)
+        days = [b["date"] for b in bars]
+        assert all(b - a == timedelta(days=1) for a, b in zip(days, days[1:])), "hole left in the store"
+
+if __name__ == "__main__":
+    n, rate = 170, 20.0
+    wall, fake = run_fetch_many(n, rate)
+    hist_calls = len(_stamps(fake, "historical"))
+    floor = hist_calls / rate
+    print(f"{n} symbols: {wall:.2f}s wall, {hist_calls} historical calls (incl. retried 429s); "
+          f"rate-limit floor ~{floor:.2f}s, serial with sleep(0.5) would be >{n * 0.5:.0f}s")
@@ -0,0 +1,89 @@
+# test_first_breaches.py
+# range_index.first_breaches must return, for every level, exactly the bar the
+# per-level wick-breach scans in the momentum detectors returned (NaN levels,
+# equal prices and levels on the last bar included). Run as a script for the
+# many-level continuation-zone benchmark.
+
+import random
+import time
+
+import numpy as np
+
+import momentum_continuation_zones
+from range_index import first_breaches
+from candle_series import as_series
+from test_resistance_support_fuzz import random_candles
+
+# -------------------- the per-level scans first_breaches replaces --------------------
+
+def first_wick_breach_up(highs, start_idx, level_price):
+    for j in range(start_idx + 1, len(highs)):
+        if highs[j] > level_price:
+            return j
+    return None
+
+def first_wick_breach_down(lows, start_idx, level_price):
+    for j in range(start_idx + 1, len(lows)):
+        if lows[j] < level_price:
+            return j
+    return None
+
+def _queries(rnd, candles, m):
+    n = len(candles)
+    starts, prices = [], []
+    for _ in range(m):
+        k = rnd.randrange(n)
+        starts.append(rnd.randint(-1, n))
+        prices.append(rnd.choice([candles[k]["high"], candles[k]["low"], candles[k]["close"], float("nan")]))
+    return starts, prices
+
+def test_first_breaches_match_scans(trials: int = 200, seed: int = 15):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        candles = random_candles(rnd.randint(1, 120), rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        s = as_series(candles)
+        H, L = s.high.tolist(), s.low.tolist()
+        starts, prices = _queries(rnd, candles, 40)
+        up = first_breaches(s, starts, prices, "up").tolist()
+        down = first_breaches(s, starts, prices, "down").tolist()
+        for q, (i, p) in enumerate(zip(starts, prices)):
+            exp_up = first_wick_breach_up(H, i, p)
+            exp_down = first_wick_breach_down(L, i, p)
+            assert up[q] == (-1 if exp_up is None else exp_up), f"up, trial {t} ({i}, {p})"
+            assert down[q] == (-1 if exp_down is None else exp_down), f"down, trial {t} ({i}, {p})"
+
+def test_empty_batch():
+    assert first_breaches(random_candles(10, random.Random(1)), [], [], "down").tolist() == []
+
+if __name__ == "__main__":
+    test_first_breaches_match_scans()
+    test_empty_batch()
+    print("first_breaches == per-level wick-breach scans on 200 random series")
+
+    from resistance_support_percent_bilateral import all_bilateral_resistance_support
+    from analysis_graph import normalize_dbr_zones, normalize_rbd_zones
+    from demandZone import find_demand_zones
+    from supplyZone import find_supply_zones
+
+    candles = random_candles(20000, random.Random(3), vol=0.004)
+    rs = all_bilateral_resistance_support(candles, pct_left=0.005, pct_right=0.005)
+    dbr = normalize_dbr_zones(find_demand_zones(candles, lookback=len(candles)))
+    rbd = normalize_rbd_zones(find_supply_zones(candles, lookback=len(candles)))
+    args = (rs["resistances"], rs["supports"], dbr, rbd)
+
+    def per_level(s, starts, prices, direction):
+        scan = first_wick_breach_up if direction == "up" else first_wick_breach_down
+        col = s.high.tolist() if direction == "up" else s.low.tolist()
+        return np.array([-1 if j is None else j for j in (scan(col, i, p) for i, p in zip(starts, prices))], dtype=np.int64)
+
+    best, outs = {}, {}
+    for name, fn in (("batched", first_breaches), ("per-level scans", per_level)) * 3:
+        momentum_continuation_zones.first_breaches = fn
+        t0 = time.perf_counter()
+        out = momentum_continuation_zones.detect_momentum_continuation_zones(as_series(candles), *args)
+        best[name] = min(best.get(name, float("inf")), time.perf_counter() - t0)
+        outs[name] = out
+    n_levels = len(rs["resistances"]) + len(rs["supports"])
+    print(f"20000 bars, {n_levels} levels: continuation zones with batched breaches {best['batched'] * 1e3:.1f} ms  "
+          f"per-level scans {best['per-level scans'] * 1e3:.1f} ms")
+    assert outs["batched"] == outs["per-level scans"]
@@ -0,0 +1,158 @@
+# test_gap_context.py
+# The O(1) GapContext checks must agree with the per-window scans pro_gaps /
+# novice_gaps used to run, for every bar and window size, NaN closes included.
+# Run as a script for a min_bars / N sweep benchmark on intraday-sized data.
+
+import random
+import time
+
+from candle_series import as_series
+from gap_context import GapContext, gap_context
+from novice_gaps import _window_bounds, _rapid_upmove, _rapid_downmove
+from pro_gaps import _downmove, _upmove
+from test_resistance_support_fuzz import random_candles
+
+# -------------------- the per-window scans GapContext replaces --------------------
+# pro_gaps: the min_bars closes before prior_idx
+
+def has_downmove(closes_all, prior_idx, min_bars, min_pct):
+    start = prior_idx - min_bars
+    end = prior_idx - 1
+    if start < 0 or end < 0 or start > end:
+        return False
+    cmax = max(closes_all[start:end + 1])
+    if cmax <= 0:
+        return False
+    return (cmax - closes_all[prior_idx]) / cmax >= min_pct
+
+def has_upmove(closes_all, prior_idx, min_bars, min_pct):
+    start = prior_idx - min_bars
+    end = prior_idx - 1
+    if start < 0 or end < 0 or start > end:
+        return False
+    cmin = min(closes_all[start:end + 1])
+    if cmin <= 0:
+        return False
+    return (closes_all[prior_idx] - cmin) / cmin >= min_pct
+
+# novice_gaps: the window from _window_bounds, up to (not incl.) prior_idx
+
+def has_rapid_upmove(closes_all, prior_idx, N, pct):
+    start, _ = _window_bounds(prior_idx, N)
+    if start > prior_idx - 1:
+        return False
+    cmin = min(closes_all[start:prior_idx])
+    if cmin <= 0:
+        return False
+    return (closes_all[prior_idx] - cmin) / cmin >= pct
+
+def has_rapid_downmove(closes_all, prior_idx, N, pct):
+    start, _ = _window_bounds(prior_idx, N)
+    if start > prior_idx - 1:
+        return False
+    cmax = max(closes_all[start:prior_idx])
+    if cmax <= 0:
+        return False
+    return (cmax - closes_all[prior_idx]) / cmax >= pct
+
+def has_simple_gap_up_in_window(lows, closes, start_k, end_k):
+    return any(lows[k] > closes[k - 1] for k in range(start_k, end_k + 1))
+
+def has_simple_gap_down_in_window(highs, closes, start_k, end_k):
+    return any(highs[k] < closes[k - 1] for k in range(start_k, end_k + 1))
+
+def _series(rnd, n):
+    candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5]), vol=rnd.choice([0.005, 0.03]))
+    for c in rnd.sample(candles, min(len(candles), rnd.choice([0, 0, 2]))):
+        c["close"] = float("nan")
+    for c in rnd.sample(candles, min(len(candles), rnd.choice([0, 1]))):
+        c["close"] = 0.0
+    return as_series(candles)
+
+def test_context_matches_window_helpers(trials: int = 120, seed: int = 17):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        s = _series(rnd, rnd.randint(1, 90))
+        ctx = GapContext(s)
+        H, L, C = s.high.tolist(), s.low.tolist(), s.close.tolist()
+        for w in (0, 1, 2, 3, 7, 50):
+            pct = rnd.choice([0.0, 0.01, 0.03])
+            for prior in range(len(s)):
+                msg = f"trial {t}, window {w}, bar {prior}"
+                assert _downmove(ctx, prior, w, pct) == has_downmove(C, prior, w, pct), msg
+                assert _upmove(ctx, prior, w, pct) == has_upmove(C, prior, w, pct), msg
+                assert _rapid_upmove(ctx, prior, w, pct) == has_rapid_upmove(C, prior, w, pct), msg
+                assert _rapid_downmove(ctx, prior, w, pct) == has_rapid_downmove(C, prior, w, pct), msg
+                a, b = _window_bounds(prior, w)
+                assert ctx.any_gap_up(a, b) == has_simple_gap_up_in_window(L, C, a, b), msg
+                assert ctx.any_gap_down(a, b) == has_simple_gap_down_in_window(H, C, a, b), msg
+
+def reference_pro_gaps(candles, min_bars, min_pct):
+    """detect_pro_gaps as a per-bar loop over the window helpers (its original form)."""
+    from candle_colors import candle_colors, RED_CODE, GREEN_CODE
+    s = as_series(candles)
+    O, H, L, C = s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()
+    colors = candle_colors(s).tolist()
+    ups = [i for i in range(1, len(s)) if colors[i - 1] == RED_CODE and colors[i] == GREEN_CODE and L[i] > C[i - 1]
+           and has_downmove(C, i - 1, min_bars, min_pct)]
+    downs = [i for i in range(1, len(s)) if colors[i - 1] == GREEN_CODE and colors[i] == RED_CODE and H[i] < C[i - 1]
+             and has_upmove(C, i - 1, min_bars, min_pct)]
+    return ups, downs
+
+def reference_novice_gaps(candles, N, pct):
+    """detect_novice_gaps as a per-bar loop over the window helpers (its original form)."""
+    s = as_series(candles)
+    O, H, L, C = s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()
+    downs = [i for i in range(1, len(s)) if O[i] > C[i - 1] and C[i] < L[i - 1] and has_rapid_upmove(C, i - 1, N, pct)
+             and has_simple_gap_up_in_window(L, C, *_window_bounds(i - 1, N))]
+    ups = [i for i in range(1, len(s)) if O[i] < C[i - 1] and C[i] > H[i - 1] and has_rapid_downmove(C, i - 1, N, pct)
+           and has_simple_gap_down_in_window(H, C, *_window_bounds(i - 1, N))]
+    return downs, ups
+
+def test_detectors_match_per_bar_loops(trials: int = 120, seed: int = 18):
+    from novice_gaps import detect_novice_gaps
+    from pro_gaps import detect_pro_gaps
+    rnd = random.Random(seed)
+    for t in range(trials):
+        s = _series(rnd, rnd.randint(0, 120))
+        w, pct = rnd.randint(0, 8), rnd.choice([0.0, 0.005, 0.02])
+        pro = detect_pro_gaps(s, min_bars=w, min_pct=pct)
+        novice = detect_novice_gaps(s, N=w, pct=pct)
+        got_pro = ([g["index"] for g in pro["pro_gap_ups"]], [g["index"] for g in pro["pro_gap_downs"]])
+        got_novice = ([g["index"] for g in novice["novice_gap_downs"]], [g["index"] for g in novice["novice_gap_ups"]])
+        assert got_pro == reference_pro_gaps(s, w, pct), f"pro, trial {t}"
+        assert got_novice == reference_novice_gaps(s, w, pct), f"novice, trial {t}"
+
+def test_context_is_cached_on_series():
+    s = as_series(random_candles(50, random.Random(1)))
+    assert gap_context(s) is gap_context(s)
+
+if __name__ == "__main__":
+    test_context_matches_window_helpers()
+    test_detectors_match_per_bar_loops()
+    test_context_is_cached_on_series()
+    print("GapContext == per-window helpers, detectors == per-bar loops on 120 random series")
+
+    from novice_gaps import detect_novice_gaps
+    from pro_gaps import detect_pro_gaps
+    s = as_series(random_candles(20000, random.Random(3), vol=0.004))
+    C = s.close.tolist()
+    windows = range(1, 51)
+
+    t0 = time.perf_counter()
+    slow = [[has_downmove(C, i, w, 0.01) for i in range(len(C))] for w in windows]
+    t1 = time.perf_counter()
+    ctx = GapContext(s)
+    fast = [[_downmove(ctx, i, w, 0.01) for i in range(len(C))] for w in windows]
+    t2 = time.perf_counter()
+    assert fast == slow
+    print(f"20000 bars x min_bars 1..50, downmove check on every bar: per-window max() {t1 - t0:.2f}s  "
+          f"GapContext (incl. build) {t2 - t1:.2f}s")
+
+    t0 = time.perf_counter()
+    slow = [(reference_pro_gaps(s, w, 0.005), reference_novice_gaps(s, w, 0.005)) for w in windows]
+    t1 = time.perf_counter()
+    fast = [(detect_pro_gaps(s, min_bars=w, min_pct=0.005), detect_novice_gaps(s, N=w, pct=0.005)) for w in windows]
+    t2 = time.perf_counter()
+    print(f"  pro + novice swept over 50 window sizes: per-bar loops (indices only) {t1 - t0:.2f}s  "
+          f"detectors (full result dicts) {t2 - t1:.2f}s")
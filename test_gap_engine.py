@@ -0,0 +1,71 @@
+# test_gap_engine.py
+# GapEngine.run must return exactly what the four gap detectors return when run
+# one after another. Run as a script for the timing against the separate calls.
+
+import random
+import time
+
+from candle_series import as_series
+from gap_engine import GapEngine
+from gaps_simple import detect_simple_gaps
+from novice_gaps import detect_novice_gaps
+from pro_gaps import detect_pro_gaps
+from momentum_gaps import detect_momentum_gaps
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from test_resistance_support_fuzz import random_candles
+
+def separately(candles, config, rs=None):
+    rs = rs or all_bilateral_resistance_support(candles, **config["levels"])
+    simple = detect_simple_gaps(candles)
+    return {
+        "simple": simple,
+        "novice": detect_novice_gaps(candles, **config["novice"]),
+        "pro": detect_pro_gaps(candles, **config["pro"]),
+        "momentum": detect_momentum_gaps(candles, simple, rs["resistances"], rs["supports"]),
+    }
+
+def test_engine_matches_detectors(trials: int = 150, seed: int = 16):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        candles = random_candles(rnd.randint(0, 150), rnd, tick=rnd.choice([0.0, 0.5, 2.0]), vol=rnd.choice([0.005, 0.03]))
+        if t % 3 == 0:
+            candles = as_series(candles)
+        engine = GapEngine({"novice": {"N": rnd.randint(1, 5), "pct": rnd.choice([0.0, 0.01, 0.02])},
+                            "pro": {"min_bars": rnd.randint(1, 5), "min_pct": rnd.choice([0.0, 0.01, 0.02])},
+                            "levels": {"pct_left": 0.01, "pct_right": 0.015}})
+        assert engine.run(candles) == separately(candles, engine.config), f"mismatch on trial {t}"
+
+def test_families_and_levels():
+    candles = random_candles(200, random.Random(2), vol=0.03)
+    rs = all_bilateral_resistance_support(candles)
+    out = GapEngine().run(candles, {"families": ["pro", "momentum"]}, levels=rs)
+    assert set(out) == {"pro", "momentum"}
+    assert out["momentum"] == detect_momentum_gaps(candles, detect_simple_gaps(candles), rs["resistances"], rs["supports"])
+
+def test_unsorted_input_keeps_simple_gap_behaviour():
+    candles = random_candles(60, random.Random(5), vol=0.03)[::-1]
+    assert GapEngine().run(candles, {"families": ["simple"]})["simple"] == detect_simple_gaps(candles)
+
+if __name__ == "__main__":
+    test_engine_matches_detectors()
+    test_families_and_levels()
+    test_unsorted_input_keeps_simple_gap_behaviour()
+    print("GapEngine == the four gap detectors on 150 random series")
+
+    engine = GapEngine()
+    for n in (1000, 20000):
+        s = as_series(random_candles(n, random.Random(3), vol=0.01))
+        rs = all_bilateral_resistance_support(s, **engine.config["levels"])
+        runs = {
+            "four detectors": lambda: separately(s, engine.config),
+            "GapEngine": lambda: engine.run(s),
+            "four detectors, levels given": lambda: separately(s, engine.config, rs),
+            "GapEngine, levels given": lambda: engine.run(s, levels=rs),
+        }
+        best = dict.fromkeys(runs, float("inf"))
+        for _ in range(5):   # interleaved so clock drift hits all alike
+            for name, fn in runs.items():
+                t0 = time.perf_counter()
+                fn()
+                best[name] = min(best[name], time.perf_counter() - t0)
+        print(f"{n} bars: " + "  ".join(f"{k} {v * 1e3:.1f} ms" for k, v in best.items()))
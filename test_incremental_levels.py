@@ -0,0 +1,58 @@
+# test_incremental_levels.py
+# After every push, IncrementalLevelTracker must equal a full recompute
+# (all_bilateral_resistance_support + all_bilateral_swings) on the bars so far.
+
+import random
+import time
+
+from incremental_levels import IncrementalLevelTracker
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from swings_percent_bilateral import all_bilateral_swings
+from test_resistance_support_fuzz import random_candles, with_nan_bars
+
+def test_tracker_matches_full_recompute(trials: int = 40, seed: int = 5):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(1, 150)
+        candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        pl, pr, sp = rnd.choice([0.005, 0.01, 0.02]), rnd.choice([0.005, 0.015, 0.03]), rnd.choice([0.01, 0.03])
+        tr = IncrementalLevelTracker(pct_left=pl, pct_right=pr, swing_pct=sp)
+        for k, c in enumerate(candles):
+            tr.push(c)
+            rs = all_bilateral_resistance_support(candles[:k + 1], pct_left=pl, pct_right=pr)
+            sw = all_bilateral_swings(candles[:k + 1], sp)
+            assert tr.resistances == rs["resistances"], f"resistances differ (trial {t}, bar {k})"
+            assert tr.supports == rs["supports"], f"supports differ (trial {t}, bar {k})"
+            assert tr.swing_highs == sw["swing_highs"], f"swing highs differ (trial {t}, bar {k})"
+            assert tr.swing_lows == sw["swing_lows"], f"swing lows differ (trial {t}, bar {k})"
+
+def test_tracker_matches_full_recompute_with_nan_bars(trials: int = 60, seed: int = 9):
+    # NaN bars are masked like the batch detectors mask them; a swing on a
+    # NaN-high/low bar carries that NaN, so levels are compared by repr
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(1, 150)
+        candles = with_nan_bars(random_candles(n, rnd, tick=rnd.choice([0.0, 0.5])), rnd, k=rnd.randint(1, 3))
+        pl, pr, sp = rnd.choice([0.005, 0.01, 0.02]), rnd.choice([0.005, 0.015, 0.03]), rnd.choice([0.01, 0.03])
+        tr = IncrementalLevelTracker(pct_left=pl, pct_right=pr, swing_pct=sp)
+        for k, c in enumerate(candles):
+            tr.push(c)
+            if k % 10 and k != n - 1:
+                continue
+            rs = all_bilateral_resistance_support(candles[:k + 1], pct_left=pl, pct_right=pr)
+            sw = all_bilateral_swings(candles[:k + 1], sp)
+            got = (tr.resistances, tr.supports, tr.swing_highs, tr.swing_lows)
+            exp = (rs["resistances"], rs["supports"], sw["swing_highs"], sw["swing_lows"])
+            assert repr(got) == repr(exp), f"levels differ on NaN trial {t}, bar {k}"
+
+if __name__ == "__main__":
+    test_tracker_matches_full_recompute()
+    test_tracker_matches_full_recompute_with_nan_bars()
+    print("tracker == full recompute after every bar on 40 random series (+60 with NaN bars)")
+
+    candles = random_candles(20000, random.Random(2), vol=0.003)
+    tr = IncrementalLevelTracker(pct_left=0.01, pct_right=0.015, swing_pct=0.03)
+    t0 = time.perf_counter()
+    events = tr.push_many(candles)
+    dt = time.perf_counter() - t0
+    print(f"20000 bars pushed in {dt:.3f}s ({dt / 20000 * 1e6:.1f} us/bar), {len(events)} events")
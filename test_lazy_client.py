@@ -0,0 +1,68 @@
+# test_lazy_client.py
+# Importing fetch / detectors / the candle store must not load kiteconnect or
+# build a client; an injected client is used everywhere instead.
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+import auth
+import fetch
+from candle_store import CandleStore
+from instruments import InstrumentResolver
+from test_fetch_many import FakeKite
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+OFFLINE_MODULES = [
+    "fetch", "candle_store", "candle_series", "demandZone", "supplyZone", "gaps_simple",
+    "pro_gaps", "novice_gaps", "momentum_gaps", "momentum_zones", "momentum_continuation_zones",
+    "resistance_support_percent_bilateral", "swings_percent_bilateral", "incremental_levels",
+]
+
+def _run(code: str) -> str:
+    return subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+def test_imports_do_not_load_kiteconnect():
+    loaded = _run(
+        f"import sys; import {', '.join(OFFLINE_MODULES)}; "
+        "print(sorted(m for m in ('kiteconnect', 'dotenv', 'requests') if m in sys.modules))"
+    )
+    assert loaded == "[]", f"offline imports pulled in {loaded}"
+
+def test_injected_client_is_used():
+    fake = FakeKite(latency=0.0, fail_every=0, dump_symbols=["INJ"])
+    old_client, old = auth._client, (fetch._store, fetch._resolver)
+    auth.set_client(fake)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "candles.sqlite3")
+        fetch._store, fetch._resolver = CandleStore(path), InstrumentResolver(path)
+        try:
+            assert fetch.kite is fake
+            assert fetch.fetch_ohlc_data("INJ", "day", 20)
+            assert fake.calls, "fetch should go through the injected client"
+        finally:
+            fetch._store.close()
+            fetch._resolver.close()
+            fetch._store, fetch._resolver = old
+            auth.set_client(old_client)
+
+def _import_seconds(code: str, runs: int) -> float:
+    return statistics.median(
+        float(_run(f"import time; t0 = time.perf_counter(); {code}; print(time.perf_counter() - t0)"))
+        for _ in range(runs)
+    )
+
+if __name__ == "__main__":
+    test_imports_do_not_load_kiteconnect()
+    test_injected_client_is_used()
+    print("offline imports load no kiteconnect; injected client is used")
+
+    runs = 7
+    lazy = _import_seconds("import fetch", runs)
+    eager = _import_seconds("import fetch, auth; auth.get_kite()", runs)  # what `import fetch` used to do
+    print(f"import fetch (median of {runs}): lazy {lazy * 1e3:.1f} ms  vs  eager client {eager * 1e3:.1f} ms "
+          f"({eager / lazy:.1f}x)")
@@ -0,0 +1,66 @@
+# test_level_index.py
+# LevelIndex / ZoneIndex must return exactly what the per-query filtered,
+# stably sorted lists in the momentum detectors returned, ties included.
+
+import random
+import time
+
+from level_index import LevelIndex, ZoneIndex
+
+# -------------------- the per-query scans they replace --------------------
+
+def first_after(levels, after_idx):
+    cands = sorted((L for L in levels if int(L["index"]) > after_idx), key=lambda L: int(L["index"]))
+    return cands[0] if cands else None
+
+def first_zone_at_or_after(zones, after_idx):
+    cands = sorted((Z for Z in zones if int(Z["base_start"]) >= after_idx), key=lambda Z: int(Z["base_start"]))
+    return cands[0] if cands else None
+
+def prior_in_band(levels, lo, hi, before):
+    cands = [L for L in levels if int(L["index"]) < before and lo <= float(L["price"]) <= hi]
+    cands.sort(key=lambda L: int(L["index"]), reverse=True)
+    return cands
+
+def random_levels(rnd, n, n_bars):
+    # duplicate indices and prices on purpose: ties must keep input order
+    return [{"index": rnd.randrange(n_bars), "price": round(rnd.uniform(90, 110), rnd.choice([0, 1, 2])), "id": k}
+            for k in range(n)]
+
+def test_level_index_matches_scans(trials: int = 200, seed: int = 6):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n_bars = rnd.randint(1, 80)
+        levels = random_levels(rnd, rnd.randint(0, 60), n_bars)
+        zones = [{"base_start": L["index"], "id": L["id"]} for L in levels]
+        idx, zidx = LevelIndex(levels), ZoneIndex(zones)
+        assert idx.items == sorted(levels, key=lambda L: L["index"])
+        for _ in range(30):
+            i = rnd.randint(-2, n_bars + 2)
+            lo = rnd.uniform(88, 112)
+            hi = lo + rnd.choice([0.0, 0.5, 3.0, 30.0])
+            assert idx.first_after(i) is first_after(levels, i), f"first_after, trial {t}"
+            assert zidx.first_at_or_after(i) is first_zone_at_or_after(zones, i), f"zone after, trial {t}"
+            assert idx.in_band(lo, hi, before=i) == prior_in_band(levels, lo, hi, i), f"in_band, trial {t}"
+            assert list(idx.before(i)) == prior_in_band(levels, float("-inf"), float("inf"), i)
+        # a zone with a NaN bound (NaN bar) matches no level
+        nan = float("nan")
+        for lo, hi in ((nan, nan), (nan, 105.0), (95.0, nan)):
+            assert idx.in_band(lo, hi, before=n_bars + 1) == prior_in_band(levels, lo, hi, n_bars + 1) == []
+
+if __name__ == "__main__":
+    test_level_index_matches_scans()
+    print("LevelIndex / ZoneIndex == per-query scans on 200 random level sets")
+
+    rnd = random.Random(1)
+    levels = random_levels(rnd, 5000, 20000)
+    queries = [(rnd.randrange(20000), rnd.uniform(90, 110)) for _ in range(2000)]
+    t0 = time.perf_counter()
+    slow = [(first_after(levels, i), prior_in_band(levels, p - 0.2, p + 0.2, i)) for i, p in queries]
+    t1 = time.perf_counter()
+    idx = LevelIndex(levels)
+    fast = [(idx.first_after(i), idx.in_band(p - 0.2, p + 0.2, before=i)) for i, p in queries]
+    t2 = time.perf_counter()
+    assert fast == slow
+    print(f"5000 levels x 2000 queries: per-query scans {t1 - t0:.3f}s  LevelIndex (incl. build) {t2 - t1:.3f}s "
+          f"({(t1 - t0) / (t2 - t1):.0f}x)")
@@ -0,0 +1,176 @@
+# test_live_ticks.py
+# LiveBars over SimulatedTicker batches: closed minute / 60-minute bars equal
+# an offline resample of the same ticks (Kite's 09:15-anchored buckets, short
+# 15:15 bar), seeded history plus REST's forming candle continues seamlessly,
+# and the level trackers fed bar by bar equal a full recompute on the ring.
+# Run as a script for a full-universe ingestion benchmark.
+
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from candle_store import CandleStore, IST, to_epoch, from_epoch
+from live_ticks import LiveBars, SimulatedTicker, BarRing, bucket, INTERVAL_SECONDS
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+
+TOKENS = [101, 202, 303]
+START = datetime(2026, 3, 2, 9, 15, tzinfo=IST)   # a Monday open
+
+def tick_batches(n, step=7.0, start=START, tokens=TOKENS, seed=1):
+    sim = SimulatedTicker(start=start, step=step, seed=seed, vol=0.002)
+    sim.subscribe(tokens)
+    sim.set_mode(sim.MODE_FULL, tokens)
+    return [sim.ticks() for _ in range(n)]
+
+def resample(batches, interval):
+    """{token: [(start, o, h, l, c)]} of complete buckets closed by the last tick time."""
+    seconds = INTERVAL_SECONDS[interval]
+    ticks = [t for b in batches for t in b]
+    since = to_epoch(ticks[0]["exchange_timestamp"])
+    clock = max(to_epoch(t["exchange_timestamp"]) for t in ticks)
+    bars = {}
+    for t in ticks:
+        ts, p = to_epoch(t["exchange_timestamp"]), t["last_price"]
+        span = bucket(ts, seconds)
+        rows = bars.setdefault(t["instrument_token"], {})
+        if span not in rows:
+            rows[span] = [span[0], p, p, p, p]
+        bar = rows[span]
+        bar[2], bar[3], bar[4] = max(bar[2], p), min(bar[3], p), p
+    return {tok: [tuple(b) for span, b in sorted(rows.items()) if span[0] >= since and span[1] <= clock]
+            for tok, rows in bars.items()}
+
+def ring_rows(live, token, interval):
+    s = live.series(token, interval)
+    return list(zip(s.time.tolist(), s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()))
+
+def test_bars_match_offline_resample():
+    # two sessions at 7s steps, starting mid-bar (first minute / hour partial)
+    batches = tick_batches(2 * 375 * 60 // 7, start=START.replace(minute=47, second=20))
+    live = LiveBars(SimulatedTicker(), TOKENS)
+    for b in batches:
+        live.add_ticks(b)
+    for interval in ("minute", "60minute"):
+        want = resample(batches, interval)
+        for tok in TOKENS:
+            assert ring_rows(live, tok, interval) == want[tok], (interval, tok)
+    starts = [from_epoch(ts).strftime("%d %H:%M") for ts, *_ in ring_rows(live, TOKENS[0], "60minute")]
+    assert starts[:7] == ["02 10:15", "02 11:15", "02 12:15", "02 13:15", "02 14:15", "02 15:15", "03 09:15"]
+    assert live.stats()["60minute"]["partial"] == len(TOKENS)
+
+def test_ring_keeps_newest_bars():
+    ring = BarRing(4)
+    for k in range(10):
+        ring.append(k, k + 0.1, k + 0.5, k - 0.5, k + 0.2)
+    s = ring.to_series()
+    assert len(ring) == 4 and s.time.tolist() == [6, 7, 8, 9] and s.close.tolist() == [6.2, 7.2, 8.2, 9.2]
+    assert ring.to_series(last=2).time.tolist() == [8, 9] and ring.last_time() == 9
+
+def test_seed_and_forming_candle_continue_the_feed():
+    batches = tick_batches(375 * 60 // 5, step=5.0)
+    cut = len(batches) // 2 + 37   # mid-bar
+    full = LiveBars(SimulatedTicker(), TOKENS)
+    for b in batches[:cut]:
+        full.add_ticks(b)
+    now = full.clock
+    hourly = full.aggregators[1]
+    history = {}
+    for tok in TOKENS:
+        # what REST returns at `now`: closed bars + the forming candle so far
+        start, _, o, h, l, c, _ = hourly._forming[tok]
+        history[tok] = full.series(tok).to_list() + [{"date": from_epoch(start), "open": o, "high": h, "low": l, "close": c}]
+    for b in batches[cut:]:
+        full.add_ticks(b)
+
+    live = LiveBars(SimulatedTicker(), TOKENS, intervals=("60minute",))
+    for tok in TOKENS:
+        assert live.seed(tok, history[tok], now=now) == len(history[tok]) - 1
+    for b in batches[cut:]:
+        live.add_ticks(b)
+    for tok in TOKENS:
+        assert ring_rows(live, tok, "60minute") == ring_rows(full, tok, "60minute")
+    assert live.stats()["60minute"]["partial"] == 0
+
+def test_trackers_equal_full_recompute():
+    batches = tick_batches(3 * 375 * 60 // 10, step=10.0, seed=4)
+    params = {"pct_left": 0.002, "pct_right": 0.003, "swing_pct": 0.004}
+    events = []
+    live = LiveBars(SimulatedTicker(), TOKENS, tracker_params=params,
+                    on_bar=lambda tok, iv, bar, ev: events.extend(ev))
+    for b in batches:
+        live.add_ticks(b)
+    live.flush(max(to_epoch(t["exchange_timestamp"]) for t in batches[-1]) + 86400)
+    assert any(e["event"] == "confirmed" for e in events)
+    for tok in TOKENS:
+        rs = all_bilateral_resistance_support(live.series(tok), pct_left=0.002, pct_right=0.003)
+        assert live.trackers[tok].resistances == rs["resistances"]
+        assert live.trackers[tok].supports == rs["supports"]
+
+def test_simulated_ticker_threaded_with_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = CandleStore(os.path.join(tmp, "c.sqlite3"))
+        closed = []
+        sim = SimulatedTicker(start=START, step=30.0, steps=375 * 2, seed=3)
+        live = LiveBars(sim, TOKENS, store=store, on_bar=lambda tok, iv, bar, ev: closed.append((tok, iv)))
+        sim.connect(threaded=True)
+        sim._thread.join(timeout=30)
+        assert not sim.is_connected() and sim.sent == 375 * 2
+        st = live.stats()
+        assert len(closed) == st["minute"]["bars"] + st["60minute"]["bars"] > 0
+        for tok in TOKENS:
+            assert [r[0] for r in store.read_rows(tok, "60minute")] == live.series(tok).time.tolist()
+        store.close()
+
+def test_callbacks_may_read_the_rings():
+    seen = []
+    sim = SimulatedTicker(start=START, step=30.0, steps=375 * 2, seed=5)
+    def on_bar(tok, iv, bar, ev):
+        # re-entering LiveBars from the ticker thread must not deadlock
+        seen.append(live.series(tok, iv).time[-1] == to_epoch(bar["date"]) and bool(live.stats()))
+    live = LiveBars(sim, TOKENS, on_bar=on_bar)
+    sim.connect(threaded=True)
+    sim._thread.join(timeout=30)
+    assert not sim._thread.is_alive(), "ticker thread hung in a callback"
+    assert seen and all(seen)
+
+    # a failing callback leaves the bar state complete; queued bars go out on the next batch
+    batches = tick_batches(3 * 60 * 60 // 7)
+    fail = [True]
+    got = []
+    def flaky(tok, iv, bar, ev):
+        if fail[0]:
+            fail[0] = False
+            raise RuntimeError("callback failed")
+        got.append((tok, iv, to_epoch(bar["date"])))
+    live = LiveBars(SimulatedTicker(), TOKENS, on_bar=flaky)
+    raised = 0
+    for b in batches:
+        try:
+            live.add_ticks(b)
+        except RuntimeError:
+            raised += 1
+    assert raised == 1
+    want = {(tok, iv, ts) for iv in ("minute", "60minute") for tok in TOKENS for ts, *_ in ring_rows(live, tok, iv)}
+    assert len(got) == len(want) - 1 and set(got) < want
+
+if __name__ == "__main__":
+    test_bars_match_offline_resample()
+    test_ring_keeps_newest_bars()
+    test_seed_and_forming_candle_continue_the_feed()
+    test_trackers_equal_full_recompute()
+    test_simulated_ticker_threaded_with_store()
+    test_callbacks_may_read_the_rings()
+    print("live bars == offline resample, seeded feeds continue, trackers == full recompute")
+
+    tokens = list(range(1000, 1170))
+    batches = tick_batches(2000, step=2.0, tokens=tokens)
+    live = LiveBars(SimulatedTicker(), tokens)
+    t0 = time.perf_counter()
+    for b in batches:
+        live.add_ticks(b)
+    dt = time.perf_counter() - t0
+    n = sum(len(b) for b in batches)
+    st = live.stats()
+    print(f"{len(tokens)} instruments, {n:,} ticks -> {st['minute']['bars']:,} minute + "
+          f"{st['60minute']['bars']:,} hourly bars: {dt:.2f}s ({n / dt:,.0f} ticks/s)")
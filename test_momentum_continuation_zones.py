@@ -1,8 +1,5 @@
 from fetch import fetch_ohlc_data
-from resistance_support_percent_bilateral import all_bilateral_resistance_support
-from demandZone import find_demand_zones
-from supplyZone import find_supply_zones
-from momentum_continuation_zones import detect_momentum_continuation_zones
+from analysis_graph import analyze
 
 def _fmt_date(d):
     try:
@@ -10,53 +7,11 @@ def _fmt_date(d):
     except Exception:
         return str(d)
 
-def _normalize_dbr_zones(raw):
-    out = []
-    for z in raw:
-        if z.get("type") != "DBR":
-            continue
-        out.append({
-            "zone_low": float(z["bottom"]),
-            "zone_high": float(z["top"]),
-            "base_start": int(z["base_start_idx"]),
-            "base_end": int(z["base_end_idx"]),
-            "zone_date": z.get("created_at"),
-        })
-    return out
-
-def _normalize_rbd_zones(raw):
-    out = []
-    for z in raw:
-        if z.get("type") != "RBD":
-            continue
-        out.append({
-            "zone_low": float(z["proximal"]),
-            "zone_high": float(z["distal"]),
-            "base_start": int(z["base_start_idx"]),
-            "base_end": int(z["base_end_idx"]),
-            "zone_date": z.get("created_at"),
-        })
-    return out
-
 def show(symbol: str, lookback: int = 100, left_pct: float = 0.02, right_pct: float = 0.03):
     print(f"\n=== {symbol} | DAILY | last {lookback} | M-Continuation (L={left_pct*100:.1f}%, R={right_pct*100:.1f}%) ===")
     candles = fetch_ohlc_data(symbol, "day", lookback)
 
-    rs = all_bilateral_resistance_support(candles, pct_left=left_pct, pct_right=right_pct)
-    resistances, supports = rs["resistances"], rs["supports"]
-
-    dz_raw = find_demand_zones(candles, lookback=lookback)
-    sz_raw = find_supply_zones(candles, lookback=lookback)
-    dbr_zones = _normalize_dbr_zones(dz_raw)
-    rbd_zones = _normalize_rbd_zones(sz_raw)
-
-    out = detect_momentum_continuation_zones(
-        candles=candles,
-        resistances=resistances,
-        supports=supports,
-        dbr_zones=dbr_zones,
-        rbd_zones=rbd_zones,
-    )
+    out = analyze(candles, "continuation_zones", pct_left=left_pct, pct_right=right_pct, lookback=lookback)
 
     cds = out["continuation_demand"]
     css = out["continuation_supply"]
@@ -1,23 +1,14 @@
 
 
 from fetch import fetch_ohlc_data
-from gaps_simple import detect_simple_gaps
-from resistance_support_percent_bilateral import all_bilateral_resistance_support, _fmt_date
-from momentum_gaps import detect_momentum_gaps
+from resistance_support_percent_bilateral import _fmt_date
+from analysis_graph import analyze
 
 def test_symbol(symbol: str, lookback: int = 100, left_pct: float = 0.02, right_pct: float = 0.03):
     print(f"\n=== {symbol} | DAILY | last {lookback} | R/S(left={left_pct*100:.1f}%, right={right_pct*100:.1f}%) ===")
     candles = fetch_ohlc_data(symbol, "day", lookback)
 
-    gaps = detect_simple_gaps(candles)
-    rs = all_bilateral_resistance_support(candles, pct_left=left_pct, pct_right=right_pct)
-
-    out = detect_momentum_gaps(
-        candles=candles,
-        gaps=gaps,
-        resistances=rs["resistances"],
-        supports=rs["supports"],
-    )
+    out = analyze(candles, "momentum_gaps", pct_left=left_pct, pct_right=right_pct)
 
     ups = out["momentum_gap_ups"]
     dns = out["momentum_gap_downs"]
@@ -1,67 +1,23 @@
-from fetch import fetch_ohlc_data, fetch_ltp
-from resistance_support_percent_bilateral import all_bilateral_resistance_support
-from demandZone import find_demand_zones
-from supplyZone import find_supply_zones
-from momentum_zones import detect_momentum_zones
+from fetch import fetch_ohlc_data, fetch_ltp, fetch_ltp_many, get_cache_stats
+from analysis_graph import analyze
 import time
 
+# One LTP snapshot per scan: prices fetched in the batch call below are reused by show()
+LTP_TTL = 900
+
 def _fmt_date(d):
     try:
         return d.strftime("%Y-%m-%d %H:%M")
     except Exception:
         return str(d)
 
-def _normalize_demand_zones(raw):
-    out = []
-    for z in raw:
-        if z.get("type") != "RBR":
-            continue
-        out.append({
-            "zone_low": float(z["bottom"]),
-            "zone_high": float(z["top"]),
-            "base_start": int(z["base_start_idx"]),
-            "base_end": int(z["base_end_idx"]),
-            "leg_in": int(z["leg_in_idx"]) if z.get("leg_in_idx") is not None else int(z["base_start_idx"]),
-            "start_date": z.get("created_at"),
-            "end_date": z.get("created_at"),  # use leg-out candle date as RBR date
-        })
-    return out
-
-def _normalize_supply_zones(raw):
-    out = []
-    for z in raw:
-        if z.get("type") != "DBD":
-            continue
-        out.append({
-            "zone_low": float(z["proximal"]),
-            "zone_high": float(z["distal"]),
-            "base_start": int(z["base_start_idx"]),
-            "base_end": int(z["base_end_idx"]),
-            "leg_in": int(z["leg_in_idx"]) if z.get("leg_in_idx") is not None else int(z["base_start_idx"]),
-            "start_date": z.get("created_at"),
-            "end_date": z.get("created_at"),  # use leg-out candle date as DBD date
-        })
-    return out
-
 def show(symbol: str, lookback: int = 400, left_pct: float = 0.01, right_pct: float = 0.015):
     print(f"\n=== {symbol} | HOURLY | last {lookback} | wick-based L={left_pct*100:.1f}%  R={right_pct*100:.1f}% ===")
-    candles = fetch_ohlc_data(symbol, "60minute", lookback)
+    # one columnar series shared by every detector: candle colors are computed once per symbol
+    candles = fetch_ohlc_data(symbol, "60minute", lookback, as_series=True)
 
-    rs = all_bilateral_resistance_support(candles, pct_left=left_pct, pct_right=right_pct)
-    resistances, supports = rs["resistances"], rs["supports"]
-
-    rbr_raw = find_demand_zones(candles, lookback=lookback)  # only RBR used
-    dbd_raw = find_supply_zones(candles, lookback=lookback)  # only DBD used
-    rbr_zones = _normalize_demand_zones(rbr_raw)
-    dbd_zones = _normalize_supply_zones(dbd_raw)
-
-    out = detect_momentum_zones(
-        candles=candles,
-        resistances=resistances,
-        supports=supports,
-        rbr_zones=rbr_zones,
-        dbd_zones=dbd_zones,
-    )
+    # S/R, the zone sweep and RBR/DBD normalization run as memoized analysis_graph nodes
+    out = analyze(candles, "momentum_zones", pct_left=left_pct, pct_right=right_pct, lookback=lookback)
 
     mds = out["momentum_demand"]
     mss = out["momentum_supply"]
@@ -93,7 +49,7 @@ def show(symbol: str, lookback: int = 400, left_pct: float = 0.01, right_pct: fl
         print("\nMomentum Supply Zones (MSZ): NONE")
 
     if printed:
-        ltp = fetch_ltp(symbol)
+        ltp = fetch_ltp(symbol, ttl=LTP_TTL)
         if ltp:
             print(f"\nCurrent LTP for {symbol}: {ltp:.2f}")    
 
@@ -125,6 +81,11 @@ if __name__ == "__main__":
     "CYIENT", "IEX", "SAMMAANCAP", "TITAGARH"
 ]
 
+    fetch_ltp_many(symbols, ttl=LTP_TTL)
     for s in symbols:
         show(s, lookback=400, left_pct=0.01, right_pct=0.015)
         time.sleep(0.5)
+
+    st = get_cache_stats()
+    print(f"\nCandle store: {st['hits']} hits / {st['misses']} misses "
+          f"({st['hit_rate']*100:.0f}%), {st['bars_from_network']} bars downloaded")
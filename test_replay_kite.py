@@ -0,0 +1,94 @@
+# test_replay_kite.py
+# ReplayKite serves recorded / synthetic fixtures through the real fetch path:
+# results are reproducible, simulated 429s are retried, and RecordingKite
+# captures exactly what ReplayKite later serves. Run as a script for a
+# network-free fetch -> detect throughput benchmark.
+
+import os
+import tempfile
+import time
+
+import fetch
+from candle_store import CandleStore
+from instruments import InstrumentResolver
+from replay_kite import ReplayKite, RecordingKite, write_synthetic_fixtures
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from swings_percent_bilateral import all_bilateral_swings
+from demandZone import find_demand_zones
+from supplyZone import find_supply_zones
+from gaps_simple import detect_simple_gaps
+
+def _symbols(n):
+    return [f"SYN{i}" for i in range(n)]
+
+def fetch_with(client, symbols, days_back=200, rate=50.0, tmp=None, **kw):
+    """fetch_many against `client` with a fresh store in `tmp`."""
+    old = fetch._store, fetch._resolver, fetch.historical_limiter, fetch.quote_limiter
+    fetch.configure_rate_limits(historical=rate, quote=rate)
+    path = os.path.join(tmp, f"candles_{time.perf_counter_ns()}.sqlite3")
+    fetch._store, fetch._resolver = CandleStore(path), InstrumentResolver(path)
+    try:
+        return fetch.fetch_many(symbols, "day", days_back, client=client, **kw)
+    finally:
+        fetch._store.close()
+        fetch._resolver.close()
+        fetch._store, fetch._resolver, fetch.historical_limiter, fetch.quote_limiter = old
+
+def detect(candles):
+    return {
+        "rs": all_bilateral_resistance_support(candles, pct_left=0.02, pct_right=0.03),
+        "swings": all_bilateral_swings(candles, 0.05),
+        "demand": find_demand_zones(candles, lookback=len(candles)),
+        "supply": find_supply_zones(candles, lookback=len(candles)),
+        "gaps": detect_simple_gaps(candles),
+    }
+
+def test_replay_is_reproducible():
+    symbols = _symbols(5)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_fixtures(os.path.join(tmp, "fx"), symbols, n_bars=300, seed=3)
+        a = fetch_with(ReplayKite(os.path.join(tmp, "fx")), symbols, tmp=tmp)
+        b = fetch_with(ReplayKite(os.path.join(tmp, "fx")), symbols, tmp=tmp)
+    assert all(len(a[s]) == 200 for s in symbols)
+    assert a == b
+    assert [detect(a[s]) for s in symbols] == [detect(b[s]) for s in symbols]
+
+def test_simulated_rate_limits_are_retried():
+    symbols = _symbols(12)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_fixtures(os.path.join(tmp, "fx"), symbols, n_bars=100)
+        kite = ReplayKite(os.path.join(tmp, "fx"), fail_every=4)
+        out = fetch_with(kite, symbols, days_back=50, tmp=tmp)
+    assert kite.counts["rate_limited"] > 0
+    assert all(out[s] and len(out[s]) == 50 for s in symbols)
+
+def test_recording_replays_identically():
+    symbols = _symbols(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_fixtures(os.path.join(tmp, "live"), symbols, n_bars=120, seed=9)
+        recorder = RecordingKite(ReplayKite(os.path.join(tmp, "live")), os.path.join(tmp, "rec"))
+        live = fetch_with(recorder, symbols, days_back=100, tmp=tmp)
+        replayed = fetch_with(ReplayKite(os.path.join(tmp, "rec")), symbols, days_back=100, tmp=tmp)
+    assert live == replayed
+
+if __name__ == "__main__":
+    test_replay_is_reproducible()
+    test_simulated_rate_limits_are_retried()
+    test_recording_replays_identically()
+    print("replay: reproducible, 429s retried, recordings replay identically")
+
+    n_symbols, n_bars = 60, 750
+    symbols = _symbols(n_symbols)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_fixtures(os.path.join(tmp, "fx"), symbols, n_bars=n_bars, seed=1)
+        kite = ReplayKite(os.path.join(tmp, "fx"), latency=0.05, jitter=0.02, enforce_rates=True)
+        t0 = time.perf_counter()
+        data = fetch_with(kite, symbols, days_back=n_bars - 1, rate=3.0, tmp=tmp)  # Kite's historical limit
+        t1 = time.perf_counter()
+        for s in symbols:
+            detect(data[s])
+        t2 = time.perf_counter()
+    bars = sum(len(v) for v in data.values())
+    print(f"{n_symbols} symbols x {n_bars} bars: fetch {t1 - t0:.2f}s "
+          f"({kite.counts['historical']} history calls, {kite.counts['rate_limited']} 429s), "
+          f"detect {t2 - t1:.2f}s ({bars / (t2 - t1):,.0f} bars/s)")
@@ -0,0 +1,98 @@
+# test_resistance_support_fuzz.py
+# Fuzz: the range-index engine in all_bilateral_* must match the per-index
+# reference scans (is_bilateral_resistance / is_bilateral_support) exactly.
+# Runs offline on random candles (ties, flat bars and gaps included).
+
+import random
+import time
+from datetime import datetime, timedelta
+
+from candle_series import as_series
+from resistance_support_percent_bilateral import (
+    all_bilateral_resistance_support, is_bilateral_resistance, is_bilateral_support,
+    _columns, _resistance_at, _support_at
+)
+
+def random_candles(n: int, rnd: random.Random, tick: float = 0.0, vol: float = 0.015):
+    p = 100.0
+    out = []
+    t0 = datetime(2024, 1, 1, 9, 15)
+    for i in range(n):
+        o = p * (1 + rnd.gauss(0, vol)) if rnd.random() < 0.3 else p
+        c = o * (1 + rnd.gauss(0, vol))
+        h = max(o, c) * (1 + abs(rnd.gauss(0, vol / 2.5)))
+        l = min(o, c) * (1 - abs(rnd.gauss(0, vol / 2.5)))
+        if tick:  # coarse prices -> many equal highs/lows
+            o, h, l, c = (round(v / tick) * tick for v in (o, h, l, c))
+            h, l = max(h, o, c), min(l, o, c)
+        out.append({"date": t0 + timedelta(hours=i), "open": o, "high": h, "low": l, "close": c})
+        p = c
+    return out
+
+def with_nan_bars(candles, rnd: random.Random, k: int = 2):
+    """Blank k random bars (the whole bar, or just its high or low) with NaN."""
+    out = [dict(c) for c in candles]
+    for _ in range(min(k, len(out))):
+        c = out[rnd.randrange(len(out))]
+        for f in rnd.choice([("open", "high", "low", "close"), ("high",), ("low",)]):
+            c[f] = float("nan")
+    return out
+
+def reference(candles, pct_left, pct_right):
+    """Per-index scans, as is_bilateral_resistance / is_bilateral_support do them."""
+    n = len(candles)
+    cols = _columns(candles)
+    return {
+        "resistances": [r for r in (_resistance_at(candles, cols, i, pct_left, pct_right) for i in range(1, n - 1)) if r],
+        "supports":    [s for s in (_support_at(candles, cols, i, pct_left, pct_right) for i in range(1, n - 1)) if s],
+    }
+
+def test_engine_matches_reference(trials: int = 300, seed: int = 7):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(0, 250)
+        candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        pct_left = rnd.choice([0.0, 0.005, 0.01, 0.02, 0.05])
+        pct_right = rnd.choice([0.0, 0.005, 0.015, 0.03, 0.05])
+        got = all_bilateral_resistance_support(candles, pct_left=pct_left, pct_right=pct_right)
+        exp = reference(candles, pct_left, pct_right)
+        assert got == exp, f"mismatch on trial {t} (n={n}, L={pct_left}, R={pct_right})"
+
+def test_engine_matches_reference_with_nan_bars(trials: int = 300, seed: int = 8):
+    # NaN bars never hit, block or become levels, exactly as in the scalar scans
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(0, 250)
+        candles = with_nan_bars(random_candles(n, rnd, tick=rnd.choice([0.0, 0.5])), rnd, k=rnd.randint(1, 3))
+        pct_left = rnd.choice([0.0, 0.005, 0.01, 0.02])
+        pct_right = rnd.choice([0.0, 0.005, 0.015, 0.03])
+        got = all_bilateral_resistance_support(candles, pct_left=pct_left, pct_right=pct_right)
+        exp = reference(candles, pct_left, pct_right)
+        assert got == exp, f"mismatch on NaN trial {t} (n={n}, L={pct_left}, R={pct_right})"
+
+def test_single_index_calls(seed: int = 9):
+    # list input is read lazily, a series' columns are converted once and cached
+    candles = random_candles(300, random.Random(seed), tick=0.5)
+    s = as_series(candles)
+    assert _columns(s) is _columns(s)
+    for data in (candles, s):
+        exp = all_bilateral_resistance_support(data, pct_left=0.01, pct_right=0.015)
+        got = [is_bilateral_resistance(data, i, 0.01, 0.015) for i in range(len(candles))]
+        assert [r for r in got if r] == exp["resistances"]
+        got = [is_bilateral_support(data, i, 0.01, 0.015) for i in range(len(candles))]
+        assert [r for r in got if r] == exp["supports"]
+
+if __name__ == "__main__":
+    test_engine_matches_reference()
+    test_engine_matches_reference_with_nan_bars()
+    test_single_index_calls()
+    print("fuzz: engine == reference on 300 random series (+300 with NaN bars)")
+
+    # ~10 years of 60-minute bars; quiet tape -> long reference scans
+    candles = random_candles(20000, random.Random(1), vol=0.003)
+    t0 = time.perf_counter()
+    reference(candles, 0.01, 0.015)
+    t1 = time.perf_counter()
+    all_bilateral_resistance_support(candles, pct_left=0.01, pct_right=0.015)
+    t2 = time.perf_counter()
+    print(f"20000 bars: reference {t1 - t0:.3f}s  engine {t2 - t1:.3f}s  ({(t1 - t0) / (t2 - t1):.1f}x)")
@@ -0,0 +1,116 @@
+# test_result_cache.py
+# ResultCache returns exactly the detector's result, keys on (series
+# fingerprint, full parameter tuple), serves repeats from memory and from disk
+# across instances, and keeps both tiers within their size bounds. Run as a
+# script for a first-scan vs repeat-scan benchmark.
+
+import os
+import random
+import tempfile
+import time
+
+from candle_series import as_series
+from result_cache import ResultCache, DETECTORS
+from resistance_support_percent_bilateral import all_bilateral_resistance_support
+from test_resistance_support_fuzz import random_candles
+
+PARAMS = {
+    "resistance_support": {"pct_left": 0.01, "pct_right": 0.015},
+    "demand_zones": {"lookback": 400},
+    "supply_zones": {"lookback": 400},
+    "simple_gaps": {},
+    "pro_gaps": {"min_bars": 3, "min_pct": 0.01},
+    "novice_gaps": {"N": 4, "pct": 0.01},
+}
+
+def _series(n, seed):
+    return as_series(random_candles(n, random.Random(seed), vol=0.01))
+
+def test_results_and_tiers():
+    s = _series(300, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3")
+        cache = ResultCache(path)
+        for name, params in PARAMS.items():
+            assert cache.run("X", "60minute", s, name, **params) == DETECTORS[name](s, **params), name
+        assert cache.stats()["misses"] == len(PARAMS)
+        for name, params in PARAMS.items():
+            cache.run("X", "60minute", s, name, **params)
+        assert cache.stats()["memory_hits"] == len(PARAMS)
+
+        # a fresh instance (another process / run) finds everything on disk
+        other = ResultCache(path)
+        for name, params in PARAMS.items():
+            assert other.run("X", "60minute", s, name, **params) == DETECTORS[name](s, **params), name
+        st = other.stats()
+        assert st["disk_hits"] == len(PARAMS) and st["misses"] == 0 and st["hit_rate"] == 1.0
+        cache.close()
+        other.close()
+
+def test_key_covers_series_and_params():
+    s = _series(200, 2)
+    cache = ResultCache(memory_only=True)
+    # defaults filled in: implicit and explicit default params share one entry
+    cache.run("X", "day", s, all_bilateral_resistance_support)
+    cache.run("X", "day", s, all_bilateral_resistance_support, pct_left=0.02, pct_right=0.03)
+    assert cache.stats()["misses"] == 1
+    # other params, symbol, interval, an extra bar, or a changed last bar: all misses
+    cache.run("X", "day", s, all_bilateral_resistance_support, pct_left=0.01)
+    cache.run("Y", "day", s, all_bilateral_resistance_support)
+    cache.run("X", "week", s, all_bilateral_resistance_support)
+    longer = _series(201, 2)
+    cache.run("X", "day", longer, all_bilateral_resistance_support)
+    shifted = as_series(s.to_list()[1:] + [dict(s[-1], date=s[-1]["date"].replace(year=2099))])
+    assert len(shifted) == len(s)
+    got = cache.run("X", "day", shifted, all_bilateral_resistance_support)
+    assert got == all_bilateral_resistance_support(shifted)
+    # the forming last bar refreshed in place: same count and timestamp, new prices
+    refreshed = as_series(s.to_list()[:-1] + [dict(s[-1], high=s[-1]["high"] * 1.2, close=s[-1]["high"] * 1.15)])
+    got = cache.run("X", "day", refreshed, all_bilateral_resistance_support)
+    assert got == all_bilateral_resistance_support(refreshed)
+    assert cache.stats()["misses"] == 7
+
+def test_size_bounds():
+    series = [_series(400, seed) for seed in range(12)]
+    with tempfile.TemporaryDirectory() as tmp:
+        sizes = []
+        probe = ResultCache(memory_only=True)
+        for k, s in enumerate(series):
+            probe.run(f"S{k}", "day", s, "resistance_support")
+            sizes.append(probe.stats()["memory_bytes"])
+        one = sizes[0]
+        cache = ResultCache(os.path.join(tmp, "r.sqlite3"), max_memory_bytes=3 * one, max_disk_bytes=5 * one)
+        for k, s in enumerate(series):
+            cache.run(f"S{k}", "day", s, "resistance_support")
+        st = cache.stats()
+        assert st["memory_bytes"] <= 3 * one and st["memory_evictions"] > 0
+        disk = cache._conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results").fetchone()
+        assert disk[0] <= 5 * one and st["disk_evictions"] == len(series) - disk[1]
+        # the newest results survive in both tiers
+        cache.reset_stats()
+        cache.run("S11", "day", series[11], "resistance_support")
+        assert cache.stats()["memory_hits"] == 1
+        cache.clear()
+        cache.run("S11", "day", series[11], "resistance_support")
+        assert cache.stats()["misses"] == 1
+        cache.close()
+
+if __name__ == "__main__":
+    test_results_and_tiers()
+    test_key_covers_series_and_params()
+    test_size_bounds()
+    print("result cache == detectors, keyed on series + params, tiers bounded")
+
+    universe = {f"SYM{k}": _series(2000, 100 + k) for k in range(50)}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.sqlite3")
+        timings = []
+        for label, cache in (("first scan", ResultCache(path)), ("same bar, memory", None), ("new process, disk", ResultCache(path))):
+            cache = cache or timings[-1][1]
+            t0 = time.perf_counter()
+            for sym, s in universe.items():
+                for name, params in PARAMS.items():
+                    cache.run(sym, "60minute", s, name, **params)
+            timings.append((label, cache, time.perf_counter() - t0))
+    print(f"{len(universe)} symbols x 2000 bars x {len(PARAMS)} detectors: "
+          + "  ".join(f"{label} {secs * 1000:.1f} ms" for label, _, secs in timings))
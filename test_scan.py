@@ -0,0 +1,139 @@
+# test_scan.py
+# scan() over synthetic ReplayKite fixtures: the pooled results equal running
+# each detector directly on the stored candles, failures are reported per
+# symbol, and detector specs / universe files parse as documented. Run as a
+# script for a serial-vs-pool throughput benchmark.
+
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import fetch
+import result_cache
+from candle_store import CandleStore, from_epoch
+from instruments import InstrumentResolver
+from replay_kite import ReplayKite, write_synthetic_fixtures
+from result_cache import ResultCache
+from scan import DETECTORS, scan, parse_detector, read_universe
+
+def _symbols(n):
+    return [f"SYN{i}" for i in range(n)]
+
+@contextmanager
+def fixture_store(tmp, symbols, n_bars=300):
+    """
+    fetch's shared store / resolver / rate limiters and the shared result cache
+    swapped for fresh ones in `tmp`; yields a ReplayKite over synthetic fixtures.
+    """
+    write_synthetic_fixtures(os.path.join(tmp, "fx"), symbols, n_bars=n_bars, seed=5)
+    old = fetch._store, fetch._resolver, result_cache._cache
+    old_limits = fetch.historical_limiter, fetch.quote_limiter
+    fetch.configure_rate_limits(historical=1000.0, quote=1000.0)
+    path = os.path.join(tmp, f"candles_{time.perf_counter_ns()}.sqlite3")
+    fetch._store, fetch._resolver = CandleStore(path), InstrumentResolver(path)
+    result_cache._cache = ResultCache(os.path.join(tmp, f"results_{time.perf_counter_ns()}.sqlite3"))
+    try:
+        yield ReplayKite(os.path.join(tmp, "fx"))
+    finally:
+        fetch._store.close()
+        fetch._resolver.close()
+        result_cache._cache.close()
+        fetch._store, fetch._resolver, result_cache._cache = old
+        fetch.historical_limiter, fetch.quote_limiter = old_limits
+
+def scan_with(tmp, symbols, detectors, days_back=200, **kw):
+    """scan() over fresh fixtures, plus each symbol's candles as fetch_ohlc_data serves them."""
+    with fixture_store(tmp, symbols) as client:
+        out = scan(symbols, detectors, days_back=days_back, client=client, **kw)
+        direct = {s: fetch.fetch_ohlc_data(s, "day", days_back, as_series=True, client=client) for s in symbols}
+    return out, direct
+
+def serial(candles, detectors):
+    return {name: DETECTORS[name][0](candles, **params) for name, params in detectors}
+
+def test_pool_matches_direct_detectors():
+    symbols = _symbols(6)
+    detectors = [parse_detector(d) for d in ("swings", "levels", "zones:lookback=150", "gaps:pro.min_pct=0.01")]
+    with tempfile.TemporaryDirectory() as tmp:
+        out, direct = scan_with(tmp, symbols, detectors, workers=2)
+    assert out["errors"] == {}
+    assert list(out["results"]) == symbols
+    for s in symbols:
+        res = out["results"][s]
+        assert res["bars"] == len(direct[s]) == 200
+        assert {k: v for k, v in res.items() if k != "bars"} == serial(direct[s], detectors), s
+    assert out["stats"]["bars"] == 200 * len(symbols)
+
+def test_rescan_is_served_from_result_cache():
+    symbols = _symbols(4)
+    detectors = [parse_detector(d) for d in ("levels", "zones", "momentum_gaps")]
+    with tempfile.TemporaryDirectory() as tmp, fixture_store(tmp, symbols) as client:
+        first = scan(symbols, detectors, days_back=200, client=client, workers=2)
+        again = scan(symbols, detectors, days_back=200, workers=2, refresh=False)
+        fresh = scan(symbols, detectors, days_back=200, workers=2, refresh=False, cache=False)
+    assert first["stats"]["cached"] == 0 and fresh["stats"]["cached"] == 0
+    assert again["stats"]["cached"] == len(symbols) * len(detectors)
+    assert again["results"] == first["results"] == fresh["results"]
+
+def test_refreshed_forming_bar_is_recomputed():
+    symbols = _symbols(3)
+    detectors = [parse_detector(d) for d in ("levels", "zones")]
+    with tempfile.TemporaryDirectory() as tmp, fixture_store(tmp, symbols) as client:
+        first = scan(symbols, detectors, days_back=200, client=client, workers=1)
+        # a top-up overwrites today's candle in place: same bar count, same timestamp
+        token = fetch.get_instrument_token(symbols[0], client=client)
+        ts, o, h, l, c = fetch._store.read_rows(token, "day")[-1]
+        fetch._store.write(token, "day", [{"date": from_epoch(ts), "open": o, "high": h * 1.2, "low": l, "close": h * 1.15}])
+        again = scan(symbols, detectors, days_back=200, workers=1, refresh=False)
+        fresh = scan(symbols, detectors, days_back=200, workers=1, refresh=False, cache=False)
+    assert first["stats"]["bars"] == again["stats"]["bars"]
+    assert again["stats"]["cached"] == (len(symbols) - 1) * len(detectors)
+    assert again["results"] == fresh["results"]
+
+def test_unknown_symbols_are_reported():
+    with tempfile.TemporaryDirectory() as tmp:
+        out, _ = scan_with(tmp, _symbols(2), [parse_detector("levels")], workers=1, refresh=False)
+        # nothing was fetched: tokens unknown, so every symbol is an error, not a crash
+        assert out["results"] == {}
+        assert set(out["errors"]) == set(_symbols(2))
+
+def test_parse_detector_and_universe():
+    assert parse_detector("levels") == ("levels", {"pct_left": 0.02, "pct_right": 0.03})
+    assert parse_detector("levels:pct_right=0.05") == ("levels", {"pct_left": 0.02, "pct_right": 0.05})
+    assert parse_detector("gaps:families=simple+pro,novice.N=5") == ("gaps", {"families": "simple+pro", "novice.N": 5})
+    for bad in ("nope", "levels:pct_left", "gaps:min_pct=0.03", "gaps:prro.min_pct=0.5", "gaps:families=simple+pr"):
+        try:
+            parse_detector(bad)
+        except ValueError:
+            continue
+        raise AssertionError(f"{bad!r} parsed")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "universe.txt")
+        with open(path, "w") as f:
+            f.write("# banks\nHDFCBANK\n\nRELIANCE  # energy\nHDFCBANK\nTCS\n")
+        assert read_universe(path) == ["HDFCBANK", "RELIANCE", "TCS"]
+
+if __name__ == "__main__":
+    test_pool_matches_direct_detectors()
+    test_rescan_is_served_from_result_cache()
+    test_refreshed_forming_bar_is_recomputed()
+    test_unknown_symbols_are_reported()
+    test_parse_detector_and_universe()
+    print("scan: pooled results == direct detectors, failures reported per symbol")
+
+    n_symbols, days_back = 200, 1400
+    symbols = _symbols(n_symbols)
+    detectors = [parse_detector(d) for d in DETECTORS]
+    with tempfile.TemporaryDirectory() as tmp, fixture_store(tmp, symbols, n_bars=1500) as client:
+        fetch.fetch_many(symbols, "day", days_back, client=client)   # warm the store once
+        t0 = time.perf_counter()
+        for s in symbols:
+            serial(fetch.fetch_ohlc_data(s, "day", days_back, as_series=True, client=client), detectors)
+        t1 = time.perf_counter()
+        out = scan(symbols, detectors, days_back=days_back, refresh=False)
+        again = scan(symbols, detectors, days_back=days_back, refresh=False)
+    st = out["stats"]
+    print(f"{n_symbols} symbols x {st['bars'] // n_symbols} bars, all detectors from the store: "
+          f"serial {t1 - t0:.2f}s  scan() on {os.cpu_count()} processes {st['seconds']:.2f}s  "
+          f"rescan, same bars (result cache) {again['stats']['seconds']:.2f}s")
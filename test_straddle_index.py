@@ -0,0 +1,108 @@
+# test_straddle_index.py
+# StraddleIndex.any(a, b, p) must equal the linear "low < p < high" scan it
+# replaced in momentum_zones / momentum_gaps. Run as a script for the
+# 5k-bar hourly benchmark of both detectors (index vs linear scan).
+
+import random
+import time
+
+import momentum_gaps
+import momentum_zones
+from range_index import StraddleIndex
+from test_resistance_support_fuzz import random_candles
+
+class LinearStraddles:
+    """The original per-bar scan, behind the StraddleIndex interface."""
+
+    def __init__(self, highs, lows):
+        self.highs, self.lows = list(highs), list(lows)
+
+    def any(self, a, b, p):
+        return any(self.lows[k] < p < self.highs[k] for k in range(max(a, 0), min(b, len(self.highs) - 1) + 1))
+
+def test_straddle_index_matches_scan(trials: int = 150, seed: int = 8):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(0, 130)
+        candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        highs, lows = [c["high"] for c in candles], [c["low"] for c in candles]
+        fast, slow = StraddleIndex(highs, lows), LinearStraddles(highs, lows)
+        fast.SCAN = rnd.choice([1, 4, 32])   # exercise the tree, not just the direct head scan
+        for _ in range(60):
+            a, b = rnd.randint(-2, n + 1), rnd.randint(-2, n + 1)
+            k = rnd.randrange(n) if n else 0
+            p = rnd.choice([highs[k], lows[k], (highs[k] + lows[k]) / 2]) if n else 100.0
+            assert fast.any(a, b, p) == slow.any(a, b, p), f"mismatch on trial {t} ({a}, {b}, {p})"
+
+def _inputs(candles):
+    from resistance_support_percent_bilateral import all_bilateral_resistance_support
+    from demandZone import find_demand_zones
+    from supplyZone import find_supply_zones
+    from gaps_simple import detect_simple_gaps
+    from analysis_graph import normalize_rbr_zones, normalize_dbd_zones
+    rs = all_bilateral_resistance_support(candles, pct_left=0.01, pct_right=0.015)
+    rbr = normalize_rbr_zones(find_demand_zones(candles, lookback=len(candles)))
+    dbd = normalize_dbd_zones(find_supply_zones(candles, lookback=len(candles)))
+    return rs, rbr, dbd, detect_simple_gaps(candles)
+
+def _run_detectors(candles, rs, rbr, dbd, gaps):
+    return (
+        momentum_zones.detect_momentum_zones(candles, rs["resistances"], rs["supports"], rbr, dbd),
+        momentum_gaps.detect_momentum_gaps(candles, gaps, rs["resistances"], rs["supports"]),
+    )
+
+class _Recorder:
+    """Wraps an index and records every obstruction query the detectors make."""
+
+    def __init__(self, inner, log):
+        self.inner, self.log = inner, log
+
+    def any(self, a, b, p):
+        self.log.append((a, b, p))
+        return self.inner.any(a, b, p)
+
+def _best_of(fn, reps=5):
+    best = float("inf")
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+if __name__ == "__main__":
+    test_straddle_index_matches_scan()
+    print("StraddleIndex == linear scan on 150 random series")
+
+    from candle_series import as_series
+    from range_index import straddle_index
+    candles = random_candles(5000, random.Random(3), vol=0.004)
+    inputs = _inputs(candles)
+    linear = lambda c: LinearStraddles(as_series(c).high.tolist(), as_series(c).low.tolist())
+
+    # the exact obstruction queries both detectors issue on this series
+    queries = []
+    momentum_zones.straddle_index = momentum_gaps.straddle_index = lambda c: _Recorder(straddle_index(c), queries)
+    fast = _run_detectors(as_series(candles), *inputs)
+    s = as_series(candles)
+    run_all = lambda index, qs: [index.any(*q) for q in qs]
+    t_lin = _best_of(lambda: run_all(linear(s), queries))
+    t_idx = _best_of(lambda: run_all(StraddleIndex(s.high, s.low), queries))
+    print(f"5000 hourly bars, {len(queries)} obstruction checks from the detectors: "
+          f"linear {t_lin * 1e3:.1f} ms  StraddleIndex (incl. build) {t_idx * 1e3:.1f} ms ({t_lin / t_idx:.1f}x)")
+    # every level checked against the rest of the series: long spans, the case that grows with bars
+    long_spans = [(int(L["index"]) + 1, len(candles) - 1, float(L["price"]))
+                  for L in inputs[0]["resistances"] + inputs[0]["supports"]]
+    t_lin = _best_of(lambda: run_all(linear(s), long_spans))
+    t_idx = _best_of(lambda: run_all(StraddleIndex(s.high, s.low), long_spans))
+    print(f"  {len(long_spans)} level-to-end checks: linear {t_lin * 1e3:.1f} ms  StraddleIndex {t_idx * 1e3:.1f} ms "
+          f"({t_lin / t_idx:.1f}x)")
+
+    factories = {"StraddleIndex": straddle_index, "linear scans": linear}
+    best = dict.fromkeys(factories, float("inf"))
+    for _ in range(5):   # interleaved so clock drift hits both alike
+        for name, factory in factories.items():
+            momentum_zones.straddle_index = momentum_gaps.straddle_index = factory
+            t0 = time.perf_counter()
+            assert _run_detectors(as_series(candles), *inputs) == fast
+            best[name] = min(best[name], time.perf_counter() - t0)
+    print("  momentum zones + gaps end to end: " + "  ".join(f"{k} {v * 1e3:.1f} ms" for k, v in best.items()))
@@ -0,0 +1,57 @@
+# test_swings_fuzz.py
+# Fuzz: all_bilateral_swings (vectorized) must match the per-index reference
+# scans (is_bilateral_swing_high / is_bilateral_swing_low) exactly, and
+# latest_bilateral_swings must return the last of them.
+
+import random
+import time
+
+from swings_percent_bilateral import (
+    all_bilateral_swings, latest_bilateral_swings, _columns, _swing_high_at, _swing_low_at
+)
+from test_resistance_support_fuzz import random_candles, with_nan_bars
+
+def reference(candles, pct):
+    n = len(candles)
+    cols = _columns(candles)
+    return {
+        "swing_highs": [h for h in (_swing_high_at(candles, cols, i, pct) for i in range(1, n - 1)) if h],
+        "swing_lows":  [l for l in (_swing_low_at(candles, cols, i, pct) for i in range(1, n - 1)) if l],
+    }
+
+def test_all_swings_match_reference(trials: int = 300, seed: int = 11):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(0, 250)
+        candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5, 2.0]))
+        pct = rnd.choice([0.0, 0.01, 0.03, 0.07])
+        got = all_bilateral_swings(candles, pct)
+        exp = reference(candles, pct)
+        assert got == exp, f"mismatch on trial {t} (n={n}, pct={pct})"
+        latest = latest_bilateral_swings(candles, pct, swings=got)
+        assert latest["swing_high"] == (exp["swing_highs"][-1] if exp["swing_highs"] else None)
+        assert latest["swing_low"] == (exp["swing_lows"][-1] if exp["swing_lows"] else None)
+
+def test_all_swings_match_reference_with_nan_bars(trials: int = 300, seed: int = 12):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        n = rnd.randint(0, 250)
+        candles = with_nan_bars(random_candles(n, rnd, tick=rnd.choice([0.0, 0.5])), rnd, k=rnd.randint(1, 3))
+        pct = rnd.choice([0.0, 0.01, 0.03])
+        got = all_bilateral_swings(candles, pct)
+        exp = reference(candles, pct)
+        # a swing on a NaN-high/low bar carries that NaN: compare by repr
+        assert repr(got) == repr(exp), f"mismatch on NaN trial {t} (n={n}, pct={pct})"
+
+if __name__ == "__main__":
+    test_all_swings_match_reference()
+    test_all_swings_match_reference_with_nan_bars()
+    print("fuzz: all_bilateral_swings == reference on 300 random series (+300 with NaN bars)")
+
+    candles = random_candles(20000, random.Random(1), vol=0.003)
+    t0 = time.perf_counter()
+    reference(candles, 0.03)
+    t1 = time.perf_counter()
+    all_bilateral_swings(candles, 0.03)
+    t2 = time.perf_counter()
+    print(f"20000 bars, every swing: per-index scans {t1 - t0:.3f}s  vectorized {t2 - t1:.3f}s")
@@ -0,0 +1,73 @@
+# test_universe_gaps.py
+# universe_gaps over a NaN-padded (symbols x sessions) matrix must report, for
+# every symbol, exactly the gaps the per-symbol detectors find in that symbol's
+# own candles. Run as a script for the ~170-symbol daily screen timing.
+
+import random
+import time
+
+from candle_series import as_series
+from universe_gaps import UniverseMatrix, universe_gaps
+from gaps_simple import detect_simple_gaps
+from pro_gaps import detect_pro_gaps
+from novice_gaps import detect_novice_gaps
+from test_resistance_support_fuzz import random_candles
+
+def random_universe(rnd, n_symbols, n_sessions, vol=0.03):
+    """{symbol: candles}, each symbol missing some sessions (late listing, holidays, suspensions)."""
+    universe = {}
+    for k in range(n_symbols):
+        candles = random_candles(n_sessions, rnd, tick=rnd.choice([0.0, 0.5]), vol=vol)
+        start = rnd.choice([0, 0, rnd.randrange(n_sessions + 1)])
+        universe[f"SYM{k}"] = [c for c in candles[start:] if rnd.random() > 0.1]
+    return universe
+
+def per_symbol(universe, N=3, pct=0.02, min_bars=3, min_pct=0.02):
+    """{(symbol, epoch, kind)} from the per-symbol detectors."""
+    out = set()
+    for sym, candles in universe.items():
+        s = as_series(candles)
+        found = detect_simple_gaps(s)
+        for v in detect_pro_gaps(s, min_bars=min_bars, min_pct=min_pct).values():
+            found += v
+        for v in detect_novice_gaps(s, N=N, pct=pct).values():
+            found += v
+        out |= {(sym, int(s.time[g["index"]]), g["type"]) for g in found}
+    return out
+
+def test_matrix_matches_per_symbol_detectors(trials: int = 40, seed: int = 18):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        universe = random_universe(rnd, rnd.randint(0, 12), rnd.randint(0, 60))
+        N, mb = rnd.randint(0, 5), rnd.randint(0, 5)
+        pct, min_pct = rnd.choice([0.0, 0.01, 0.03]), rnd.choice([0.0, 0.01, 0.03])
+        m = UniverseMatrix.from_series(universe)
+        hits = universe_gaps(m, config={"novice": {"N": N, "pct": pct}, "pro": {"min_bars": mb, "min_pct": min_pct}})
+        got = {(m.symbols[r], int(m.time[c]), kind) for kind, (rows, cols) in hits.items()
+               for r, c in zip(rows.tolist(), cols.tolist())}
+        assert got == per_symbol(universe, N, pct, mb, min_pct), f"mismatch on trial {t}"
+
+def test_records_last_session():
+    universe = random_universe(random.Random(2), 20, 40)
+    m = UniverseMatrix.from_series(universe)
+    hits = universe_gaps(m)
+    today = m.records(hits, last=1)
+    assert all(d == max(d for _, d, _ in m.records(hits)) for _, d, _ in today)
+    assert len(m.records(hits)) == sum(len(rows) for rows, _ in hits.values())
+
+if __name__ == "__main__":
+    test_matrix_matches_per_symbol_detectors()
+    test_records_last_session()
+    print("universe_gaps == per-symbol detectors on 40 random universes")
+
+    universe = {sym: as_series(c) for sym, c in random_universe(random.Random(1), 170, 250, vol=0.015).items()}
+    t0 = time.perf_counter()
+    slow = per_symbol(universe)
+    t1 = time.perf_counter()
+    m = UniverseMatrix.from_series(universe)
+    t2 = time.perf_counter()
+    hits = universe_gaps(m)
+    t3 = time.perf_counter()
+    print(f"170 symbols x 250 sessions: per-symbol detectors {(t1 - t0) * 1e3:.1f} ms  "
+          f"matrix build {(t2 - t1) * 1e3:.1f} ms  universe_gaps {(t3 - t2) * 1e3:.1f} ms  "
+          f"({sum(len(r) for r, _ in hits.values())} hits)")
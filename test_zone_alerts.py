@@ -0,0 +1,138 @@
+# test_zone_alerts.py
+# ZoneAlerts over random prices equals a brute-force check of every zone on
+# every price (closed bounds, edges hit exactly), cooldown suppresses chatter,
+# and zones load straight from detector / scan output. Run as a script for a
+# full-universe tick-rate benchmark.
+
+import random
+import time
+from datetime import datetime
+
+from candle_series import as_series
+from candle_store import IST
+from scan import DETECTORS
+from test_resistance_support_fuzz import random_candles
+from zone_alerts import ZoneAlerts, zone_bounds, zones_in
+
+nan = float("nan")
+
+def random_zones(rnd, n, mid=100.0):
+    zones = []
+    for _ in range(n):
+        lo = round(mid * (1 + rnd.uniform(-0.1, 0.1)), 2)
+        hi = round(lo * (1 + rnd.uniform(0.0, 0.02)), 2)
+        zones.append(("demand", {"zone_low": lo, "zone_high": hi}) if rnd.random() < 0.5
+                     else ("supply", {"proximal": hi, "distal": lo}))
+    return zones
+
+def brute_state(lo, hi, price, pct):
+    if lo <= price <= hi:
+        return 2
+    return 1 if lo * (1 - pct) <= price <= hi * (1 + pct) else 0
+
+def brute_events(zones, prices, pct):
+    bounds = [zone_bounds(z) for _, z in zones]
+    events, prev = [], None
+    for t, p in enumerate(prices):
+        now = [brute_state(lo, hi, p, pct) for lo, hi in bounds]
+        if prev is not None:
+            for k, (was, st) in enumerate(zip(prev, now)):
+                if st == 2 and was != 2:
+                    events.append((t, k, "enter"))
+                elif was == 2 and st != 2:
+                    events.append((t, k, "exit"))
+                elif st == 1 and was == 0:
+                    events.append((t, k, "approach"))
+        prev = now
+    return sorted(events)
+
+def test_matches_brute_force():
+    rnd = random.Random(7)
+    for trial in range(20):
+        pct = rnd.choice([0.0, 0.003, 0.01])
+        zones = random_zones(rnd, rnd.randint(0, 30))
+        # zones from NaN bars have no usable bounds: skipped, they must not disturb the others
+        loaded = list(zones)
+        for _ in range(rnd.choice([0, 0, 1, 3])):
+            bad = rnd.choice([{"zone_low": nan, "zone_high": nan}, {"zone_low": nan, "zone_high": 101.0},
+                              {"bottom": 99.0, "top": float("inf")}])
+            loaded.insert(rnd.randint(0, len(loaded)), ("demand", bad))
+        edges = sorted({x for _, z in zones for x in zone_bounds(z)})
+        prices, p = [], 100.0
+        for _ in range(800):
+            # mostly a walk, sometimes exactly on an edge
+            p = rnd.choice(edges) if edges and rnd.random() < 0.2 else round(p * (1 + rnd.gauss(0, 0.004)), 2)
+            prices.append(p)
+        alerts = ZoneAlerts(approach_pct=pct, cooldown=0)
+        assert alerts.load("X", loaded) == len(zones)
+        got = []
+        for t, price in enumerate(prices):
+            for ev in alerts.update("X", price, ts=float(t)):
+                k = next(k for k, z in enumerate(alerts.zones("X")) if z["source"] is ev["zone"])
+                got.append((t, k, ev["event"]))
+        assert sorted(got) == brute_events(zones, prices, pct), trial
+
+def test_cooldown_dedups_chatter():
+    alerts = ZoneAlerts(approach_pct=0.01, cooldown=60)
+    alerts.load("X", [("demand", {"bottom": 95.0, "top": 100.0})])
+    seen = []
+    for ts, price in enumerate([110, 100.5, 99.0, 100.2, 99.5, 100.3, 99.9]):
+        seen += [(ts, e["event"]) for e in alerts.update("X", price, ts=ts)]
+    assert seen == [(1, "approach"), (2, "enter"), (3, "exit")]
+    assert alerts.stats["suppressed"] == 3
+    # after the cooldown the same crossing fires again
+    assert [e["event"] for e in alerts.update("X", 100.4, ts=100)] == ["exit"]
+    assert [e["event"] for e in alerts.update("X", 99.0, ts=101)] == ["enter"]
+    # unknown symbols and the first price of a symbol fire nothing
+    assert alerts.update("Y", 97.0) == []
+    alerts.load("X", [("demand", {"bottom": 95.0, "top": 100.0})])
+    assert alerts.update("X", 97.0, ts=200) == []
+
+def test_tick_timestamps_are_ist():
+    # Kite hands out naive exchange timestamps in IST, whatever the host's zone
+    alerts = ZoneAlerts(approach_pct=0.01, cooldown=0)
+    alerts.load("X", [("demand", {"bottom": 95.0, "top": 100.0})])
+    d = datetime(2024, 3, 1, 9, 15)
+    tick = lambda price: {"instrument_token": 7, "last_price": price, "exchange_timestamp": d}
+    alerts.update_ticks([tick(110.0)], {7: "X"})
+    events = alerts.update_ticks([tick(99.0)], {7: "X"})
+    assert [e["ts"] for e in events] == [d.replace(tzinfo=IST).timestamp()]
+
+def test_loads_detector_output():
+    s = as_series(random_candles(600, random.Random(3), vol=0.01))
+    results = {"X": {"bars": len(s)}}
+    for name in ("zones", "momentum_zones", "momentum_gaps"):
+        fn, defaults = DETECTORS[name]
+        results["X"][name] = fn(s, **defaults)
+    want = zones_in({k: v for k, v in results["X"].items() if k != "bars"})
+    alerts = ZoneAlerts(approach_pct=0.005, cooldown=0)
+    assert alerts.load_results(results) == len(want) > 0
+    assert {kind.split(".")[0] for kind, _ in want} >= {"zones", "momentum_zones"}
+    closes = s.close.tolist()
+    events = [e for t, c in enumerate(closes) for e in alerts.update("X", c, ts=float(t))]
+    assert any(e["event"] == "enter" for e in events)
+    brute = brute_events(want, closes, 0.005)
+    assert len(events) == len(brute)
+
+if __name__ == "__main__":
+    test_matches_brute_force()
+    test_cooldown_dedups_chatter()
+    test_tick_timestamps_are_ist()
+    test_loads_detector_output()
+    print("zone alerts == brute force, cooldown dedups, detector output loads")
+
+    rnd = random.Random(1)
+    symbols = [f"SYM{k}" for k in range(170)]
+    alerts = ZoneAlerts(approach_pct=0.005, cooldown=300)
+    n_zones = sum(alerts.load(sym, random_zones(rnd, 40)) for sym in symbols)
+    last = {sym: 100.0 for sym in symbols}
+    stream = []
+    for t in range(200_000):
+        sym = symbols[t % len(symbols)]
+        last[sym] = round(last[sym] * (1 + rnd.gauss(0, 0.001)), 2)
+        stream.append((sym, last[sym], t / 1000.0))
+    t0 = time.perf_counter()
+    fired = sum(len(alerts.update(sym, p, ts)) for sym, p, ts in stream)
+    dt = time.perf_counter() - t0
+    print(f"{len(symbols)} symbols, {n_zones:,} zones, {len(stream):,} prices -> {fired:,} events: "
+          f"{dt:.2f}s ({len(stream) / dt:,.0f} ticks/s, target 10,000)")
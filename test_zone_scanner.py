@@ -0,0 +1,312 @@
+# test_zone_scanner.py
+# find_zones (basing runs + one sweep for both sides) must return exactly what
+# the original backward scans returned, NaN bars and every lookback included.
+# The reference scans below are find_demand_zones / find_supply_zones as they
+# were before the scanner. Run as a script for the 20k-bar benchmark.
+
+import random
+import time
+
+from candle_series import as_series
+from candle_colors import GREEN_CODE, RED_CODE, BASING_CODE, BASING_THRESHOLD, candle_colors
+from zone_scanner import find_zones, basing_runs
+from range_index import series_table
+from test_resistance_support_fuzz import random_candles
+
+# -------------------- reference scans --------------------
+
+def reference_demand_zones(candles, lookback=100, basing_threshold=BASING_THRESHOLD):
+    n = len(candles)
+    if n == 0:
+        return []
+
+    s = as_series(candles)
+    O, H, L, C = s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()
+
+    colors = candle_colors(s, basing_threshold).tolist()
+
+    zones = []
+    # Start probe line at the latest candle's low
+    line = L[-1]
+
+    start = n - 1
+    stop  = max(n - 1 - lookback, 0)
+
+    i = start
+    while i >= stop:
+        if L[i] > line:
+            i -= 1
+            continue
+
+        # We touched/breached the line
+        if colors[i] != GREEN_CODE:
+            line = L[i]
+            i -= 1
+            continue
+
+        # Collect consecutive basing candles just before this leg-out
+        base = []
+        j = i - 1
+        while j >= 0 and colors[j] == BASING_CODE:
+            base.append(j)
+            j -= 1
+
+        if not base:
+            
+            line = L[i]
+            i -= 1
+            continue
+        
+        base_highs = [H[b] for b in base]
+        if not (H[i] > max(base_highs)):
+            line = L[i]
+            i = i - 1
+            continue
+
+        # Determine leg-in 
+        leg_in = j if j >= 0 else None
+        zone_type = None
+        if leg_in is not None:
+            kin = colors[leg_in]
+            if kin == RED_CODE:
+                zone_type = "DBR"
+            elif kin == GREEN_CODE:
+                zone_type = "RBR"
+            else:
+                zone_type = "UNCLASSIFIED"
+        else:
+            zone_type = "UNCLASSIFIED"
+
+      
+        highs_base = [H[b] for b in base]
+        lows_base  = [L[b] for b in base]
+        base_high  = max(highs_base)
+        base_low   = min(lows_base)
+
+        if zone_type == "DBR":
+            zone_top = base_high
+            candidates = [base_low, L[i]]
+            if leg_in is not None:
+                candidates.append(L[leg_in])
+            zone_bottom = min(candidates)
+        elif zone_type == "RBR":
+            zone_top = base_high
+            zone_bottom = base_low
+        else:
+            
+            zone_top = base_high
+            zone_bottom = base_low
+
+        
+        zones.append({
+            "type": zone_type,
+            "top": zone_top,
+            "bottom": zone_bottom,
+            "created_at": candles[i].get("date"),
+            "leg_out_idx": i,
+            "leg_in_idx": j if j >= 0 else None,
+            "base_start_idx": j + 1,   # left-most basing candle
+            "base_end_idx": i - 1,     # right-most basing candle
+            "base_count": len(base),
+            "base_high": base_high,
+            "base_low": base_low,
+        })
+
+        # Move the probe line to the bottom of the found zone and continue scanning left
+        line = zone_bottom
+
+        # Advance left from where we were (avoid re-detecting the same structure)
+        i = j  # jump to the candle before the base; keeps scanning older bars
+
+    return zones
+
+def reference_supply_zones(candles, lookback=100, basing_threshold=BASING_THRESHOLD):
+    n = len(candles)
+    if n == 0:
+        return []
+
+    s = as_series(candles)
+    O, H, L, C = s.open.tolist(), s.high.tolist(), s.low.tolist(), s.close.tolist()
+
+    colors = candle_colors(s, basing_threshold).tolist()
+
+    zones = []
+    line = H[-1]   # start probe line at latest high
+
+    start = n - 1
+    stop = max(n - 1 - lookback, 0)
+
+    i = start
+    while i >= stop:
+        # If candle high < line, keep scanning left
+        if H[i] < line:
+            i -= 1
+            continue
+
+        # We touched/breached the line
+        if colors[i] != RED_CODE:
+            # Not decisive red: move probe line to this high
+            line = H[i]
+            i -= 1
+            continue
+
+        # Collect basing candles before this leg-out
+        base = []
+        j = i - 1
+        while j >= 0 and colors[j] == BASING_CODE:
+            base.append(j)
+            j -= 1
+
+        if not base:
+            line = H[i]
+            i -= 1
+            continue
+
+        base_lows = [L[b] for b in base]
+        if not (L[i] < min(base_lows)):
+            line = H[i]
+            i = i - 1
+            continue
+
+        # Leg-in candle (before base cluster)
+        leg_in = j if j >= 0 else None
+        zone_type = None
+        if leg_in is not None:
+            kin = colors[leg_in]
+            if kin == GREEN_CODE:
+                zone_type = "RBD" 
+            elif kin == RED_CODE:
+                zone_type = "DBD"  
+            else:
+                zone_type = "UNCLASSIFIED"
+        else:
+            zone_type = "UNCLASSIFIED"
+
+        body_highs = [H[b] for b in base]
+        body_lows  = [L[b] for b in base]
+        base_body_high = max(body_highs)
+        base_body_low  = min(body_lows)
+
+        if zone_type == "RBD":
+          
+            proximal = base_body_low
+           
+            highs = [H[i]] + body_highs
+            if leg_in is not None:
+                highs.append(H[leg_in])
+            distal = max(highs)
+
+        elif zone_type == "DBD":
+            
+            proximal = base_body_low
+           
+            highs = [H[i]] + body_highs
+            distal = max(highs)
+
+        else:
+            
+            proximal = base_body_low
+            distal = max([H[i]] + body_highs)
+
+        zones.append({
+            "type": zone_type,
+            "proximal": proximal,
+            "distal": distal,
+            "created_at": candles[i].get("date"),
+            "leg_out_idx": i,
+            "leg_in_idx": j if j >= 0 else None,
+            "base_start_idx": j + 1,
+            "base_end_idx": i - 1,
+            "base_count": len(base),
+        })
+
+        
+        line = distal
+        i = j
+
+    return zones
+
+# -------------------- tests --------------------
+
+def _random_series(rnd, n):
+    candles = random_candles(n, rnd, tick=rnd.choice([0.0, 0.5, 2.0]), vol=rnd.choice([0.002, 0.01, 0.03]))
+    for c in rnd.sample(candles, min(len(candles), rnd.choice([0, 0, 3]))):
+        c[rnd.choice(["open", "high", "low", "close"])] = float("nan")
+    return as_series(candles)
+
+def test_scanner_matches_reference_scans(trials: int = 300, seed: int = 19):
+    rnd = random.Random(seed)
+    for t in range(trials):
+        s = _random_series(rnd, rnd.randint(0, 200))
+        lookback, threshold = rnd.choice([0, 5, 50, 400]), rnd.choice([0.3, 0.5, 0.7])
+        if t % 2:
+            series_table(s, "high"), series_table(s, "low")   # probe lines jump via the shared tables
+        got = find_zones(s, lookback, threshold)
+        exp = {"demand": reference_demand_zones(s, lookback, threshold),
+               "supply": reference_supply_zones(s, lookback, threshold)}
+        assert repr(got) == repr(exp), f"mismatch on trial {t}"   # repr: NaN prices compare equal
+        assert repr(find_zones(s, lookback, threshold, sides=("supply",))) == repr({"supply": got["supply"]})
+
+def test_scalar_last_index_matches_scan(trials: int = 200, seed: int = 20):
+    from range_index import SparseTable
+    rnd = random.Random(seed)
+    for t in range(trials):
+        x = [rnd.choice([1.0, 2.0, 3.0, rnd.random() * 4]) for _ in range(rnd.randint(1, 40))]
+        for op in ("min", "max"):
+            table = SparseTable(x, op)
+            a, b = rnd.randint(0, len(x)), rnd.randint(-1, len(x) - 1)
+            thr, strict = rnd.choice(x + [float("nan")]), rnd.random() < 0.5
+            # a bar is "past" the threshold unless it is clearly on the far side (a NaN threshold stops at once)
+            hit = {("min", False): lambda v: not v > thr, ("min", True): lambda v: not v >= thr,
+                   ("max", False): lambda v: not v < thr, ("max", True): lambda v: not v <= thr}[op, strict]
+            exp = max((k for k in range(a, b + 1) if hit(x[k])), default=-1)
+            assert table.last_index(a, b, thr, strict) == exp, f"trial {t}"
+
+def test_basing_runs():
+    s = _random_series(random.Random(3), 300)
+    runs, colors = basing_runs(s), candle_colors(s).tolist()
+    for i in range(len(s)):
+        if colors[i] == BASING_CODE:
+            continue   # leg-outs are never BASING, so a run always ends right before one
+        j = i - 1
+        while j >= 0 and colors[j] == BASING_CODE:
+            j -= 1
+        base = runs.base_before(i)
+        if j == i - 1:
+            assert base is None
+        else:
+            assert base == (j + 1, max(s.high[j + 1:i].tolist()), min(s.low[j + 1:i].tolist()))
+    assert basing_runs(s) is runs
+
+if __name__ == "__main__":
+    test_scanner_matches_reference_scans()
+    test_scalar_last_index_matches_scan()
+    test_basing_runs()
+    print("find_zones == original demand / supply scans on 300 random series")
+
+    s = as_series(random_candles(20000, random.Random(3), vol=0.004))
+    exp = {"demand": reference_demand_zones(s, len(s)), "supply": reference_supply_zones(s, len(s))}
+
+    def fresh():
+        s._derived.clear()   # colors, runs and tables rebuilt, as on a new series
+
+    def shared():
+        # the high/low sparse tables already on the series (the momentum detectors build them too)
+        fresh()
+        series_table(s, "high"), series_table(s, "low")
+
+    runs = [
+        ("reference scans", fresh, lambda: {"demand": reference_demand_zones(s, len(s)),
+                                            "supply": reference_supply_zones(s, len(s))}),
+        ("find_zones, fresh series", fresh, lambda: find_zones(s, len(s))),
+        ("find_zones, shared tables", shared, lambda: find_zones(s, len(s))),
+    ]
+    best = {name: float("inf") for name, _, _ in runs}
+    for _ in range(5):   # interleaved so clock drift hits all alike
+        for name, setup, fn in runs:
+            setup()
+            t0 = time.perf_counter()
+            got = fn()
+            best[name] = min(best[name], time.perf_counter() - t0)
+            assert got == exp
+    print("20000 bars, full lookback, both sides: " + "  ".join(f"{k} {v * 1e3:.1f} ms" for k, v in best.items()))
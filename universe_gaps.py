@@ -0,0 +1,216 @@
+# universe_gaps.py
+# Gap screen over a whole universe at once: one (symbols x sessions) OHLC matrix
+# instead of one Python loop per symbol.
+#
+#   m = UniverseMatrix.from_store(store, {"RELIANCE": 738561, ...}, "day", from_ts)
+#   hits = universe_gaps(m)                  # {"gap_up": (rows, cols), ...}
+#   m.records(hits, last=1)                  # [("RELIANCE", date, "gap_up"), ...] on the latest session
+#
+# Sessions a symbol did not trade are NaN. Before evaluating, every row is
+# packed so its own bars sit side by side (one stable argsort), which makes
+# "previous bar" and "last N bars" mean the symbol's previous traded bars,
+# exactly as the per-symbol detectors see them. Simple, pro and novice gap
+# rules then run as a few elementwise NumPy operations over the packed matrix
+# (window rules: one operation per bar of the window), and hits are mapped back
+# to (symbol row, session column) pairs.
+
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_series import CandleSeries, as_series
+from candle_colors import GREEN_CODE, RED_CODE, classify_arrays
+from candle_store import from_epoch
+from gap_engine import DEFAULT_CONFIG
+
+Hits = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+KINDS = ("gap_up", "gap_down", "pro_gap_up", "pro_gap_down", "novice_gap_up", "novice_gap_down")
+
+
+class UniverseMatrix:
+    """
+    Aligned OHLC for many symbols.
+
+    Attributes:
+        symbols (List[str]): row labels
+        time (np.ndarray[int64]): epoch seconds per column (union of all sessions)
+        open, high, low, close (np.ndarray[float64]): (symbols x sessions), NaN where a symbol has no bar
+    """
+
+    def __init__(self, symbols: List[str], time, open, high, low, close):
+        self.symbols = list(symbols)
+        self.time = np.asarray(time, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+
+    # -------------------- construction --------------------
+
+    @classmethod
+    def from_series(cls, series: Dict[str, object]) -> "UniverseMatrix":
+        """Align {symbol: candles / CandleSeries}; None entries (failed fetches) are skipped."""
+        series = {sym: as_series(c) for sym, c in series.items() if c is not None}
+        symbols = list(series)
+        times = [s.time for s in series.values()]
+        time = np.unique(np.concatenate(times)) if times else np.empty(0, dtype=np.int64)
+        shape = (len(symbols), len(time))
+        cols = {k: np.full(shape, np.nan) for k in ("open", "high", "low", "close")}
+        for row, s in enumerate(series.values()):
+            at = np.searchsorted(time, s.time)
+            for k, arr in cols.items():
+                arr[row, at] = getattr(s, k)
+        return cls(symbols, time, cols["open"], cols["high"], cols["low"], cols["close"])
+
+    @classmethod
+    def from_store(cls, store, tokens: Dict[str, int], interval: str = "day",
+                   from_ts: Optional[int] = None, to_ts: Optional[int] = None) -> "UniverseMatrix":
+        """Build from a CandleStore: {symbol: instrument_token}, bars in [from_ts, to_ts]."""
+        return cls.from_series({
+            sym: CandleSeries.from_rows(store.read_rows(token, interval, from_ts, to_ts))
+            for sym, token in tokens.items()
+        })
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.close.shape
+
+    # -------------------- results --------------------
+
+    def records(self, hits: Hits, last: Optional[int] = None) -> List[Tuple[str, object, str]]:
+        """
+        Hits as (symbol, session datetime, kind), ordered by symbol row, session, then KINDS.
+
+        Args:
+            last (int): keep only hits on the last `last` sessions (e.g. 1 for today's screen)
+        """
+        first_col = self.time.size - last if last is not None else 0
+        out = []
+        for kind in KINDS:
+            if kind not in hits:
+                continue
+            rows, cols = hits[kind]
+            keep = cols >= first_col
+            out += [(r, c, KINDS.index(kind)) for r, c in zip(rows[keep].tolist(), cols[keep].tolist())]
+        out.sort()
+        return [(self.symbols[r], from_epoch(self.time[c]), KINDS[k]) for r, c, k in out]
+
+
+# -------------------- packing --------------------
+
+def _pack(m: UniverseMatrix):
+    """Each row's traded bars moved to the front, in order; returns (order, in_range, O, H, L, C)."""
+    valid = ~np.isnan(m.close)
+    order = np.argsort(~valid, axis=1, kind="stable")
+    packed = [np.take_along_axis(a, order, axis=1) for a in (m.open, m.high, m.low, m.close)]
+    in_range = np.arange(m.close.shape[1]) < valid.sum(axis=1)[:, None]
+    return (order, in_range, *packed)
+
+
+def _shift(a: np.ndarray, d: int, fill) -> np.ndarray:
+    """out[:, k] = a[:, k - d] (fill where k < d)."""
+    out = np.full_like(a, fill)
+    if d < a.shape[1]:
+        out[:, d:] = a[:, :a.shape[1] - d]
+    return out
+
+
+def _window_extreme(C: np.ndarray, lo_d: int, hi_d: int, first: int, op) -> np.ndarray:
+    """
+    At every column p: op over C[:, p - d] for d in [lo_d..hi_d] with p - d >= first
+    (+inf / -inf where that window is empty).
+    """
+    fill = np.inf if op is np.minimum else -np.inf
+    out = np.full_like(C, fill)
+    cols = np.arange(C.shape[1])
+    for d in range(lo_d, hi_d + 1):
+        shifted = np.where(cols >= first + d, _shift(C, d, fill), fill)
+        out = op(out, shifted)
+    return out
+
+
+def _at_prior(a: np.ndarray, fill) -> np.ndarray:
+    """Re-index a per-column value at the prior bar: out[:, k] = a[:, k - 1]."""
+    return _shift(a, 1, fill)
+
+
+# -------------------- screen --------------------
+
+def universe_gaps(
+    m: UniverseMatrix,
+    families=("simple", "pro", "novice"),
+    config: Optional[Dict[str, Dict]] = None,
+) -> Hits:
+    """
+    Simple / pro / novice gaps for every symbol of the matrix.
+
+    Args:
+        m (UniverseMatrix): aligned universe
+        families: any of "simple", "pro", "novice"
+        config (dict): {"pro": {...}, "novice": {...}} overrides of gap_engine.DEFAULT_CONFIG
+
+    Returns:
+        dict: kind -> (symbol rows, session columns), both int64 arrays sorted by (row, column).
+              Each hit is what the per-symbol detector reports for that symbol's candles.
+    """
+    cfg = {k: dict(v) for k, v in DEFAULT_CONFIG.items()}
+    for k, v in (config or {}).items():
+        cfg.setdefault(k, {}).update(v)
+
+    order, in_range, O, H, L, C = _pack(m)
+    T = C.shape[1]
+    hits: Hits = {}
+
+    def emit(kind, mask):
+        rows, ks = np.nonzero(mask & in_range)
+        hits[kind] = (rows.astype(np.int64), order[rows, ks].astype(np.int64))
+
+    # bar k against bar k-1 (column 0 has no prior bar)
+    prev_close = _at_prior(C, np.nan)
+    gap_up = L > prev_close
+    gap_down = H < prev_close
+
+    if "simple" in families:
+        emit("gap_up", gap_up)
+        emit("gap_down", gap_down & ~gap_up)
+
+    if "pro" in families:
+        p = cfg["pro"]
+        colors = classify_arrays(O, H, L, C, p["basing_threshold"])
+        prior_colors = _at_prior(colors, 0)
+        mb, pct = int(p["min_bars"]), p["min_pct"]
+        if mb >= 1:
+            # context window of the prior bar q = k - 1: closes[q - mb .. q - 1], only when q - mb >= 0
+            full = np.arange(T) - 1 >= mb
+            cmax = _at_prior(_window_extreme(C, 1, mb, 0, np.maximum), -np.inf)
+            cmin = _at_prior(_window_extreme(C, 1, mb, 0, np.minimum), np.inf)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                down = full & (cmax > 0) & ((cmax - prev_close) / cmax >= pct)
+                up = full & (cmin > 0) & ((prev_close - cmin) / cmin >= pct)
+            emit("pro_gap_up", (prior_colors == RED_CODE) & (colors == GREEN_CODE) & gap_up & down)
+            emit("pro_gap_down", (prior_colors == GREEN_CODE) & (colors == RED_CODE) & gap_down & up)
+        else:
+            emit("pro_gap_up", np.zeros_like(gap_up))
+            emit("pro_gap_down", np.zeros_like(gap_up))
+
+    if "novice" in families:
+        nv = cfg["novice"]
+        N, pct = int(nv["N"]), nv["pct"]
+        if N >= 1:
+            # prior bar q = k - 1: closes[max(1, q - N) .. q - 1]; any simple gap in [max(1, q - N) .. q]
+            cmin = _at_prior(_window_extreme(C, 1, N, 1, np.minimum), np.inf)
+            cmax = _at_prior(_window_extreme(C, 1, N, 1, np.maximum), -np.inf)
+            any_up = _at_prior(_window_extreme(gap_up.astype(np.float64), 0, N, 1, np.maximum), -np.inf) > 0
+            any_down = _at_prior(_window_extreme(gap_down.astype(np.float64), 0, N, 1, np.maximum), -np.inf) > 0
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rise = (cmin > 0) & np.isfinite(cmin) & ((prev_close - cmin) / cmin >= pct)
+                drop = (cmax > 0) & np.isfinite(cmax) & ((cmax - prev_close) / cmax >= pct)
+            prior_low, prior_high = _at_prior(L, np.nan), _at_prior(H, np.nan)
+            emit("novice_gap_down", (O > prev_close) & (C < prior_low) & rise & any_up)
+            emit("novice_gap_up", (O < prev_close) & (C > prior_high) & drop & any_down)
+        else:
+            emit("novice_gap_down", np.zeros_like(gap_up))
+            emit("novice_gap_up", np.zeros_like(gap_up))
+
+    return hits
@@ -0,0 +1,201 @@
+# zone_alerts.py
+# Price-in-zone alerts for a whole universe: enter / exit / approach events.
+#
+#   alerts = ZoneAlerts(approach_pct=0.005, cooldown=300)
+#   alerts.load_results(scan(...)["results"])       # every zone of every detector, per symbol
+#   for ev in alerts.update("RELIANCE", 2861.5, ts):
+#       print(ev["event"], ev["kind"], ev["zone_low"], ev["zone_high"])
+#
+# Zones are read from any detector row carrying zone_low/zone_high, bottom/top,
+# proximal/distal (or a simple gap's prev_close/current_low_or_high), so demand
+# and supply zones, momentum / continuation zones and gap zones all load as-is.
+#
+# Per symbol, the zone edges and the approach-band edges (x% outside each zone)
+# cut the price line into elementary regions (each edge value is a region of
+# its own, so closed bounds stay exact). Every region stores which zones a price
+# in it is inside / near, so one bisect classifies a price against all zones:
+# O(log z). A price in the same region as the previous one cannot change any
+# zone's state and returns straight away; otherwise the two regions' states are
+# diffed:
+#   enter:    a zone now holds the price (from near or outside)
+#   exit:     a zone held the price and no longer does
+#   approach: the price came within approach_pct of a zone from outside
+# An event repeated for the same zone within `cooldown` seconds of the last one
+# (price chattering on an edge) is suppressed.
+
+import math
+import time
+from bisect import bisect_left
+from typing import List, Dict, Optional, Tuple
+
+from candle_store import to_epoch
+
+INSIDE, NEAR = 2, 1   # region states; zones not listed in a region are outside
+
+# (low key, high key) pairs recognised in detector rows, first match wins
+BOUNDS = (("zone_low", "zone_high"), ("bottom", "top"), ("proximal", "distal"),
+          ("prev_close", "current_low_or_high"))
+
+
+def zone_bounds(z: Dict) -> Optional[Tuple[float, float]]:
+    """(low, high) of a detector row, or None if it carries no zone (or a NaN / inf bound)."""
+    for a, b in BOUNDS:
+        if a in z and b in z and z[a] is not None and z[b] is not None:
+            lo, hi = float(z[a]), float(z[b])
+            if not (math.isfinite(lo) and math.isfinite(hi)):
+                return None
+            return (lo, hi) if lo <= hi else (hi, lo)
+    return None
+
+
+def zones_in(result, kind: str = "") -> List[Tuple[str, Dict]]:
+    """(kind, row) for every zone row inside a detector result; kind is the path of list keys."""
+    if isinstance(result, dict):
+        out = []
+        for key, val in result.items():
+            if isinstance(val, (list, dict)):
+                out += zones_in(val, f"{kind}.{key}" if kind else key)
+        return out
+    if isinstance(result, list):
+        return [(kind, z) for z in result if isinstance(z, dict) and zone_bounds(z) is not None]
+    return []
+
+
+class _SymbolIndex:
+    """Elementary regions of one symbol's zones + approach bands."""
+
+    __slots__ = ("zones", "edges", "regions")
+
+    def __init__(self, zones: List[Dict], approach_pct: float):
+        self.zones = zones
+        bands = []
+        for k, z in enumerate(zones):
+            lo, hi = z["zone_low"], z["zone_high"]
+            bands.append((k, lo, hi, lo * (1.0 - approach_pct), hi * (1.0 + approach_pct)))
+        self.edges = sorted({x for _, lo, hi, nlo, nhi in bands for x in (lo, hi, nlo, nhi)})
+        # region 2j+1 is the edge value edges[j]; region 2j is the open gap just below it
+        probes = []
+        for j, e in enumerate(self.edges):
+            below = self.edges[j - 1] if j else e - 1.0
+            probes += [(below + e) / 2.0, e]
+        probes.append(self.edges[-1] + 1.0 if self.edges else 0.0)
+        self.regions: List[Tuple[Tuple[int, int], ...]] = []
+        for p in probes:
+            states = []
+            for k, lo, hi, nlo, nhi in bands:
+                if lo <= p <= hi:
+                    states.append((k, INSIDE))
+                elif nlo <= p <= nhi:
+                    states.append((k, NEAR))
+            self.regions.append(tuple(states))
+
+    def region(self, price: float) -> int:
+        j = bisect_left(self.edges, price)
+        return 2 * j + 1 if j < len(self.edges) and self.edges[j] == price else 2 * j
+
+
+class ZoneAlerts:
+    """
+    Args:
+        approach_pct (float): "approach" fires when price comes within this fraction
+                              below a zone's low / above its high
+        cooldown (float): seconds during which the same event on the same zone is not repeated
+    """
+
+    def __init__(self, approach_pct: float = 0.005, cooldown: float = 300.0):
+        self.approach_pct = approach_pct
+        self.cooldown = cooldown
+        self._index: Dict[str, _SymbolIndex] = {}
+        self._region: Dict[str, int] = {}              # symbol -> region of the last price
+        self._fired: Dict[tuple, float] = {}           # (symbol, zone no, event) -> time fired
+        self.stats = {"prices": 0, "events": 0, "suppressed": 0}
+
+    # -------------------- zones --------------------
+
+    def load(self, symbol: str, zones: List[Tuple[str, Dict]]) -> int:
+        """
+        Replace one symbol's zones with [(kind, detector row)] (as zones_in returns);
+        rows without usable bounds are skipped. The next price only sets the
+        starting state, it fires nothing.
+
+        Returns:
+            int: zones loaded
+        """
+        rows = []
+        for kind, z in zones:
+            bounds = zone_bounds(z)
+            if bounds is None:
+                continue
+            lo, hi = bounds
+            rows.append({"kind": kind, "zone_low": lo, "zone_high": hi, "source": z})
+        self._index[symbol] = _SymbolIndex(rows, self.approach_pct)
+        self._region.pop(symbol, None)
+        self._fired = {k: v for k, v in self._fired.items() if k[0] != symbol}
+        return len(rows)
+
+    def load_results(self, results: Dict[str, Dict]) -> int:
+        """Every zone of {symbol: {detector: result}} (scan()["results"]); returns zones loaded."""
+        return sum(self.load(symbol, zones_in({k: v for k, v in res.items() if k != "bars"}))
+                   for symbol, res in results.items())
+
+    def zones(self, symbol: str) -> List[Dict]:
+        idx = self._index.get(symbol)
+        return idx.zones if idx is not None else []
+
+    # -------------------- prices --------------------
+
+    def update(self, symbol: str, price: float, ts: Optional[float] = None) -> List[Dict]:
+        """
+        Events caused by a new price for one symbol.
+
+        Returns:
+            List[dict]: {"event": "enter"|"exit"|"approach", "symbol", "price", "ts",
+                         "kind", "zone_low", "zone_high", "zone": detector row}
+        """
+        self.stats["prices"] += 1
+        idx = self._index.get(symbol)
+        if idx is None:
+            return []
+        r = idx.region(price)
+        prev = self._region.get(symbol)
+        if r == prev:
+            return []
+        self._region[symbol] = r
+        if prev is None:
+            return []
+        before, after = dict(idx.regions[prev]), dict(idx.regions[r])
+        events = []
+        for k in set(before) | set(after):
+            was, now = before.get(k, 0), after.get(k, 0)
+            if now == INSIDE and was != INSIDE:
+                event = "enter"
+            elif was == INSIDE and now != INSIDE:
+                event = "exit"
+            elif now == NEAR and was == 0:
+                event = "approach"
+            else:
+                continue
+            events.append(self._event(symbol, k, event, price, ts, idx.zones[k]))
+        return [e for e in events if e is not None]
+
+    def update_ticks(self, ticks: List[Dict], symbols: Dict[int, str]) -> List[Dict]:
+        """update() for a batch of Kite ticks; `symbols` maps instrument_token -> symbol (naive timestamps are IST)."""
+        events = []
+        for tick in ticks:
+            symbol = symbols.get(tick["instrument_token"])
+            if symbol is not None:
+                d = tick.get("exchange_timestamp")
+                events += self.update(symbol, tick["last_price"], to_epoch(d) if d is not None else None)
+        return events
+
+    def _event(self, symbol, k, event, price, ts, zone) -> Optional[Dict]:
+        now = time.time() if ts is None else ts
+        key = (symbol, k, event)
+        last = self._fired.get(key)
+        if last is not None and now - last < self.cooldown:
+            self.stats["suppressed"] += 1
+            return None
+        self._fired[key] = now
+        self.stats["events"] += 1
+        return {"event": event, "symbol": symbol, "price": price, "ts": now, "kind": zone["kind"],
+                "zone_low": zone["zone_low"], "zone_high": zone["zone_high"], "zone": zone["source"]}
@@ -0,0 +1,232 @@
+# zone_scanner.py
+# Demand (DBR / RBR) and supply (DBD / RBD) zones from one right-to-left sweep.
+#
+# Both scans walk left from the latest candle with a probe line and, at every
+# decisive leg-out candle touching it, look at the run of BASING candles just
+# before it. Those runs are precomputed once per series (run-length encoded,
+# with each run's max high and min low), so the base of any leg-out is an O(1)
+# lookup instead of a walk plus max()/min() over it. When the series already
+# carries its high/low sparse tables (range_index.series_table), bars that do
+# not touch a probe line are skipped with one search. The demand and supply
+# cursors then advance together through the same sweep; each keeps its own
+# probe line and lookback cutoff exactly as find_demand_zones /
+# find_supply_zones always did.
+
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from candle_series import as_series
+from candle_colors import GREEN_CODE, RED_CODE, BASING_CODE, BASING_THRESHOLD, candle_colors
+from range_index import SparseTable
+
+Candle = Dict[str, float]
+
+
+class BasingRuns:
+    """
+    Maximal runs of consecutive BASING candles, as arrays (one entry per run).
+
+    Attributes:
+        starts, ends (np.ndarray[int64]): first / last bar of each run
+        highs, lows (np.ndarray[float64]): max high / min low of each run
+    """
+
+    def __init__(self, candles, basing_threshold: float = BASING_THRESHOLD):
+        s = as_series(candles)
+        basing = candle_colors(s, basing_threshold) == BASING_CODE
+        edges = np.diff(np.concatenate(([False], basing, [False])).astype(np.int8))
+        self.starts = np.flatnonzero(edges == 1)
+        self.ends = np.flatnonzero(edges == -1) - 1
+        # reduce over the BASING bars only; runs are contiguous slices of that compressed array.
+        # BASING bars always have a finite range, so the reductions see no NaN.
+        offsets = np.concatenate(([0], np.cumsum(self.ends - self.starts + 1)[:-1])).astype(np.int64)
+        if len(self.starts):
+            self.highs = np.maximum.reduceat(s.high[basing], offsets)
+            self.lows = np.minimum.reduceat(s.low[basing], offsets)
+        else:
+            self.highs = self.lows = np.empty(0)
+        # run ending at each bar (-1 where no run ends)
+        self._run_ending_at = np.full(len(s), -1, dtype=np.int64)
+        self._run_ending_at[self.ends] = np.arange(len(self.ends))
+
+    def base_before(self, i: int) -> Optional[Tuple[int, float, float]]:
+        """(first bar, max high, min low) of the basing run right before a non-BASING bar i, or None."""
+        if i < 1:
+            return None
+        r = self._run_ending_at.item(i - 1)
+        if r < 0:
+            return None
+        return self.starts.item(r), self.highs.item(r), self.lows.item(r)
+
+
+def basing_runs(candles, basing_threshold: float = BASING_THRESHOLD) -> BasingRuns:
+    """BasingRuns for a series, built once and cached on the CandleSeries."""
+    s = as_series(candles)
+    key = ("basing_runs", basing_threshold)
+    runs = s._derived.get(key)
+    if runs is None:
+        runs = BasingRuns(s, basing_threshold)
+        s._derived[key] = runs
+    return runs
+
+
+def _touch_tables(s) -> Tuple[Optional[SparseTable], Optional[SparseTable]]:
+    """
+    The series' cached LOW min-table / HIGH max-table for jumping the probe lines,
+    or None where a table is not built yet (building one costs more than a short
+    lookback scan) or the column holds NaN (NaN bars must count as touching).
+    """
+    out = []
+    for column in ("low", "high"):
+        table = s._derived.get(("sparse", column))
+        out.append(table if table is not None and not np.isnan(getattr(s, column)).any() else None)
+    return out[0], out[1]
+
+
+# -------------------- per-side steps --------------------
+# Each step handles a cursor bar i that touched/breached its probe line and
+# returns (next i, new line, zone or None).
+
+def _demand_step(candles, cols, colors, runs: BasingRuns, i: int):
+    H, L = cols
+    if colors[i] != GREEN_CODE:
+        return i - 1, L[i], None
+    base = runs.base_before(i)
+    if base is None:
+        return i - 1, L[i], None
+    b0, base_high, base_low = base
+    if not (H[i] > base_high):
+        return i - 1, L[i], None
+
+    j = b0 - 1
+    leg_in = j if j >= 0 else None
+    if leg_in is None:
+        zone_type = "UNCLASSIFIED"
+    else:
+        kin = colors[leg_in]
+        zone_type = "DBR" if kin == RED_CODE else "RBR" if kin == GREEN_CODE else "UNCLASSIFIED"
+
+    zone_top = base_high
+    if zone_type == "DBR":
+        zone_bottom = min([base_low, L[i], L[leg_in]])
+    else:
+        zone_bottom = base_low
+
+    zone = {
+        "type": zone_type,
+        "top": zone_top,
+        "bottom": zone_bottom,
+        "created_at": candles[i].get("date"),
+        "leg_out_idx": i,
+        "leg_in_idx": leg_in,
+        "base_start_idx": j + 1,   # left-most basing candle
+        "base_end_idx": i - 1,     # right-most basing candle
+        "base_count": i - b0,
+        "base_high": base_high,
+        "base_low": base_low,
+    }
+    # Probe line moves to the zone bottom; continue left of the base
+    return j, zone_bottom, zone
+
+
+def _supply_step(candles, cols, colors, runs: BasingRuns, i: int):
+    H, L = cols
+    if colors[i] != RED_CODE:
+        return i - 1, H[i], None
+    base = runs.base_before(i)
+    if base is None:
+        return i - 1, H[i], None
+    b0, base_high, base_low = base
+    if not (L[i] < base_low):
+        return i - 1, H[i], None
+
+    j = b0 - 1
+    leg_in = j if j >= 0 else None
+    if leg_in is None:
+        zone_type = "UNCLASSIFIED"
+    else:
+        kin = colors[leg_in]
+        zone_type = "RBD" if kin == GREEN_CODE else "DBD" if kin == RED_CODE else "UNCLASSIFIED"
+
+    proximal = base_low
+    if zone_type == "RBD":
+        distal = max([H[i], base_high, H[leg_in]])
+    else:
+        distal = max([H[i], base_high])
+
+    zone = {
+        "type": zone_type,
+        "proximal": proximal,
+        "distal": distal,
+        "created_at": candles[i].get("date"),
+        "leg_out_idx": i,
+        "leg_in_idx": leg_in,
+        "base_start_idx": j + 1,
+        "base_end_idx": i - 1,
+        "base_count": i - b0,
+    }
+    return j, distal, zone
+
+
+# -------------------- scanner --------------------
+
+def find_zones(
+    candles: List[Candle],
+    lookback: int = 100,
+    basing_threshold: float = BASING_THRESHOLD,
+    sides: Tuple[str, ...] = ("demand", "supply"),
+) -> Dict[str, List[Dict]]:
+    """
+    Demand and supply zones in one right-to-left sweep.
+
+    Args:
+        candles: list of candle dicts or a CandleSeries
+        lookback (int): bars to scan back from the latest candle
+        basing_threshold (float): body/range ratio below which a candle is BASING
+        sides: "demand" and/or "supply"
+
+    Returns:
+        dict: {"demand": find_demand_zones(...), "supply": find_supply_zones(...)} for the requested sides
+    """
+    n = len(candles)
+    out = {side: [] for side in sides}
+    if n == 0:
+        return out
+
+    s = as_series(candles)
+    cols = (s.high.tolist(), s.low.tolist())
+    colors = candle_colors(s, basing_threshold).tolist()
+    runs = basing_runs(s, basing_threshold)
+    low_min, high_max = _touch_tables(s)
+    stop = max(n - 1 - lookback, 0)
+
+    H, L = cols
+    demand, supply = out.get("demand"), out.get("supply")
+    # one cursor + probe line per side (a side not asked for parks at -1, left of stop);
+    # probe lines start at the latest low / high
+    di, dline = (n - 1, L[-1]) if demand is not None else (-1, 0.0)
+    si, sline = (n - 1, H[-1]) if supply is not None else (-1, 0.0)
+
+    # Always advance the right-most cursor, so the sweep visits bars newest to oldest once
+    while True:
+        if di >= si:
+            if di < stop:
+                break
+            if L[di] > dline:
+                # skip to the next bar left of di touching the line (-1: none left)
+                di = low_min.last_index(stop, di, dline) if low_min is not None else di - 1
+                continue
+            di, dline, zone = _demand_step(candles, cols, colors, runs, di)
+            if zone is not None:
+                demand.append(zone)
+        else:
+            if si < stop:
+                break
+            if H[si] < sline:
+                si = high_max.last_index(stop, si, sline) if high_max is not None else si - 1
+                continue
+            si, sline, zone = _supply_step(candles, cols, colors, runs, si)
+            if zone is not None:
+                supply.append(zone)
+    return out